@@ -0,0 +1,260 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Writes synthetic versions of the 5 input data files, with the same columns (and column order) as the real Ontario files, so the scripts can be measured at any scale without the git-LFS data. The same seed and row count always give the same files.
+
+  There are 2 commandline arguments and 1 optional argument:
+    - output_folder (string)  The files are written with the same names and layout as the Data folder, so the folder can be passed to run_all.py --data
+    - num_rows (integer)      Number of data rows in every file, e.g. 10000 up to 50000000
+    - seed (integer, optional, default 0)
+
+  Optional flags (may be placed anywhere after the script name):
+    - --days=N  Number of days the dates are spread over (default 730). The rows of every file are in date order, as in the real files.
+
+  Files written:
+    - covid_case_file/conposcovidloc.csv                 (18 columns, one row per case)
+    - schoolrecentcovid2021_2022_2022-02-08_22-17.csv    (10 columns, grouped by date and school board)
+    - ongoing_outbreaks_phu.csv                          (5 columns, grouped by date and PHU)
+    - vaccine_doses_given.csv                            (11 columns, cumulative totals)
+    - icu_data_by_vac_status.csv                         (8 columns)
+
+  When num_rows is more than the number of days, several rows share a date (the daily vaccine and ICU files then repeat dates).
+
+To run on commandline:
+python Benchmarks/generate_data.py .cache/benchmarks/100000 100000
+'''
+
+# Packages/Modules #
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Shared modules live in the Common folder beside this one
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+import cli_flags
+
+
+# Constants #
+START_DATE = np.datetime64("2020-03-01")
+DEFAULT_DAYS = 730
+
+# Rows generated and written at a time, so memory stays flat up to 50M rows
+CHUNK_ROWS = 1_000_000
+
+ONTARIO_POPULATION = 14915270
+
+# File names, relative to the output folder (the same as in the Data folder)
+CASE_FILE = os.path.join("covid_case_file", "conposcovidloc.csv")
+SCHOOL_FILE = "schoolrecentcovid2021_2022_2022-02-08_22-17.csv"
+OUTBREAK_FILE = "ongoing_outbreaks_phu.csv"
+VACCINE_FILE = "vaccine_doses_given.csv"
+ICU_FILE = "icu_data_by_vac_status.csv"
+
+AGE_GROUPS = np.array(["<20", "20s", "30s", "40s", "50s", "60s", "70s", "80s", "90+", "UNKNOWN"], dtype=object)
+AGE_GROUP_WEIGHTS = [0.17, 0.2, 0.16, 0.14, 0.13, 0.09, 0.05, 0.03, 0.02, 0.01]
+
+# Public Health Units: id, name (as in the case file), name (as in the outbreak file), address, city, postal code, website, latitude, longitude
+PHUS = [
+  (3895, "Toronto Public Health", "TORONTO", "277 Victoria Street, 5th Floor", "Toronto", "M5B 1W2", "www.toronto.ca/community-people/health-wellness-care/", 43.656591, -79.379358),
+  (2251, "Ottawa Public Health", "CITY OF OTTAWA", "100 Constellation Drive", "Ottawa", "K2G 6J8", "www.ottawapublichealth.ca", 45.345665, -75.763912),
+  (2253, "Peel Public Health", "PEEL REGION", "7120 Hurontario Street", "Mississauga", "L5W 1N4", "www.peelregion.ca/health/", 43.647471, -79.708893),
+  (2246, "Niagara Region Public Health Department", "NIAGARA REGION", "1815 Sir Isaac Brock Way", "Thorold", "L2V 4T7", "www.niagararegion.ca/health", 43.116537, -79.241220),
+  (2270, "York Region Public Health Services", "YORK REGION", "17250 Yonge Street", "Newmarket", "L3Y 6Z1", "www.york.ca/wps/portal/yorkhome/health/", 44.048023, -79.480239),
+  (2236, "Halton Region Health Department", "HALTON REGION", "1151 Bronte Road", "Oakville", "L6M 3L1", "www.halton.ca/For-Residents/Public-Health/", 43.413997, -79.744796),
+]
+OUTBREAK_GROUPS = np.array(["1 Congregate Care", "2 Congregate Living", "3 Education", "4 Workplace", "5 Recreational", "6 Other/Unknown"], dtype=object)
+
+SCHOOL_BOARDS = np.array(["Peel District School Board", "Toronto District School Board", "Ottawa-Carleton District School Board",
+                          "York Region District School Board", "Halton Catholic District School Board", "District School Board of Niagara"], dtype=object)
+
+
+# Returns the date of every row in [start_row, stop_row), spreading num_rows rows evenly (in order) over the days
+def row_days(start_row, stop_row, num_rows, days):
+  return (np.arange(start_row, stop_row, dtype=np.int64) * days) // num_rows
+
+
+# Returns "YYYY-MM-DD" labels for day numbers (days since START_DATE)
+def day_labels(day_numbers):
+  return np.datetime_as_string(START_DATE + day_numbers, unit="D").astype(object)
+
+
+# Each *_chunk function returns the rows [start_row, stop_row) of its file as a DataFrame
+
+def case_chunk(rng, start_row, stop_row, num_rows, days):
+  num_chunk_rows = stop_row - start_row
+  day_numbers = row_days(start_row, stop_row, num_rows, days)
+  episode_dates = day_labels(day_numbers)
+  reported_dates = day_labels(day_numbers + rng.integers(0, 4, num_chunk_rows))
+  phu = np.array(PHUS, dtype=object)[rng.integers(0, len(PHUS), num_chunk_rows)]
+
+  return pd.DataFrame({
+    "Row_ID": np.arange(start_row + 1, stop_row + 1),
+    "Accurate_Episode_Date": episode_dates,
+    "Case_Reported_Date": reported_dates,
+    "Test_Reported_Date": reported_dates,
+    "Specimen_Date": episode_dates,
+    "Age_Group": AGE_GROUPS[rng.choice(len(AGE_GROUPS), num_chunk_rows, p=AGE_GROUP_WEIGHTS)],
+    "Client_Gender": np.array(["FEMALE", "MALE", "GENDER DIVERSE", "UNSPECIFIED"], dtype=object)[rng.choice(4, num_chunk_rows, p=[0.5, 0.48, 0.01, 0.01])],
+    "Case_AcquisitionInfo": np.array(["CC", "OB", "NO KNOWN EPI LINK", "TRAVEL", "MISSING INFORMATION"], dtype=object)[rng.integers(0, 5, num_chunk_rows)],
+    "Outcome1": np.array(["Resolved", "Not Resolved", "Fatal"], dtype=object)[rng.choice(3, num_chunk_rows, p=[0.9, 0.08, 0.02])],
+    "Outbreak_Related": np.where(rng.random(num_chunk_rows) < 0.2, "Yes", ""),
+    "Reporting_PHU_ID": phu[:, 0],
+    "Reporting_PHU": phu[:, 1],
+    "Reporting_PHU_Address": phu[:, 3],
+    "Reporting_PHU_City": phu[:, 4],
+    "Reporting_PHU_Postal_Code": phu[:, 5],
+    "Reporting_PHU_Website": phu[:, 6],
+    "Reporting_PHU_Latitude": phu[:, 7],
+    "Reporting_PHU_Longitude": phu[:, 8],
+  })
+
+
+def school_chunk(rng, start_row, stop_row, num_rows, days):
+  num_chunk_rows = stop_row - start_row
+  dates = day_labels(row_days(start_row, stop_row, num_rows, days))
+  school_ids = rng.integers(0, 5000, num_chunk_rows)
+  student_cases = rng.integers(0, 4, num_chunk_rows)
+  staff_cases = rng.integers(0, 2, num_chunk_rows)
+
+  # The boards cycle within a date, so each (date, board) group is a run of consecutive rows
+  boards_per_day = np.minimum(len(SCHOOL_BOARDS), max(num_rows // days, 1))
+  board_positions = (np.arange(start_row, stop_row) * days * boards_per_day // num_rows) % boards_per_day
+
+  return pd.DataFrame({
+    "collected_date": dates,
+    "reported_date": dates,
+    "school_board": SCHOOL_BOARDS[board_positions],
+    "school_id": school_ids,
+    "school": np.char.add("School ", school_ids.astype(str)).astype(object),
+    "municipality": np.array([phu[4] for phu in PHUS], dtype=object)[school_ids % len(PHUS)],
+    "confirmed_student_cases": student_cases,
+    "confirmed_staff_cases": staff_cases,
+    "confirmed_unspecified_cases": 0,
+    "total_confirmed_cases": student_cases + staff_cases,
+  })
+
+
+def outbreak_chunk(rng, start_row, stop_row, num_rows, days):
+  num_chunk_rows = stop_row - start_row
+
+  # Each date holds a run of rows per PHU, one per outbreak group
+  rows_per_day = max(num_rows // days, 1)
+  positions = np.arange(start_row, stop_row) * days * rows_per_day // num_rows % rows_per_day
+  phu_positions = positions * len(PHUS) // rows_per_day
+
+  return pd.DataFrame({
+    "date": day_labels(row_days(start_row, stop_row, num_rows, days)),
+    "phu_name": np.array([phu[2] for phu in PHUS], dtype=object)[phu_positions],
+    "phu_num": np.array([phu[0] for phu in PHUS])[phu_positions],
+    "outbreak_group": OUTBREAK_GROUPS[positions % len(OUTBREAK_GROUPS)],
+    "number_ongoing_outbreaks": rng.integers(0, 30, num_chunk_rows),
+  })
+
+
+def vaccine_chunk(rng, start_row, stop_row, num_rows, days):
+  num_chunk_rows = stop_row - start_row
+  day_numbers = row_days(start_row, stop_row, num_rows, days)
+
+  # Cumulative totals grow with the date, so they never pass the population
+  progress = (day_numbers + 1) / days
+  fully_vaccinated = (ONTARIO_POPULATION * 0.8 * progress ** 2).astype(np.int64)
+  partially_vaccinated = (ONTARIO_POPULATION * 0.1 * progress).astype(np.int64)
+  doses = rng.integers(20000, 200000, num_chunk_rows)
+
+  return pd.DataFrame({
+    "report_date": np.char.add(np.datetime_as_string(START_DATE + day_numbers, unit="D"), "T00:00:00").astype(object),
+    "previous_day_total_doses_administered": doses,
+    "previous_day_at_least_one": doses // 3,
+    "previous_day_fully_vaccinated": doses // 2,
+    "total_doses_administered": partially_vaccinated + 2 * fully_vaccinated,
+    "total_individuals_at_least_one": partially_vaccinated + fully_vaccinated,
+    "total_individuals_3doses": fully_vaccinated // 3,
+    "total_individuals_partially_vaccinated": partially_vaccinated,
+    "total_doses_in_fully_vaccinated_individuals": 2 * fully_vaccinated,
+    "total_individuals_fully_vaccinated": fully_vaccinated,
+    "previous_day_3doses": doses // 4,
+  })
+
+
+def icu_chunk(rng, start_row, stop_row, num_rows, days):
+  num_chunk_rows = stop_row - start_row
+
+  return pd.DataFrame({
+    "_id": np.arange(start_row + 1, stop_row + 1),
+    "date": day_labels(row_days(start_row, stop_row, num_rows, days)),
+    "icu_unvac": rng.integers(50, 300, num_chunk_rows),
+    "icu_partial_vac": rng.integers(0, 20, num_chunk_rows),
+    "icu_full_vac": rng.integers(0, 80, num_chunk_rows),
+    "hospitalnonicu_unvac": rng.integers(100, 900, num_chunk_rows),
+    "hospitalnonicu_partial_vac": rng.integers(0, 60, num_chunk_rows),
+    "hospitalnonicu_full_vac": rng.integers(0, 400, num_chunk_rows),
+  })
+
+
+# Files written by the generator: file name -> chunk function
+GENERATED_FILES = {
+  CASE_FILE: case_chunk,
+  SCHOOL_FILE: school_chunk,
+  OUTBREAK_FILE: outbreak_chunk,
+  VACCINE_FILE: vaccine_chunk,
+  ICU_FILE: icu_chunk,
+}
+
+
+# Writes one file in chunks. Each chunk has its own random stream, seeded by (seed, file number, chunk number).
+def write_file(file_name, make_chunk, num_rows, days, seed, file_number):
+  os.makedirs(os.path.dirname(file_name) or ".", exist_ok=True)
+  temp_file_name = file_name + ".tmp"
+
+  with open(temp_file_name, "w", newline="", encoding="utf-8") as data_file:
+    for chunk_number, start_row in enumerate(range(0, max(num_rows, 1), CHUNK_ROWS)):
+      stop_row = min(start_row + CHUNK_ROWS, num_rows)
+      rng = np.random.default_rng([seed, file_number, chunk_number])
+      make_chunk(rng, start_row, stop_row, num_rows, days).to_csv(data_file, header=(chunk_number == 0), index=False)
+
+  # The file only appears once it is complete
+  os.replace(temp_file_name, file_name)
+
+
+# Writes every synthetic input file into output_folder
+def generate(output_folder, num_rows, seed=0, days=DEFAULT_DAYS):
+  for file_number, (file_name, make_chunk) in enumerate(GENERATED_FILES.items()):
+    write_file(os.path.join(output_folder, file_name), make_chunk, num_rows, days, seed, file_number)
+
+
+# Main Function #
+def main(argv):
+
+  # Separates the optional "--flag" arguments from the positional ones
+  argv, flags = cli_flags.split_flags(argv)
+
+  # Checks for the right amount of arguments. Final argument is optional.
+  if len(argv) < 3:
+    print("Usage: generate_data.py <output_folder> <num_rows> <seed (optional)> <--days=N (optional)>")
+    sys.exit(1)
+
+  try:
+    num_rows = int(argv[2])
+    seed = int(argv[3]) if len(argv) > 3 else 0
+    days = int(flags.get("days", DEFAULT_DAYS))
+    if num_rows < 1 or days < 1:
+      raise ValueError("num_rows and --days must be at least 1")
+  except ValueError as err:
+    print(f"Invalid arguments: {err}", file=sys.stderr)
+    sys.exit(1)
+
+  try:
+    generate(argv[1], num_rows, seed, days)
+  except OSError as err:
+    print(f"Unable to write the data files to '{argv[1]}' : {err}", file=sys.stderr)
+    sys.exit(1)
+
+#
+# END OF MAIN
+#
+
+# Run Main
+if __name__ == "__main__":
+  main(sys.argv)
@@ -0,0 +1,231 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Times and memory-profiles every preprocessing and plotting script on synthetic data at one or more scales, stores the results as JSON, and flags regressions against a saved baseline.
+
+  For each scale (number of rows per input file), the synthetic data is generated with generate_data.py into <data_root>/<scale>_seed<seed> (or reused if it is already there). Every script is then run as its own process, like a user would run it, and measured:
+    - seconds      wall-clock time (the best of --repeat runs)
+    - peak_rss_mb  peak resident memory of the process
+    - exit_code    0 if the script succeeded
+
+  There are 2 commandline arguments and 1 optional argument:
+    - results_file (string)   JSON file the results are written to
+    - scales (string)         comma separated row counts, e.g. 10000,100000,1000000
+    - baseline_file (string, optional)  results_file of an earlier run. Every step that got slower or used more memory than the baseline by more than the threshold is reported, and the exit code is 1.
+
+  Optional flags (may be placed anywhere after the script name):
+    - --data-root=folder  Where the synthetic data and the script outputs are kept (default: .cache/benchmarks)
+    - --repeat=N          Runs each script N times and keeps the fastest run (default 1)
+    - --threshold=F       Allowed growth over the baseline before a step is flagged, as a fraction (default 0.2, i.e. 20%)
+    - --seed=N            Seed of the synthetic data (default 0)
+
+To run on commandline:
+python Benchmarks/run_benchmarks.py bench_baseline.json 10000,100000
+python Benchmarks/run_benchmarks.py bench_new.json 10000,100000 bench_baseline.json
+'''
+
+# Packages/Modules #
+import os
+import sys
+import json
+import time
+import datetime
+import platform
+import subprocess
+
+import numpy as np
+
+import generate_data
+
+# Shared modules live in the Common folder beside this one
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+import cli_flags
+
+
+# Constants #
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_DATA_ROOT = os.path.join(REPO_DIR, ".cache", "benchmarks")
+DEFAULT_THRESHOLD = 0.2
+
+# Measurements compared against the baseline, with the smallest growth that counts (so timer noise on tiny runs is not flagged)
+COMPARED_METRICS = {"seconds": 0.1, "peak_rss_mb": 1.0}
+
+
+# Returns the benchmarked steps as (name, script, arguments, stdout file or None), in the order they run.
+# data is the synthetic data folder and output the folder the outputs are written to.
+def build_steps(data, output):
+  # The plots cover every day of the synthetic data: <start_year> <start_month> <start_day> <end_year> <end_month> <end_day>
+  start_date = generate_data.START_DATE.astype(object)
+  end_date = (generate_data.START_DATE + generate_data.DEFAULT_DAYS - 1).astype(object)
+  date_range = [str(part) for date in (start_date, end_date) for part in (date.year, date.month, date.day)]
+
+  def data_file(name):
+    return os.path.join(data, name)
+
+  def output_file(name):
+    return os.path.join(output, name)
+
+  return [
+    ("question1_preprocess", os.path.join("Preprocessing", "question1_preprocess.py"),
+     [data_file(generate_data.VACCINE_FILE), data_file(generate_data.ICU_FILE)], output_file("question1_preprocessed.csv")),
+    ("question2_preprocess", os.path.join("Preprocessing", "question2_preprocess.py"),
+     [data_file(generate_data.SCHOOL_FILE)], output_file("question2_preprocessed.csv")),
+    ("question3_preprocess", os.path.join("Preprocessing", "question3_preprocess.py"),
+     [data_file(generate_data.CASE_FILE)], output_file("question3_preprocessed.csv")),
+    ("question3_preprocess_columnar", os.path.join("Preprocessing", "question3_preprocess.py"),
+     [data_file(generate_data.CASE_FILE), "--engine=columnar"], output_file("question3_preprocessed_columnar.csv")),
+    ("question3_preprocess_parallel", os.path.join("Preprocessing", "question3_preprocess.py"),
+     [data_file(generate_data.CASE_FILE), "--engine=columnar", "--workers"], output_file("question3_preprocessed_parallel.csv")),
+    ("question4_preprocess", os.path.join("Preprocessing", "question4_preprocess.py"),
+     [data_file(generate_data.OUTBREAK_FILE)], output_file("question4_preprocessed.csv")),
+
+    ("question1_plotting", os.path.join("Plotting", "question1_plotting.py"),
+     [output_file("question1_preprocessed.csv"), output_file("question1_plotted_data.csv")] + date_range + [output_file("plot1.svg")], None),
+    ("question2_plotting", os.path.join("Plotting", "question2_plotting.py"),
+     [output_file("question2_preprocessed.csv"), output_file("question2_plotted_data.csv")] + date_range + ["Peel District School Board", output_file("plot2.svg")], None),
+    ("question3_plotting", os.path.join("Plotting", "question3_plotting.py"),
+     [output_file("question3_preprocessed.csv"), output_file("question3_plotted_data.csv")] + date_range + [output_file("plot3.svg")], None),
+    ("question4_plotting", os.path.join("Plotting", "question4_plotting.py"),
+     [output_file("question4_preprocessed.csv"), output_file("question4_plotted_data.csv")] + date_range + ["TORONTO", "CITY OF OTTAWA", "NIAGARA REGION", output_file("plot4.svg")], None),
+    ("question4_plotting_direct", os.path.join("Plotting", "question4_plotting.py"),
+     [output_file("question4_preprocessed.csv"), output_file("question4_plotted_data_direct.csv")] + date_range + ["TORONTO", "CITY OF OTTAWA", "NIAGARA REGION", output_file("plot4.svg"), "--render=direct"], None),
+  ]
+
+
+# Runs one script as its own process from inside the output folder.
+# Returns (seconds, peak_rss_mb, exit_code), with the memory taken from the process's own resource usage.
+def measure(script, args, output, stdout_file_name):
+  env = dict(os.environ, MPLBACKEND="Agg")
+  stdout_file = open(stdout_file_name, "w") if stdout_file_name is not None else subprocess.DEVNULL
+
+  try:
+    start_time = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, script)] + args, cwd=output, env=env,
+                               stdout=stdout_file, stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start_time
+  finally:
+    if stdout_file_name is not None:
+      stdout_file.close()
+
+  # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+  peak_rss_mb = usage.ru_maxrss / (1 << 20) if sys.platform == "darwin" else usage.ru_maxrss / (1 << 10)
+
+  return seconds, peak_rss_mb, os.waitstatus_to_exitcode(status)
+
+
+# Benchmarks every step at one scale. Returns {step name: {"seconds", "peak_rss_mb", "exit_code"}}.
+def run_scale(num_rows, data_root, repeat, seed):
+  data = os.path.join(data_root, f"{num_rows}_seed{seed}")
+  output = os.path.join(data, "output")
+
+  if not all(os.path.exists(os.path.join(data, file_name)) for file_name in generate_data.GENERATED_FILES):
+    print(f"Generating {num_rows} rows per file in {data}", file=sys.stderr)
+    generate_data.generate(data, num_rows, seed)
+  os.makedirs(output, exist_ok=True)
+
+  results = {}
+  for name, script, args, stdout_file_name in build_steps(data, output):
+    runs = [measure(script, args, output, stdout_file_name) for _ in range(repeat)]
+    seconds, _, exit_code = min(runs)
+    results[name] = {
+      "seconds": round(seconds, 4),
+      "peak_rss_mb": round(max(run[1] for run in runs), 1),
+      "exit_code": max(run[2] for run in runs),
+    }
+    print(f"{num_rows:>10} {name:<30} {seconds:9.3f} s {results[name]['peak_rss_mb']:9.1f} MB  exit {exit_code}", file=sys.stderr)
+
+  return results
+
+
+# Compares results against a baseline (both {scale: {step: measurements}}).
+# Returns a line for every step measured in both whose metric grew by more than the threshold (and its minimum growth), or whose exit code went from 0 to an error.
+def find_regressions(results, baseline, threshold):
+  regressions = []
+
+  for scale, steps in results.items():
+    for name, measured in steps.items():
+      base = baseline.get(scale, {}).get(name)
+      if base is None:
+        continue
+
+      if base["exit_code"] == 0 and measured["exit_code"] != 0:
+        regressions.append(f"{scale} {name}: exit code {measured['exit_code']} (was 0)")
+
+      for metric, min_growth in COMPARED_METRICS.items():
+        if base[metric] > 0 and measured[metric] > base[metric] * (1 + threshold) and measured[metric] - base[metric] >= min_growth:
+          growth = measured[metric] / base[metric] - 1
+          regressions.append(f"{scale} {name}: {metric} {base[metric]} -> {measured[metric]} (+{growth:.0%})")
+
+  return regressions
+
+
+# Main Function #
+def main(argv):
+
+  # Separates the optional "--flag" arguments from the positional ones
+  argv, flags = cli_flags.split_flags(argv)
+
+  # Checks for the right amount of arguments. Final argument is optional.
+  if len(argv) < 3:
+    print("Usage: run_benchmarks.py <results_file> <scales> <baseline_file (optional)> <--data-root=folder (optional)> <--repeat=N (optional)> <--threshold=F (optional)> <--seed=N (optional)>")
+    sys.exit(1)
+
+  results_file_name = argv[1]
+  data_root = flags.get("data-root", DEFAULT_DATA_ROOT)
+
+  try:
+    scales = [int(scale) for scale in argv[2].split(",")]
+    repeat = int(flags.get("repeat", 1))
+    threshold = float(flags.get("threshold", DEFAULT_THRESHOLD))
+    seed = int(flags.get("seed", 0))
+    if repeat < 1 or min(scales) < 1:
+      raise ValueError("scales and --repeat must be at least 1")
+  except ValueError as err:
+    print(f"Invalid arguments: {err}", file=sys.stderr)
+    sys.exit(1)
+
+  # Loads the baseline first, so a bad baseline file fails before the (long) benchmark
+  baseline = None
+  if len(argv) > 3:
+    try:
+      with open(argv[3]) as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    except (IOError, ValueError, KeyError) as err:
+      print(f"Unable to read baseline_file '{argv[3]}' : {err}", file=sys.stderr)
+      sys.exit(1)
+
+  results = {str(num_rows): run_scale(num_rows, data_root, repeat, seed) for num_rows in scales}
+
+  report = {
+    "created": datetime.datetime.now().isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "numpy": np.__version__,
+    "repeat": repeat,
+    "seed": seed,
+    "results": results,
+  }
+
+  try:
+    with open(results_file_name, "w") as results_file:
+      json.dump(report, results_file, indent=1)
+  except IOError as err:
+    print(f"Unable to write results_file '{results_file_name}' : {err}", file=sys.stderr)
+    sys.exit(1)
+
+  if baseline is not None:
+    regressions = find_regressions(results, baseline, threshold)
+    for regression in regressions:
+      print(f"REGRESSION {regression}")
+    if regressions:
+      sys.exit(1)
+    print(f"No regressions over {threshold:.0%} against '{argv[3]}'")
+
+#
+# END OF MAIN
+#
+
+# Run Main
+main(sys.argv)
@@ -0,0 +1,132 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Batch mode of the plotting scripts: renders every figure listed in a job file from one read of the preprocessed file, instead of one script run (and one file parse) per figure.
+
+  The job file is JSON (a list of jobs) or CSV (one job per row). Each job has:
+    - start, end       the date range to plot, as "YYYY-MM-DD"
+    - categories       the school board (question 2) or PHUs (question 4) to plot. In CSV, separate several names with ";". Not used by questions 1 and 3.
+    - graphics_file    the figure file to write
+    - plotting_file    the plotting data file to write (optional, skipped if missing or "-")
+
+  The preprocessed file is read once, over the dates and categories of all the jobs. Each process then draws its jobs one after the other on a single Figure and Axes that is cleared between jobs. With --workers=N the jobs are split between N forked worker processes, which share the data read by the parent. Where fork is not available (Windows), the jobs are rendered one after the other.
+
+Example:
+  jobs = batch_plots.read_jobs("jobs.json", True)
+  start_date, end_date = batch_plots.date_span(jobs)
+  ...
+  failures = batch_plots.run_jobs(jobs, render_job, (12, 6), workers)
+
+  [{"start": "2021-10-01", "end": "2021-10-31", "categories": ["TORONTO"], "graphics_file": "toronto_2021_10.svg"}]
+'''
+
+# Packages/Modules #
+import sys
+import csv
+import json
+import datetime
+import multiprocessing
+import concurrent.futures
+import lazy_imports
+import metrics
+
+# pyplot is only imported once a figure is drawn, so a job file is checked before it is imported
+plt = lazy_imports.lazy_module("matplotlib.pyplot")
+
+
+# Constants #
+# Separates several categories in one cell of a CSV job file
+CATEGORY_SEPARATOR = ";"
+
+# The jobs, the render function and the figure size of the running batch, set by run_jobs before the worker processes are forked
+active_batch = None
+
+
+# Reads a JSON or CSV job file. takes_categories tells if the plotting script plots chosen categories (question 2 and 4).
+# Returns the list of jobs, each a dictionary with start_date and end_date (datetime.date), categories, graphics_file and plotting_file.
+# Raises OSError if the file cannot be read and ValueError if a job is incomplete.
+def read_jobs(job_file_name, takes_categories):
+  with open(job_file_name, newline="", encoding="utf-8-sig") as job_file:
+    if job_file_name.lower().endswith(".json"):
+      try:
+        raw_jobs = json.load(job_file)
+      except ValueError as err:
+        raise ValueError(f"'{job_file_name}' is not valid JSON ({err})")
+    else:
+      raw_jobs = list(csv.DictReader(job_file))
+
+  jobs = []
+  for number, raw_job in enumerate(raw_jobs, 1):
+    try:
+      categories = raw_job.get("categories") or []
+      if isinstance(categories, str):
+        categories = [name.strip() for name in categories.split(CATEGORY_SEPARATOR) if name.strip()]
+
+      job = {
+        "start_date": datetime.date.fromisoformat(raw_job["start"]),
+        "end_date": datetime.date.fromisoformat(raw_job["end"]),
+        "categories": categories,
+        "graphics_file": raw_job["graphics_file"],
+        "plotting_file": raw_job.get("plotting_file") or "-",
+      }
+    except (KeyError, TypeError, AttributeError, ValueError) as err:
+      raise ValueError(f"Job {number} of '{job_file_name}' needs start and end dates (YYYY-MM-DD) and a graphics_file ({err!r})")
+
+    if takes_categories and not categories:
+      raise ValueError(f"Job {number} of '{job_file_name}' has no categories to plot")
+
+    jobs.append(job)
+
+  if not jobs:
+    raise ValueError(f"'{job_file_name}' lists no jobs")
+
+  return jobs
+
+
+# Returns the earliest start date and the latest end date of the jobs
+def date_span(jobs):
+  return min(job["start_date"] for job in jobs), max(job["end_date"] for job in jobs)
+
+
+# Returns every category plotted by the jobs, in the order they are first listed
+def all_categories(jobs):
+  return list(dict.fromkeys(name for job in jobs for name in job["categories"]))
+
+
+# Renders the jobs at the given positions on one Figure and Axes, cleared before each job (run by each process).
+# A job that fails is reported and skipped. Returns the number of failed jobs.
+def render_jobs(positions):
+  jobs, render_job, figure_size = active_batch
+  figure = plt.figure(figsize=figure_size)
+  ax = figure.add_subplot()
+
+  failures = 0
+  for position in positions:
+    ax.clear()
+    try:
+      render_job(ax, jobs[position])
+    except (IOError, ValueError) as err:
+      print(f"Could not render job {position + 1} ('{jobs[position]['graphics_file']}') : {err}", file=sys.stderr)
+      failures += 1
+
+  plt.close(figure)
+  return failures
+
+
+# Renders every job with render_job(ax, job), on a pool of worker processes if workers > 1.
+# Returns the number of failed jobs.
+def run_jobs(jobs, render_job, figure_size=None, workers=1):
+  global active_batch
+  active_batch = (jobs, render_job, figure_size)
+  metrics.count("batch jobs", len(jobs))
+
+  workers = min(workers, len(jobs))
+  if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+    # Every worker takes every workers-th job, so long and short jobs are spread evenly
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as executor:
+      failures = sum(executor.map(render_jobs, [range(worker, len(jobs), workers) for worker in range(workers)]))
+  else:
+    failures = render_jobs(range(len(jobs)))
+
+  return failures
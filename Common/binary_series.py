@@ -0,0 +1,201 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Fixed-width binary format for the preprocessed time series, read by the plotting scripts with np.memmap instead of parsing CSV.
+
+  With --binary=<series_file>, a preprocessing script also writes its output rows as a NumPy structured array: one fixed-width record per row holding the date (datetime64[D]), an integer code for each category field and the values (int64 or float64). The file is laid out as:
+    - MAGIC (8 bytes), then the length of the header (4 bytes, little-endian)
+    - the header (JSON):
+        fields      [name, type] of each record field, in record order (types as in csv_ingest)
+        categories  the categories of each category field, listed in code order
+        rows        number of records
+        sorted      false if the dates were not written in order
+    - padding up to a multiple of DATA_ALIGNMENT bytes, then the records
+
+  The plotting scripts can be given the series file in place of the preprocessed CSV. Its records are mapped rather than read, and when the dates are sorted a binary search picks the records of the requested date range. Each column is then a view of that slice of the mapping, so only the records within the range are ever loaded from disk.
+
+Example:
+  series = binary_series.open_writer(flags.get("binary"), OUTPUT_FIELDS)
+  series.add(date, phu_name, number_of_outbreaks)
+  series.save(flags.get("binary"))
+
+  columns, invalid = binary_series.read_columns("question4_preprocessed.series", Q4_FIELDS, start_date, end_date)
+'''
+
+# Packages/Modules #
+import json
+import struct
+import numpy as np
+import pandas as pd
+import csv_ingest
+import category_codes
+import metrics
+
+
+# Constants #
+# First bytes of a series file
+MAGIC = b"CVSERIES"
+
+# Suggested file name ending of a series file
+SERIES_SUFFIX = ".series"
+
+# The records start at a multiple of this many bytes from the start of the file
+DATA_ALIGNMENT = 64
+
+# Record field type stored for each csv_ingest column type (category fields are stored as codes)
+RECORD_TYPES = {
+  csv_ingest.DATE: "<M8[D]",
+  csv_ingest.INTEGER: "<i8",
+  csv_ingest.FLOAT: "<f8",
+  csv_ingest.CATEGORY: "<i4",
+}
+
+
+# Returns the record dtype of a list of [name, type] fields.
+# Raises ValueError if a type cannot be stored.
+def record_dtype(fields):
+  try:
+    return np.dtype([(name, RECORD_TYPES[column_type]) for name, column_type in fields], align=True)
+  except KeyError as err:
+    raise ValueError(f"Columns of type {err} cannot be stored in a series file")
+
+
+# Collects the output rows of a preprocessing script and writes them as a series file at the end.
+# Series files that share an encoder give each category the same code (see partition_store.py).
+class SeriesWriter:
+
+  def __init__(self, column_types, encoder=None):
+    self.fields = list(column_types.items())
+    self.dtype = record_dtype(self.fields)
+    self.encoder = encoder or category_codes.CategoryEncoder()
+    self.values = [[] for _ in self.fields]
+
+  # Adds one row, given its values in the order of the fields
+  def add(self, *row):
+    for (name, column_type), field_values, value in zip(self.fields, self.values, row):
+      field_values.append(self.encoder.encode(name, value) if column_type == csv_ingest.CATEGORY else value)
+
+  # Returns the rows as an array of records
+  def records(self):
+    records = np.zeros(len(self.values[0]), dtype=self.dtype)
+
+    for (name, column_type), field_values in zip(self.fields, self.values):
+      if column_type == csv_ingest.CATEGORY:
+        records[name] = field_values
+      else:
+        records[name], _ = csv_ingest.convert_column([str(value) for value in field_values], column_type)
+
+    return records
+
+  # Writes the series file
+  def save(self, series_file_name):
+    records = self.records()
+    dates = [records[name] for name, column_type in self.fields if column_type == csv_ingest.DATE]
+    header = json.dumps({
+      "fields": self.fields,
+      "categories": {name: list(self.encoder.codes.get(name, {})) for name, column_type in self.fields if column_type == csv_ingest.CATEGORY},
+      "rows": len(records),
+      "sorted": bool(not dates or np.all(dates[0][1:] >= dates[0][:-1])),
+    }).encode("utf-8")
+
+    padding = -(len(MAGIC) + 4 + len(header)) % DATA_ALIGNMENT
+    with open(series_file_name, "wb") as series_file:
+      series_file.write(MAGIC + struct.pack("<I", len(header)) + header + b" " * padding)
+      records.tofile(series_file)
+
+
+# Stands in for a SeriesWriter when no series file is requested
+class NoSeries:
+
+  def add(self, *row):
+    pass
+
+  def save(self, series_file_name):
+    pass
+
+
+# Returns the writer for the value of the "--binary" flag and the fields (name -> type) of the output rows:
+# None returns a NoSeries, True (no file name given) raises a ValueError
+def open_writer(series_file_name, column_types):
+  if series_file_name is None:
+    return NoSeries()
+  if series_file_name is True:
+    raise ValueError("--binary needs the series file name, e.g. --binary=question4_preprocessed.series")
+
+  return SeriesWriter(column_types)
+
+
+# Returns True if a file is a series file
+def is_series(file_name):
+  with open(file_name, "rb") as data_file:
+    return data_file.read(len(MAGIC)) == MAGIC
+
+
+# Maps the records of a series file without reading them.
+# Returns the header and the memory-mapped records.
+# Raises ValueError if the header cannot be read or the file does not hold the records it lists.
+def open_series(series_file_name):
+  with open(series_file_name, "rb") as series_file:
+    start = series_file.read(len(MAGIC) + 4)
+    if not start.startswith(MAGIC):
+      raise ValueError(f"'{series_file_name}' is not a series file")
+    try:
+      header_size, = struct.unpack("<I", start[len(MAGIC):])
+      header = json.loads(series_file.read(header_size))
+      dtype = record_dtype(header["fields"])
+      number_of_rows = header["rows"]
+    except (struct.error, ValueError, KeyError, TypeError) as err:
+      raise ValueError(f"'{series_file_name}' is not a readable series file ({err})")
+
+    data_offset = len(start) + header_size
+    data_offset += -data_offset % DATA_ALIGNMENT
+    series_file.seek(0, 2)
+    if series_file.tell() != data_offset + number_of_rows * dtype.itemsize:
+      raise ValueError(f"'{series_file_name}' should hold {number_of_rows} records, it is truncated or was changed")
+
+  if number_of_rows == 0:
+    return header, np.zeros(0, dtype=dtype)
+
+  return header, np.memmap(series_file_name, dtype=dtype, mode="r", offset=data_offset, shape=(number_of_rows,))
+
+
+# Returns the [start, end) positions of the records dated within [start_date, end_date], found with a binary search
+# over the sorted date field, or all the records if the dates are not sorted
+def date_slice(header, records, start_date, end_date):
+  date_fields = [name for name, column_type in header["fields"] if column_type == csv_ingest.DATE]
+
+  if not header["sorted"] or not date_fields:
+    return 0, len(records)
+
+  dates = records[date_fields[0]]
+  start = np.searchsorted(dates, np.datetime64(start_date, "D"), side="left")
+  end = np.searchsorted(dates, np.datetime64(end_date, "D"), side="right")
+  return start, max(start, end)
+
+
+# Reads the requested columns (name -> type) of the rows dated within [start_date, end_date] of a series file.
+# The file is mapped and sliced: the columns are views of its records and the category fields are Categoricals.
+# Returns the dictionary of columns and the dictionary of invalid row masks (rows outside the range may be included).
+# Raises OSError if the file cannot be read and ValueError if it is not a series file or a column is missing.
+def read_columns(data_file_name, column_types, start_date, end_date):
+  with metrics.stage("open"):
+    header, records = open_series(data_file_name)
+    stored_types = dict(header["fields"])
+    start, end = date_slice(header, records, start_date, end_date)
+    rows = records[start:end]
+
+    columns = {}
+    invalid = {}
+    for name, column_type in column_types.items():
+      if stored_types.get(name) != column_type:
+        raise ValueError(f"'{data_file_name}' has no {column_type} field '{name}'")
+
+      if column_type == csv_ingest.CATEGORY:
+        columns[name] = pd.Categorical.from_codes(rows[name], categories=header["categories"][name])
+      else:
+        columns[name] = rows[name]
+      invalid[name] = np.isnat(rows[name]) if column_type == csv_ingest.DATE else np.zeros(len(rows), dtype=bool)
+
+  csv_ingest.count_chunk(columns, invalid)
+  return columns, invalid
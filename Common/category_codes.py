@@ -0,0 +1,126 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Dictionary encoding of the category columns the preprocessed files repeat on every row (PHU names, school boards, age groups).
+
+  With --dictionary=<output_file>.dict.json, a preprocessing script prints a small integer code instead of each category string, names the column <field>_code in its header, and saves the dictionary next to the output:
+    {"fields": {"<field>": ["<category for code 0>", "<category for code 1>", ...]}}
+
+  The plotting scripts read their CATEGORY fields through read_columns here. If the preprocessed file holds codes, they are read as integers and turned into a pandas Categorical with the stored categories, so the strings are never parsed. A file without codes is read as before, its strings parsed into a Categorical. Either way, the plots filter the rows on the integer codes (see plot_data.category_mask).
+
+Example:
+  encoder = category_codes.open_encoder(flags.get("dictionary"))
+  print(f"date,{encoder.header('phu_name')},number_of_outbreaks")
+  print(f"{date},{encoder.encode('phu_name', phu_name)},{number_of_outbreaks}")
+  encoder.save(flags.get("dictionary"))
+'''
+
+# Packages/Modules #
+import json
+import numpy as np
+import pandas as pd
+import csv_ingest
+
+
+# Constants #
+DICTIONARY_SUFFIX = ".dict.json"
+
+# Added to the header name of a field that holds codes instead of strings
+CODE_SUFFIX = "_code"
+
+
+# Returns the path of the dictionary of a preprocessed file
+def dictionary_path(data_file_name):
+  return data_file_name + DICTIONARY_SUFFIX
+
+
+# Returns the header name of a field that holds codes
+def code_field(field_name):
+  return field_name + CODE_SUFFIX
+
+
+# Gives each category of a field the next code the first time it is printed, and saves the dictionary at the end
+class CategoryEncoder:
+
+  def __init__(self):
+    self.codes = {}
+
+  def header(self, field_name):
+    return code_field(field_name)
+
+  def encode(self, field_name, value):
+    field_codes = self.codes.setdefault(field_name, {})
+    return field_codes.setdefault(value, len(field_codes))
+
+  # Same as encode, for a column whose strings are printed in quotes: codes are plain integers, so they are never quoted
+  def encode_quoted(self, field_name, value):
+    return self.encode(field_name, value)
+
+  # Writes the dictionary file, each field's categories listed in code order
+  def save(self, dictionary_file_name):
+    with open(dictionary_file_name, "w") as dictionary_file:
+      json.dump({"fields": {field_name: list(field_codes) for field_name, field_codes in self.codes.items()}}, dictionary_file)
+
+
+# Stands in for a CategoryEncoder when no dictionary is requested (the strings are printed as they are)
+class NoEncoder:
+
+  def header(self, field_name):
+    return field_name
+
+  def encode(self, field_name, value):
+    return value
+
+  def encode_quoted(self, field_name, value):
+    return f"\"{value}\""
+
+  def save(self, dictionary_file_name):
+    pass
+
+
+# Returns the encoder for the value of the "--dictionary" flag: None returns a NoEncoder, True (no file name given) raises a ValueError
+def open_encoder(dictionary_file_name):
+  if dictionary_file_name is None:
+    return NoEncoder()
+  if dictionary_file_name is True:
+    raise ValueError("--dictionary needs the dictionary file name, e.g. --dictionary=question4_preprocessed.csv" + DICTIONARY_SUFFIX)
+
+  return CategoryEncoder()
+
+
+# Loads the categories of each field from the dictionary of a preprocessed file.
+# Raises ValueError if the dictionary is missing or cannot be read.
+def load(data_file_name):
+  try:
+    with open(dictionary_path(data_file_name)) as dictionary_file:
+      return json.load(dictionary_file)["fields"]
+  except (IOError, ValueError, KeyError) as err:
+    raise ValueError(f"'{data_file_name}' holds category codes but its dictionary '{dictionary_path(data_file_name)}' cannot be read ({err})")
+
+
+# Reads the requested columns (name -> type) of a preprocessed file like csv_ingest.read_columns. CATEGORY fields
+# stored as codes are read as integers and decoded with the file's dictionary into a pandas Categorical.
+# Codes that are not in the dictionary are marked invalid and become missing values.
+# Raises OSError if the file cannot be read and ValueError if a column or the dictionary is missing.
+def read_columns(data_file_name, column_types, cache_dir=None, byte_range=None):
+  header = [field.strip() for field in csv_ingest.read_header(data_file_name)]
+  coded = [name for name, column_type in column_types.items()
+           if column_type == csv_ingest.CATEGORY and name not in header and code_field(name) in header]
+
+  if not coded:
+    return csv_ingest.read_columns(data_file_name, column_types, cache_dir, byte_range)
+
+  dictionary = load(data_file_name)
+  read_types = {(code_field(name) if name in coded else name): (csv_ingest.INTEGER if name in coded else column_type)
+                for name, column_type in column_types.items()}
+  columns, invalid = csv_ingest.read_columns(data_file_name, read_types, cache_dir, byte_range)
+
+  for name in coded:
+    categories = dictionary.get(name, [])
+    codes = columns.pop(code_field(name))
+    unknown = invalid.pop(code_field(name)) | (codes < 0) | (codes >= len(categories))
+    columns[name] = pd.Categorical.from_codes(np.where(unknown, -1, codes), categories=categories)
+    invalid[name] = unknown
+
+  return columns, invalid
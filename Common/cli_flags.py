@@ -0,0 +1,181 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Separates the optional "--flag" and "--flag=value" arguments from the positional commandline arguments, so every script can keep reading its positional arguments by index (argv[1], argv[2], ...) no matter where the flags were placed.
+
+Example:
+  argv, flags = cli_flags.split_flags(sys.argv)
+  cache_dir = cli_flags.cache_dir(flags)
+'''
+
+# Packages/Modules #
+import os
+
+
+# Constants #
+# Folder used by "--cache" when no folder is given
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "inputs")
+
+# Folder used by "--figure-cache" when no folder is given
+DEFAULT_FIGURE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "figures")
+
+# Queue depth used by "--pipeline" when no depth is given (chunks the reader thread may read ahead)
+DEFAULT_PIPELINE_DEPTH = 4
+
+# Size suffixes accepted by "--max-memory"
+MEMORY_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+# Renderers accepted by the plotting scripts' "--render" (the first is the default)
+RENDERERS = ("seaborn", "direct")
+
+# Error bands accepted by "--error-band" with --render=direct (the first is the default)
+ERROR_BANDS = ("none", "sd", "ci")
+
+# Decimation methods accepted by the plotting scripts' "--decimate" (the first is the default)
+DECIMATIONS = ("minmax", "lttb")
+
+
+# Splits argv into the positional arguments (script name first) and a dictionary of flags.
+# "--flag" is stored as True and "--flag=value" is stored as the string value.
+def split_flags(argv):
+  positional = []
+  flags = {}
+
+  for arg in argv:
+    if arg.startswith("--") and len(positional) > 0:
+      name, has_value, value = arg[2:].partition("=")
+      flags[name] = value if has_value else True
+    else:
+      positional.append(arg)
+
+  return positional, flags
+
+
+# Returns the folder of the columnar input cache, or None if "--cache" was not given.
+# "--cache" uses DEFAULT_CACHE_DIR, "--cache=DIR" uses DIR.
+def cache_dir(flags):
+  value = flags.get("cache")
+
+  if value is None:
+    return None
+  if value is True:
+    return DEFAULT_CACHE_DIR
+
+  return value
+
+
+# Returns the folder of the rendered-figure cache, or None if "--figure-cache" was not given.
+# "--figure-cache" uses DEFAULT_FIGURE_CACHE_DIR, "--figure-cache=DIR" uses DIR.
+def figure_cache_dir(flags):
+  value = flags.get("figure-cache")
+
+  if value is None:
+    return None
+  if value is True:
+    return DEFAULT_FIGURE_CACHE_DIR
+
+  return value
+
+
+# Returns the number of worker processes asked for with "--workers", 1 if it was not given.
+# "--workers" uses every CPU, "--workers=N" uses N.
+# Raises ValueError if N is not a positive integer.
+def workers(flags):
+  value = flags.get("workers")
+
+  if value is None:
+    return 1
+  if value is True:
+    return os.cpu_count() or 1
+
+  number = int(value)
+  if number < 1:
+    raise ValueError(f"--workers must be at least 1, got {number}")
+
+  return number
+
+
+# Returns the memory budget given with "--max-memory=SIZE" in bytes, or None if it was not given.
+# SIZE is a number of bytes, optionally followed by K, M or G (powers of 1024), e.g. 512M or 1.5G.
+# Raises ValueError if SIZE cannot be read.
+def max_memory(flags):
+  value = flags.get("max-memory")
+
+  if value is None:
+    return None
+  if value is True:
+    raise ValueError("--max-memory needs a size, e.g. --max-memory=512M")
+
+  size = value.strip().upper().rstrip("B")
+  multiplier = MEMORY_UNITS.get(size[-1:], 1)
+  if size[-1:] in MEMORY_UNITS:
+    size = size[:-1]
+
+  number = int(float(size) * multiplier)
+  if number <= 0:
+    raise ValueError(f"--max-memory must be positive, got {value}")
+
+  return number
+
+
+# Splits the positional arguments after the script name into a list of data files and the optional debugOn argument,
+# for scripts that take any number of data files. A final argument that is an integer is taken as debugOn.
+# Returns (data_file_names, debugOn).
+def data_files_and_debug(argv):
+  data_file_names = argv[1:]
+
+  if len(data_file_names) > 1 and data_file_names[-1].lstrip("+-").isdigit():
+    return data_file_names[:-1], int(data_file_names[-1]) > 0
+
+  return data_file_names, False
+
+
+# Returns the queue depth of the reader pipeline asked for with "--pipeline", 0 if it was not given.
+# "--pipeline" uses DEFAULT_PIPELINE_DEPTH, "--pipeline=N" uses N.
+# Raises ValueError if N is not a positive integer.
+def pipeline_depth(flags):
+  value = flags.get("pipeline")
+
+  if value is None:
+    return 0
+  if value is True:
+    return DEFAULT_PIPELINE_DEPTH
+
+  depth = int(value)
+  if depth < 1:
+    raise ValueError(f"--pipeline must be at least 1, got {depth}")
+
+  return depth
+
+
+# Returns the renderer and the error band asked for with "--render=seaborn|direct" and "--error-band=none|sd|ci".
+# Raises ValueError if either is unknown, or if an error band is asked for without --render=direct.
+def render_options(flags):
+  renderer = flags.get("render", RENDERERS[0])
+  error_band = flags.get("error-band", ERROR_BANDS[0])
+
+  if renderer not in RENDERERS:
+    raise ValueError(f"Unknown renderer '{renderer}'! Must be one of: {', '.join(RENDERERS)}")
+  if error_band not in ERROR_BANDS:
+    raise ValueError(f"Unknown error band '{error_band}'! Must be one of: {', '.join(ERROR_BANDS)}")
+  if error_band != ERROR_BANDS[0] and renderer != "direct":
+    raise ValueError("--error-band is only used with --render=direct")
+
+  return renderer, error_band
+
+
+# Returns the decimation method asked for with "--decimate[=minmax|lttb]", or None if it was not given.
+# "--decimate" uses the first of DECIMATIONS.
+# Raises ValueError if the method is unknown.
+def decimation(flags):
+  value = flags.get("decimate")
+
+  if value is None:
+    return None
+  if value is True:
+    return DECIMATIONS[0]
+  if value not in DECIMATIONS:
+    raise ValueError(f"Unknown decimation '{value}'! Must be one of: {', '.join(DECIMATIONS)}")
+
+  return value
@@ -0,0 +1,16 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  The column types read by csv_ingest (DATE, INTEGER, FLOAT, STRING, CATEGORY), in a module of their own that imports nothing. A plotting script can then declare the fields it reads before numpy and pandas are imported (see lazy_imports.py). csv_ingest re-exports them, so csv_ingest.DATE and column_types.DATE are the same value.
+
+Example:
+  Q4_FIELDS = {"date": column_types.DATE, "phu_name": column_types.CATEGORY, "number_of_outbreaks": column_types.INTEGER}
+'''
+
+# Constants #
+DATE = "date"
+INTEGER = "int"
+FLOAT = "float"
+STRING = "str"
+CATEGORY = "category"
@@ -0,0 +1,140 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Reads gzip (.gz) and Zstandard (.zst) compressed input files as a stream, so archived copies of the data files can be used without decompressing them to disk first. Compression is detected from the first bytes of the file, not its name.
+
+  open_threaded decompresses on a background thread that fills a bounded queue of blocks, so decompression overlaps the CSV parsing done by the caller.
+
+  Zstandard needs the optional zstandard package (pip install zstandard). gzip only needs the standard library.
+
+  Compressed files are streamed from the start: they cannot be read by byte range, so date indexes, --incremental and byte-range splitting are not used for them.
+
+Example:
+  if compressed.compression(file_name) is not None:
+    source = compressed.open_threaded(file_name)
+'''
+
+# Packages/Modules #
+import io
+import gzip
+import queue
+import threading
+
+# zstandard is optional, only .zst files need it
+try:
+  import zstandard
+except ImportError:
+  zstandard = None
+
+
+# Constants #
+# First bytes of each supported compression format
+MAGIC_NUMBERS = {
+  "gzip": b"\x1f\x8b",
+  "zstd": b"\x28\xb5\x2f\xfd",
+}
+
+# Size of the decompressed blocks the background thread reads at a time
+BLOCK_SIZE = 1 << 20
+
+# Number of decompressed blocks the background thread may read ahead of the parser
+QUEUE_BLOCKS = 16
+
+
+# Returns "gzip" or "zstd" if a file is compressed, None otherwise
+def compression(file_name):
+  with open(file_name, "rb") as data_file:
+    start = data_file.read(max(len(magic) for magic in MAGIC_NUMBERS.values()))
+
+  for name, magic in MAGIC_NUMBERS.items():
+    if start.startswith(magic):
+      return name
+
+  return None
+
+
+# Opens a file for reading as binary, decompressing it if it is compressed.
+# Raises ValueError if the file is Zstandard compressed and the zstandard package is missing.
+def open_decompressed(file_name):
+  kind = compression(file_name)
+
+  if kind == "gzip":
+    return gzip.open(file_name, "rb")
+
+  if kind == "zstd":
+    if zstandard is None:
+      raise ValueError(f"'{file_name}' is Zstandard compressed, reading it needs the zstandard package (pip install zstandard)")
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(file_name, "rb"), closefd=True))
+
+  return open(file_name, "rb")
+
+
+# Raw binary stream whose data is read from another stream by a background thread, QUEUE_BLOCKS blocks ahead
+class ThreadedReader(io.RawIOBase):
+
+  def __init__(self, stream):
+    self.stream = stream
+    self.blocks = queue.Queue(QUEUE_BLOCKS)
+    self.block = b""
+    self.position = 0
+    self.finished = False
+    self.error = None
+    self.stopped = threading.Event()
+    self.thread = threading.Thread(target=self.fill, daemon=True)
+    self.thread.start()
+
+  # Runs on the background thread: reads blocks until the end of the stream, an error, or close()
+  def fill(self):
+    try:
+      while not self.stopped.is_set():
+        block = self.stream.read(BLOCK_SIZE)
+        if not block:
+          break
+        self.put(block)
+    except Exception as err:
+      self.error = err
+    finally:
+      self.stream.close()
+      self.put(None)
+
+  # Queues a block, giving up if the reader is closed while the queue is full
+  def put(self, block):
+    while not self.stopped.is_set():
+      try:
+        self.blocks.put(block, timeout=0.1)
+        return
+      except queue.Full:
+        pass
+
+  def readable(self):
+    return True
+
+  def readinto(self, buffer):
+    if self.position == len(self.block):
+      if self.finished:
+        return 0
+
+      self.block = self.blocks.get()
+      self.position = 0
+      if self.block is None:
+        self.block = b""
+        self.finished = True
+        if self.error is not None:
+          # Decompression errors (e.g. a truncated archive) are reported like read errors
+          raise self.error if isinstance(self.error, OSError) else OSError(f"Unable to decompress: {self.error}")
+        return 0
+
+    size = min(len(buffer), len(self.block) - self.position)
+    buffer[:size] = self.block[self.position:self.position + size]
+    self.position += size
+    return size
+
+  def close(self):
+    self.stopped.set()
+    super().close()
+
+
+# Opens a file for reading as a buffered binary stream that is decompressed on a background thread
+def open_threaded(file_name):
+  return io.BufferedReader(ThreadedReader(open_decompressed(file_name)), BLOCK_SIZE)
@@ -0,0 +1,310 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Shared CSV ingestion layer used by the preprocessing scripts. Instead of tokenizing every field of every row with csv.reader and picking fields out by hard-coded index, a script asks for the columns it needs by header name. The header is resolved once, only the requested columns are parsed (by pyarrow.csv when it is installed, otherwise by the pandas C engine), and each column is returned as a typed array.
+
+  Column types:
+    - DATE      numpy datetime64[D] array, invalid values become NaT
+    - INTEGER   numpy int64 array, invalid values become 0
+    - FLOAT     numpy float64 array, invalid values become 0.0
+    - STRING    numpy object array of str, missing values become ""
+    - CATEGORY  pandas Categorical, missing values become ""
+
+  Every read also returns a dictionary of boolean masks marking the rows whose DATE, INTEGER or FLOAT value could not be converted, so scripts can still report bad rows when debugOn is set.
+
+  Rows with more or fewer fields than the header are skipped by pyarrow and counted as rejected rows ("wrong number of fields"), reported when debugOn is set. The original scripts stopped at the first row with too few fields instead. The pandas C engine cannot tell them apart once only some columns are parsed: it fills the missing fields of a short row with "" (then counted as invalid values if they must be converted) and ignores extra fields.
+
+  When a byte range is given, only the header line and that range of the file are parsed (see date_index.py). split_byte_ranges cuts a file into line-aligned ranges so separate processes can parse its parts (see group_counts.py).
+
+  gzip and Zstandard compressed files are read as a stream, decompressed on a background thread (see compressed.py). They cannot be read by byte range.
+
+  When a cache folder is given, the typed columns are stored in the columnar input cache (see input_cache.py) and later reads of the same file contents memory-map them instead of parsing the CSV again.
+
+  With a prefetch depth, the file is read and tokenized on a reader thread that stays up to that many chunks ahead of the caller (see pipeline.py).
+
+  Every read is timed as the open, parse and convert stages, and counts the rows read and the values that could not be converted (see metrics.py).
+
+Example:
+  columns, invalid = csv_ingest.read_columns("Data/ongoing_outbreaks_phu.csv", {"date": csv_ingest.DATE, "phu_name": csv_ingest.STRING})
+'''
+
+# Packages/Modules #
+import io
+import os
+import csv
+import numpy as np
+import pandas as pd
+import compressed
+import input_cache
+import metrics
+import pipeline
+
+# The column types live in column_types.py, which plotting scripts import before numpy and pandas
+from column_types import DATE, INTEGER, FLOAT, STRING, CATEGORY
+
+# pyarrow is optional, the pandas C engine is used when it is missing
+try:
+  from pyarrow import csv as pa_csv
+except ImportError:
+  pa_csv = None
+
+
+# Constants #
+# Encoding of every input file (the Ontario files start with a byte order mark)
+FILE_ENCODING = "utf-8-sig"
+
+# Size of the blocks pyarrow reads at a time when streaming a file in chunks
+PYARROW_BLOCK_SIZE = 16 << 20
+
+# Reason rows with the wrong number of fields are rejected for (see metrics.py)
+WRONG_FIELD_COUNT = "wrong number of fields"
+
+
+# Reads the header line of a file (decompressing it if needed) and returns its field names
+def read_header(file_name):
+  with compressed.open_decompressed(file_name) as data_file:
+    header_line = data_file.readline().decode(FILE_ENCODING)
+
+  return next(csv.reader([header_line]), [])
+
+
+# Returns the position of each requested column in the header, in the order requested.
+# Raises a ValueError naming every column that is missing from the header.
+def resolve_columns(header, names):
+  positions = {field.strip(): index for index, field in enumerate(header)}
+  missing = [name for name in names if name not in positions]
+
+  if missing:
+    raise ValueError(f"Missing column(s) {', '.join(missing)} in header: {','.join(header)}")
+
+  return [positions[name] for name in names]
+
+
+# Converts one column of raw strings into its typed array.
+# Returns the array and a boolean mask of the rows that could not be converted.
+def convert_column(raw_values, column_type):
+  raw_values = pd.Series(raw_values, dtype=object).fillna("")
+  no_invalid_rows = np.zeros(len(raw_values), dtype=bool)
+
+  if column_type == DATE:
+    dates = pd.to_datetime(raw_values, errors="coerce")
+    invalid = dates.isna().to_numpy()
+    return dates.to_numpy().astype("datetime64[D]"), invalid
+
+  if column_type == INTEGER:
+    numbers = pd.to_numeric(raw_values, errors="coerce")
+    invalid = (numbers.isna() | (numbers % 1 != 0)).to_numpy()
+    return numbers.where(~invalid, 0).to_numpy().astype(np.int64), invalid
+
+  if column_type == FLOAT:
+    numbers = pd.to_numeric(raw_values, errors="coerce")
+    invalid = numbers.isna().to_numpy()
+    return numbers.where(~invalid, 0.0).to_numpy().astype(np.float64), invalid
+
+  if column_type == CATEGORY:
+    return pd.Categorical(raw_values.astype(str)), no_invalid_rows
+
+  if column_type == STRING:
+    return raw_values.astype(str).to_numpy(dtype=object), no_invalid_rows
+
+  raise ValueError(f"Unknown column type '{column_type}'")
+
+
+# Converts a chunk of raw string columns (name -> values) into typed arrays.
+# Returns the dictionary of typed columns and the dictionary of invalid row masks.
+def convert_chunk(raw_columns, column_types):
+  columns = {}
+  invalid = {}
+
+  with metrics.stage("convert"):
+    for name, column_type in column_types.items():
+      columns[name], invalid[name] = convert_column(raw_columns[name], column_type)
+
+  count_chunk(columns, invalid)
+  return columns, invalid
+
+
+# Counts the rows of a typed chunk and its values that could not be converted
+def count_chunk(columns, invalid):
+  if columns:
+    metrics.add_rows_read(len(next(iter(columns.values()))))
+
+  for name, invalid_rows in invalid.items():
+    metrics.invalid_values(name, np.count_nonzero(invalid_rows))
+
+
+# Returns an in-memory file holding the header line of a file followed by the [start, end) byte range of its rows.
+# Raises ValueError if the file is compressed.
+def read_byte_range(file_name, byte_range):
+  start, end = byte_range
+
+  if compressed.compression(file_name) is not None:
+    raise ValueError(f"'{file_name}' is compressed and cannot be read by byte range")
+
+  with open(file_name, "rb") as data_file:
+    header_line = data_file.readline()
+    data_file.seek(max(start, len(header_line)))
+    rows = data_file.read(max(end - max(start, len(header_line)), 0))
+
+  return io.BytesIO(header_line + rows)
+
+
+# Splits the rows of a file into consecutive [start, end) byte ranges of about range_bytes each.
+# Every range starts at the beginning of a line, so each one can be parsed on its own with read_byte_range.
+# Quoted fields must not contain line breaks (none of the Ontario files have any).
+# Raises ValueError if the file is compressed.
+def split_byte_ranges(file_name, range_bytes):
+  if compressed.compression(file_name) is not None:
+    raise ValueError(f"'{file_name}' is compressed and cannot be split into byte ranges")
+
+  byte_ranges = []
+
+  with open(file_name, "rb") as data_file:
+    start = len(data_file.readline())
+    file_size = os.fstat(data_file.fileno()).st_size
+
+    while start < file_size:
+      # Moves the end forward to just after the next line break (or to the end of the file)
+      data_file.seek(min(start + range_bytes, file_size) - 1)
+      data_file.readline()
+      end = min(data_file.tell(), file_size)
+
+      byte_ranges.append((start, end))
+      start = end
+
+  return byte_ranges
+
+
+# Yields raw string chunks (name -> values) using the pandas C engine
+def iter_raw_chunks_pandas(source, names, positions, chunk_rows):
+  reader = pd.read_csv(source, encoding=FILE_ENCODING, header=0, usecols=positions, dtype=str,
+                       keep_default_na=False, chunksize=chunk_rows)
+
+  # Without a chunk size pandas returns the whole frame rather than an iterator
+  frames = [reader] if chunk_rows is None else reader
+
+  for frame in frames:
+    yield {name: frame.iloc[:, sorted(positions).index(position)].to_numpy(dtype=object)
+           for name, position in zip(names, positions)}
+
+
+# Counts a row pyarrow could not split into as many fields as the header has (see metrics.reject), and tells pyarrow to skip it
+def reject_invalid_row(row):
+  metrics.reject(WRONG_FIELD_COUNT)
+  return "skip"
+
+
+# Yields raw string chunks (name -> values) using pyarrow.csv
+def iter_raw_chunks_pyarrow(source, header, names, chunk_rows):
+  import pyarrow as pa
+
+  convert_options = pa_csv.ConvertOptions(include_columns=names,
+                                          column_types={name: pa.string() for name in names},
+                                          strings_can_be_null=False)
+
+  # pyarrow strips the byte order mark itself, the header read above is only used for the column names
+  read_options = pa_csv.ReadOptions(column_names=[field.strip() for field in header], skip_rows=1,
+                                    block_size=PYARROW_BLOCK_SIZE)
+
+  # Rows with more or fewer fields than the header are skipped and counted instead of stopping the read
+  parse_options = pa_csv.ParseOptions(invalid_row_handler=reject_invalid_row)
+
+  if chunk_rows is None:
+    table = pa_csv.read_csv(source, read_options=read_options, parse_options=parse_options, convert_options=convert_options)
+    yield {name: table.column(name).to_numpy(zero_copy_only=False) for name in names}
+    return
+
+  with pa_csv.open_csv(source, read_options=read_options, parse_options=parse_options, convert_options=convert_options) as reader:
+    for batch in reader:
+      yield {name: batch.column(name).to_numpy(zero_copy_only=False) for name in names}
+
+
+# Yields raw string chunks (name -> values) of the requested columns, using pyarrow when it is installed.
+# If byte_range is given, only that range of rows is parsed. If prefetch is given, the chunks are parsed on a reader
+# thread, up to prefetch chunks ahead.
+# The time spent producing (or waiting for) each chunk is charged to the parse stage.
+def iter_raw_chunks(file_name, names, chunk_rows, byte_range=None, prefetch=0):
+  with metrics.stage("open"):
+    header = read_header(file_name)
+    positions = resolve_columns(header, names)
+    if byte_range is not None:
+      source = read_byte_range(file_name, byte_range)
+    elif compressed.compression(file_name) is not None:
+      source = compressed.open_threaded(file_name)
+    else:
+      source = file_name
+
+  if pa_csv is not None:
+    chunks = closing_chunks(iter_raw_chunks_pyarrow(source, header, names, chunk_rows), source)
+  else:
+    chunks = closing_chunks(iter_raw_chunks_pandas(source, names, positions, chunk_rows), source)
+
+  if prefetch:
+    chunks = pipeline.prefetch(chunks, prefetch)
+
+  return metrics.timed_iter(chunks, "parse")
+
+
+# Yields the chunks of a parser, then closes its source if it is a stream rather than a file name
+# (which also stops the decompression thread of a compressed file that was not read to the end)
+def closing_chunks(chunks, source):
+  try:
+    yield from chunks
+  finally:
+    if not isinstance(source, str):
+      source.close()
+
+
+# Reads the requested columns (name -> type) of a file in chunks of roughly chunk_rows rows
+# (pyarrow chunks follow its block size instead). If cache_dir is given, the columns are read from
+# or stored in the columnar input cache. Otherwise, if byte_range (start, end) is given, only the rows within that
+# range of the file are read. If prefetch is given, the CSV is parsed on a reader thread up to prefetch chunks ahead.
+# Yields a (columns, invalid) pair of dictionaries for every chunk.
+# Raises OSError if the file cannot be read and ValueError if a column is missing.
+def iter_columns(file_name, column_types, chunk_rows=None, cache_dir=None, byte_range=None, prefetch=0):
+  if cache_dir is None:
+    for raw_columns in iter_raw_chunks(file_name, list(column_types), chunk_rows, byte_range, prefetch):
+      yield convert_chunk(raw_columns, column_types)
+    return
+
+  with metrics.stage("open"):
+    digest = input_cache.file_digest(file_name, cache_dir)
+    cached_arrays = input_cache.map_columns(cache_dir, digest, column_types)
+
+  # Cache hit: slices the memory-mapped arrays instead of parsing
+  if cached_arrays is not None:
+    num_rows = len(next(iter(cached_arrays.values()))[2])
+    step = chunk_rows or max(num_rows, 1)
+    for start in range(0, max(num_rows, 1), step):
+      with metrics.stage("convert"):
+        columns, invalid = input_cache.decode_columns(cached_arrays, column_types, start, start + step)
+      count_chunk(columns, invalid)
+      yield columns, invalid
+    return
+
+  # Cache miss: parses the file and stores every chunk once the whole file has been read
+  cache_builder = input_cache.ColumnCacheBuilder(cache_dir, digest, column_types)
+  for raw_columns in iter_raw_chunks(file_name, list(column_types), chunk_rows, prefetch=prefetch):
+    columns, invalid = convert_chunk(raw_columns, column_types)
+    cache_builder.add_chunk(columns, invalid)
+    yield columns, invalid
+
+  with metrics.stage("write"):
+    cache_builder.finish()
+
+
+# Reads the requested columns (name -> type) of a whole file, through the columnar input cache if cache_dir is given.
+# Otherwise, if byte_range (start, end) is given, only the rows within that range of the file are read.
+# Returns a (columns, invalid) pair of dictionaries.
+def read_columns(file_name, column_types, cache_dir=None, byte_range=None):
+  # Without a chunk size there is exactly one chunk, the generator is still run to the end so the cache gets written
+  if cache_dir is not None:
+    return list(iter_columns(file_name, column_types, cache_dir=cache_dir))[0]
+
+  raw_chunks = list(iter_raw_chunks(file_name, list(column_types), None, byte_range))
+  with metrics.stage("parse"):
+    raw_columns = {name: np.concatenate([chunk[name] for chunk in raw_chunks]) if raw_chunks else []
+                   for name in column_types}
+
+  return convert_chunk(raw_columns, column_types)
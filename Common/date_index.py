@@ -0,0 +1,136 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Sidecar date index for the preprocessed files. While a preprocessing script prints its output, it records the byte offset at which each new date starts. The plotting scripts then look up the start and end dates with a binary search and read only that byte range of the preprocessed file, so a narrow date range costs the same on a multi-year file as on a tiny one.
+
+  The index is written next to the preprocessed file as <preprocessed_file>.dateidx (JSON):
+    - data_size  size in bytes of the preprocessed file the index was built for
+    - sorted     false if the dates were not printed in order (the index is then never used)
+    - dates      the distinct dates in order, as "YYYY-MM-DD" strings
+    - offsets    byte offset of the first row of each date
+
+  An index whose data_size does not match the preprocessed file is stale and is ignored.
+'''
+
+# Packages/Modules #
+import os
+import sys
+import json
+import bisect
+
+
+# Constants #
+INDEX_SUFFIX = ".dateidx"
+
+
+# Returns the path of the date index of a preprocessed file
+def index_path(data_file_name):
+  return data_file_name + INDEX_SUFFIX
+
+
+# Wraps the output stream of a preprocessing script and counts the bytes written to it,
+# so each date can be marked with the byte offset of its first row
+class DateIndexWriter:
+
+  def __init__(self, stream):
+    self.stream = stream
+    self.encoding = getattr(stream, "encoding", None) or "utf-8"
+    self.position = 0
+    self.dates = []
+    self.offsets = []
+    self.sorted = True
+
+  def write(self, text):
+    self.position += len(text.encode(self.encoding))
+    return self.stream.write(text)
+
+  def flush(self):
+    self.stream.flush()
+
+  # Marks the current position as the start of a date's rows (called before printing each row)
+  def mark(self, date):
+    date = str(date)
+
+    if self.dates and date == self.dates[-1]:
+      return
+    if self.dates and date < self.dates[-1]:
+      self.sorted = False
+
+    self.dates.append(date)
+    self.offsets.append(self.position)
+
+  # Writes the index file and puts the original output stream back
+  def save(self, index_file_name):
+    self.flush()
+    if sys.stdout is self:
+      sys.stdout = self.stream
+
+    with open(index_file_name, "w") as index_file:
+      json.dump({"data_size": self.position, "sorted": self.sorted, "dates": self.dates, "offsets": self.offsets}, index_file)
+
+
+# Stands in for a DateIndexWriter when no index is requested
+class NoDateIndex:
+
+  def mark(self, date):
+    pass
+
+  def save(self, index_file_name):
+    pass
+
+
+# Starts recording the date index of everything printed to standard output.
+# index_file_name is the value of the "--date-index" flag: None returns a NoDateIndex, True (no file name given) raises a ValueError.
+def open_writer(index_file_name):
+  if index_file_name is None:
+    return NoDateIndex()
+  if index_file_name is True:
+    raise ValueError("--date-index needs the index file name, e.g. --date-index=question1_preprocessed.csv" + INDEX_SUFFIX)
+
+  writer = DateIndexWriter(sys.stdout)
+  sys.stdout = writer
+  return writer
+
+
+# Loads the date index of a preprocessed file.
+# Returns None if there is no index, or if it is unsorted or stale.
+def load(data_file_name):
+  try:
+    with open(index_path(data_file_name)) as index_file:
+      index = json.load(index_file)
+  except (IOError, ValueError):
+    return None
+
+  try:
+    if not index["sorted"] or index["data_size"] != os.path.getsize(data_file_name):
+      return None
+  except (KeyError, OSError):
+    return None
+
+  return index
+
+
+# Returns the (start, end) byte range of the rows dated within [start_date, end_date], using a binary search over the index
+def byte_range(index, start_date, end_date):
+  dates = index["dates"]
+  offsets = index["offsets"] + [index["data_size"]]
+
+  start_position = bisect.bisect_left(dates, str(start_date))
+  end_position = bisect.bisect_right(dates, str(end_date))
+
+  if end_position <= start_position:
+    return (offsets[start_position], offsets[start_position])
+
+  return (offsets[start_position], offsets[end_position])
+
+
+# Returns the byte range of the rows of a preprocessed file within [start_date, end_date],
+# or None if the file has no usable date index
+def find_byte_range(data_file_name, start_date, end_date):
+  index = load(data_file_name)
+
+  if index is None:
+    return None
+
+  return byte_range(index, start_date, end_date)
@@ -0,0 +1,69 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Date-keyed join of two daily tables. The right-hand table (for example the vaccine totals) is sorted by date once, and every left-hand date (for example each ICU row) is looked up with a binary search, so neither file has to be sorted or gap-free.
+
+  Gap policies for left-hand dates that have no row on that exact date in the right-hand table:
+    - skip         the left-hand row is dropped
+    - ffill        the most recent earlier right-hand row is used
+    - interpolate  the values are linearly interpolated between the surrounding right-hand rows (dates outside the right-hand range are dropped)
+'''
+
+# Packages/Modules #
+import numpy as np
+
+
+# Constants #
+GAP_POLICIES = ("skip", "ffill", "interpolate")
+
+
+# Sorts a right-hand table by date, dropping NaT dates and keeping the last row of a repeated date.
+# Returns the sorted dates and the matching rows of values (a 2D array, one column per field).
+def sort_by_date(dates, values):
+  dates = np.asarray(dates, dtype="datetime64[D]")
+  values = np.asarray(values)
+
+  valid = ~np.isnat(dates)
+  dates, values = dates[valid], values[valid]
+
+  # A stable sort keeps file order within a date, so the last row of each date is the last one in the file
+  order = np.argsort(dates, kind="stable")
+  dates, values = dates[order], values[order]
+
+  last_of_date = np.append(dates[1:] != dates[:-1], True) if len(dates) else np.zeros(0, dtype=bool)
+  return dates[last_of_date], values[last_of_date]
+
+
+# Joins the left-hand dates to the right-hand table (right_dates, right_values from sort_by_date).
+# Returns a boolean mask of the left-hand rows that were matched, and the right-hand values for each matched row.
+def join(left_dates, right_dates, right_values, gap_policy="skip"):
+  if gap_policy not in GAP_POLICIES:
+    raise ValueError(f"Unknown gap policy '{gap_policy}'! Must be one of: {', '.join(GAP_POLICIES)}")
+
+  left_dates = np.asarray(left_dates, dtype="datetime64[D]")
+  known_dates = ~np.isnat(left_dates)
+  num_right = len(right_dates)
+
+  if num_right == 0:
+    return np.zeros(len(left_dates), dtype=bool), right_values[:0]
+
+  if gap_policy == "skip":
+    positions = np.minimum(np.searchsorted(right_dates, left_dates), num_right - 1)
+    matched = known_dates & (right_dates[positions] == left_dates)
+    return matched, right_values[positions[matched]]
+
+  if gap_policy == "ffill":
+    positions = np.searchsorted(right_dates, left_dates, side="right") - 1
+    matched = known_dates & (positions >= 0)
+    return matched, right_values[positions[matched]]
+
+  # Interpolates each column on the day numbers of the dates
+  matched = known_dates & (left_dates >= right_dates[0]) & (left_dates <= right_dates[-1])
+  left_days = left_dates[matched].astype(np.int64)
+  right_days = right_dates.astype(np.int64)
+  right_columns = np.asarray(right_values, dtype=np.float64).reshape(num_right, -1)
+
+  interpolated = np.column_stack([np.interp(left_days, right_days, right_columns[:, column])
+                                  for column in range(right_columns.shape[1])])
+  return matched, interpolated.reshape((len(left_days),) + np.shape(right_values)[1:])
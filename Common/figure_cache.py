@@ -0,0 +1,183 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Cache of the figures rendered by the plotting scripts, so a plot that was already drawn from the same data is copied instead of drawn again.
+
+  With --figure-cache (or --figure-cache=<folder>, default .cache/figures), a plotting script first builds the key of its figure: the SHA-256 of a JSON record holding
+    - the SHA-256 of the preprocessed input's contents (every file of a store folder, and the category dictionary or SQLite write-ahead log beside a file)
+    - the SHA-256 of the plotting script and of every module in the Common folder, the code that reads the data and draws the figure (see input_cache.module_digests)
+    - the plot parameters: date range, categories, renderer and error band
+    - the format of the graphics file (its extension)
+    - the versions of numpy, pandas, matplotlib and seaborn
+  If the cache holds an entry under that key, its figure (and plotting file) is copied to the requested files and nothing is read or drawn. numpy, pandas and matplotlib are then never imported (see lazy_imports.py), so a hit takes milliseconds. Otherwise the script draws the figure as usual and stores a copy.
+
+  Layout of the cache folder:
+    - digests.json             the SHA-256 of each hashed file by (path, size, modification time), see input_cache.file_digest
+    - <key>/figure.<format>    the rendered figure
+    - <key>/plotting.csv       the plotting data, when the run that stored the entry wrote it
+
+  When the cache grows past MAX_FIGURE_CACHE_BYTES, the least recently used entries are deleted.
+
+Example:
+  figures = figure_cache.open_cache(cli_flags.figure_cache_dir(flags), __file__, data_file_name, parameters, graphics_file_name)
+  if not figures.restore(graphics_file_name, plotting_file_name):
+    ...
+    figures.store(graphics_file_name, plotting_file_name)
+'''
+
+# Packages/Modules #
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+import input_cache
+import metrics
+
+
+# Constants #
+# Total size the figure cache may grow to before old entries are evicted
+MAX_FIGURE_CACHE_BYTES = 512 << 20
+
+# Libraries whose version changes the figures drawn
+LIBRARIES = ("numpy", "pandas", "matplotlib", "seaborn")
+
+# Files beside a preprocessed file that change what is read from it: the category dictionary (see category_codes.py)
+# and the SQLite write-ahead log
+SIDECAR_SUFFIXES = (".dict.json", "-wal")
+
+# Folder of the shared modules that read the data and draw the figures of every plotting script (this one's folder)
+COMMON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Names of the files of a cache entry
+FIGURE_NAME = "figure"
+PLOTTING_FILE_NAME = "plotting.csv"
+
+# Name given as the plotting file to skip writing it (see plot_data.py)
+NO_PLOTTING_FILE = "-"
+
+
+# Returns the installed version of each library in LIBRARIES (None if it is not found). The versions are read from the
+# names of the <library>-<version>.dist-info folders on sys.path, in import order, so no library (nor importlib.metadata) is imported.
+def library_versions():
+  versions = dict.fromkeys(LIBRARIES)
+
+  for folder in sys.path:
+    try:
+      file_names = os.listdir(folder or ".")
+    except OSError:
+      continue
+
+    for file_name in file_names:
+      stem, _, suffix = file_name.rpartition(".")
+      library, _, version = stem.partition("-")
+      if suffix in ("dist-info", "egg-info") and versions.get(library.lower(), "") is None:
+        versions[library.lower()] = version
+
+  return versions
+
+
+# Returns the [relative path, SHA-256] of every file a preprocessed input is read from
+def input_digests(data_file_name, cache_dir):
+  if os.path.isdir(data_file_name):
+    paths = sorted(os.path.join(folder, file_name) for folder, _, file_names in os.walk(data_file_name) for file_name in file_names)
+    return [[os.path.relpath(path, data_file_name), input_cache.file_digest(path, cache_dir)] for path in paths]
+
+  digests = [["", input_cache.file_digest(data_file_name, cache_dir)]]
+  for suffix in SIDECAR_SUFFIXES:
+    if os.path.exists(data_file_name + suffix):
+      digests.append([suffix, input_cache.file_digest(data_file_name + suffix, cache_dir)])
+
+  return digests
+
+
+# Returns the cache key of a figure drawn by script_file from data_file_name with the given plot parameters
+def figure_key(cache_dir, script_file, data_file_name, parameters, graphics_file_name):
+  record = {
+    "inputs": input_digests(data_file_name, cache_dir),
+    "script": input_cache.file_digest(script_file, cache_dir),
+    "common": input_cache.module_digests(COMMON_DIR, cache_dir),
+    "parameters": parameters,
+    "format": os.path.splitext(graphics_file_name)[1].lower(),
+    "libraries": library_versions(),
+  }
+  return hashlib.sha256(json.dumps(record, sort_keys=True, default=str).encode()).hexdigest()
+
+
+# One entry of the figure cache: the figure of one set of inputs and plot parameters
+class FigureCache:
+
+  def __init__(self, cache_dir, key, graphics_file_name):
+    self.cache_dir = cache_dir
+    self.key = key
+    self.entry_path = os.path.join(cache_dir, key)
+    self.figure_name = FIGURE_NAME + os.path.splitext(graphics_file_name)[1].lower()
+
+  # Copies the cached figure (and plotting file) to the requested files.
+  # Returns True on a hit, False if the entry is missing or lacks the plotting file asked for.
+  def restore(self, graphics_file_name, plotting_file_name):
+    figure_path = os.path.join(self.entry_path, self.figure_name)
+    plotting_path = os.path.join(self.entry_path, PLOTTING_FILE_NAME)
+
+    if not os.path.exists(figure_path) or (plotting_file_name != NO_PLOTTING_FILE and not os.path.exists(plotting_path)):
+      metrics.count("figure cache misses")
+      return False
+
+    with metrics.stage("write"):
+      shutil.copyfile(figure_path, graphics_file_name)
+      if plotting_file_name != NO_PLOTTING_FILE:
+        shutil.copyfile(plotting_path, plotting_file_name)
+
+    # Marks the entry as recently used for eviction
+    os.utime(self.entry_path)
+    metrics.count("figure cache hits")
+    return True
+
+  # Stores copies of the rendered figure (and plotting file), then evicts old entries if the cache is too large.
+  # A figure that cannot be stored is reported, the script still succeeds.
+  def store(self, graphics_file_name, plotting_file_name):
+    temp_path = None
+    try:
+      # The entry is filled in a temporary folder and renamed into place, so a reader never sees half of it
+      temp_path = tempfile.mkdtemp(dir=self.cache_dir, suffix=".tmp")
+      shutil.copyfile(graphics_file_name, os.path.join(temp_path, self.figure_name))
+      if plotting_file_name != NO_PLOTTING_FILE:
+        shutil.copyfile(plotting_file_name, os.path.join(temp_path, PLOTTING_FILE_NAME))
+
+      shutil.rmtree(self.entry_path, ignore_errors=True)
+      os.replace(temp_path, self.entry_path)
+      temp_path = None
+
+      input_cache.evict(self.cache_dir, MAX_FIGURE_CACHE_BYTES, keep=self.key)
+    except OSError as err:
+      print(f"Could not store '{graphics_file_name}' in the figure cache : {err}", file=sys.stderr)
+    finally:
+      if temp_path is not None:
+        shutil.rmtree(temp_path, ignore_errors=True)
+
+
+# Stands in for a FigureCache when no figure cache is used: every lookup misses and nothing is stored
+class NoFigureCache:
+
+  def restore(self, graphics_file_name, plotting_file_name):
+    return False
+
+  def store(self, graphics_file_name, plotting_file_name):
+    pass
+
+
+# Returns the cache entry of the figure script_file draws from data_file_name with the given plot parameters
+# (a dictionary of JSON values, dates allowed). A cache_dir of None, or a data file that cannot be hashed, returns a NoFigureCache.
+def open_cache(cache_dir, script_file, data_file_name, parameters, graphics_file_name):
+  if cache_dir is None:
+    return NoFigureCache()
+
+  try:
+    os.makedirs(cache_dir, exist_ok=True)
+    key = figure_key(cache_dir, script_file, data_file_name, parameters, graphics_file_name)
+  except OSError:
+    return NoFigureCache()
+
+  return FigureCache(cache_dir, key, graphics_file_name)
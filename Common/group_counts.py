@@ -0,0 +1,344 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Counts how many rows of a CSV file share each combination of key columns (for example every (date, age group) pair of the case file), or adds up a value column for each combination (sum_groups). Rows may be in any order, and sum_groups may read several files as one.
+
+  The file is counted in one of three ways, all returning a GroupTable whose items come out sorted by key:
+    - count_groups           serially, one batch of rows at a time (through the columnar input cache if asked)
+    - count_groups_parallel  on several worker processes. The file is cut into line-aligned byte ranges (see csv_ingest.split_byte_ranges), a few per worker (see range_size), each worker parses and counts one range at a time, and the partial count tables are added together. With one CPU, one worker or a file too small for two ranges, it counts serially.
+    - count_groups_bounded   within a memory budget. The byte range size is worked out from the budget, and when the running table holds more groups than the budget allows it is written to a sorted spill file. The spill files are merged back in key order while the table is read.
+
+  Every path turns the keys into plain strings and adds the partial tables the same way, so they all produce exactly the same table. Dates become ISO strings, and dates that could not be converted become 0001-01-01 (the date the row engines give them).
+
+  sum_groups reads its files one line-aligned byte range at a time into a GroupTable. Without a memory budget the table spills once it holds DEFAULT_MAX_GROUPS groups, so key spaces larger than memory fall back to an external sort and merge.
+
+  Worker processes are forked, since the scripts run their main function on import. Where fork is not available (Windows), or the file is compressed and so cannot be cut into byte ranges, the file is counted serially and streamed in chunks.
+
+Example:
+  case_table = group_counts.count_groups_bounded("conposcovidloc.csv", {"Accurate_Episode_Date": csv_ingest.CATEGORY, "Age_Group": csv_ingest.CATEGORY}, 512 << 20)
+  for (date, age_group), number_of_cases in case_table.items():
+    ...
+  case_table.close()
+'''
+
+# Packages/Modules #
+import os
+import csv
+import datetime
+import heapq
+import itertools
+import tempfile
+import multiprocessing
+import concurrent.futures
+import pandas as pd
+import compressed
+import csv_ingest
+import metrics
+
+
+# Constants #
+# Largest byte range handed to a worker, so each worker only holds one range of a large file in memory
+RANGE_BYTES = 64 << 20
+
+# Smallest byte range the ranges are cut to (by the file size or a memory budget), below which the per-range overhead dominates
+MIN_RANGE_BYTES = 1 << 20
+
+# Number of byte ranges each worker gets of a file smaller than workers * RANGES_PER_WORKER * RANGE_BYTES, so the work stays balanced
+RANGES_PER_WORKER = 4
+
+# Memory used while parsing a range, per byte of the range (the raw bytes, the parser's buffers and the parsed columns)
+RANGE_MEMORY_FACTOR = 6
+
+# Memory the parser and pandas allocate once the first range is read, whatever its size
+PARSER_MEMORY = 32 << 20
+
+# Memory used by one group of the running table (its string keys, index entry and count)
+BYTES_PER_GROUP = 256
+
+# Rough size of one row, used to turn a byte range size into a number of rows when a compressed file is streamed
+ROW_BYTES = 200
+
+# Number of groups sum_groups keeps in memory before spilling, when no memory budget is given (about 1 GB)
+DEFAULT_MAX_GROUPS = 4000000
+
+# Number of groups the partial tables added to a GroupTable may hold before they are merged into it, while it is still small
+MIN_MERGE_GROUPS = 100000
+
+
+# Running table of counts (a Series of ints indexed by tuples of strings). If max_groups is given, the table is spilled
+# to a sorted CSV file in spill_dir (default: the system temporary folder) whenever it holds more groups than that.
+# Partial tables are kept aside and merged into the running table in one go once they hold as many groups as it does
+# (or would take it past max_groups), so each group is re-sorted a handful of times rather than once per partial table.
+class GroupTable:
+
+  def __init__(self, max_groups=None, spill_dir=None):
+    self.max_groups = max_groups
+    self.spill_dir = spill_dir
+    self.table = None
+    self.pending = []
+    self.pending_groups = 0
+    self.temp_dir = None
+    self.spill_files = []
+    self.num_keys = 0
+
+  # Adds a partial count table to the running table
+  def add(self, counts):
+    self.pending.append(counts)
+    self.pending_groups += len(counts)
+
+    table_groups = 0 if self.table is None else len(self.table)
+    if self.pending_groups >= max(table_groups, MIN_MERGE_GROUPS) or (self.max_groups is not None and table_groups + self.pending_groups > self.max_groups):
+      self.merge()
+
+  # Merges the partial tables kept aside into the running table, spilling it if it then holds more than max_groups groups
+  def merge(self):
+    if not self.pending:
+      return
+
+    self.table = merge_counts(self.pending if self.table is None else [self.table] + self.pending)
+    self.pending = []
+    self.pending_groups = 0
+    metrics.count("table merges")
+
+    if self.max_groups is not None and len(self.table) > self.max_groups:
+      self.spill()
+
+  # Writes the running table to a new spill file and empties it
+  def spill(self):
+    if self.temp_dir is None:
+      self.temp_dir = tempfile.TemporaryDirectory(prefix="group_counts_", dir=self.spill_dir)
+
+    spill_file_name = os.path.join(self.temp_dir.name, f"{len(self.spill_files)}.csv")
+    with metrics.stage("write"):
+      with open(spill_file_name, "w", newline="") as spill_file:
+        csv.writer(spill_file).writerows(list(keys) + [value] for keys, value in table_rows(self.table))
+
+    self.spill_files.append(spill_file_name)
+    self.num_keys = self.table.index.nlevels
+    self.table = None
+    metrics.count("spill files")
+
+  # Yields (keys, count) pairs sorted by keys
+  def items(self):
+    self.merge()
+    if not self.spill_files:
+      yield from table_rows(self.table)
+      return
+
+    # Every spill file is sorted, so the files and the rest of the table are merged in key order and equal keys added up
+    sources = [read_spill_file(spill_file_name, self.num_keys) for spill_file_name in self.spill_files]
+    sources.append(table_rows(self.table))
+
+    for keys, rows in itertools.groupby(heapq.merge(*sources, key=lambda row: row[0]), key=lambda row: row[0]):
+      yield keys, sum(value for _, value in rows)
+
+  # Deletes the spill files
+  def close(self):
+    if self.temp_dir is not None:
+      self.temp_dir.cleanup()
+      self.temp_dir = None
+
+
+# Yields (keys, count) pairs of a count table sorted by keys (nothing for None)
+def table_rows(table):
+  if table is None:
+    return
+
+  for keys, value in table.items():
+    yield keys, int(value)
+
+
+# Yields (keys, count) pairs of a spill file, in the order they were written
+def read_spill_file(spill_file_name, num_keys):
+  with open(spill_file_name, newline="") as spill_file:
+    for row in csv.reader(spill_file):
+      yield tuple(row[:num_keys]), int(row[num_keys])
+
+
+# Returns a group key as a plain string. Dates become ISO strings, and dates that could not be converted become 0001-01-01.
+def key_string(key):
+  if key is pd.NaT:
+    return str(datetime.date.min)
+  if isinstance(key, pd.Timestamp):
+    return str(key.date())
+
+  return str(key)
+
+
+# Replaces the index of a grouped table with tuples of plain strings.
+# Each chunk parses its own categories and dates, so the keys are converted before chunks are merged.
+def string_index(table):
+  table.index = pd.MultiIndex.from_tuples([tuple(key_string(key) for key in keys) if isinstance(keys, tuple) else (key_string(keys),)
+                                           for keys in table.index])
+  return table
+
+
+# Counts the rows of a chunk of typed columns for every combination of its columns (in column order).
+# Returns a Series indexed by tuples of strings.
+def count_chunk(columns):
+  chunk = pd.DataFrame(columns)
+  return string_index(chunk.groupby(list(chunk.columns), sort=False, observed=True).size())
+
+
+# Adds up value_field of a chunk of typed columns for every combination of the key_fields.
+# Returns a Series indexed by tuples of strings.
+def sum_chunk(columns, key_fields, value_field):
+  chunk = pd.DataFrame({name: columns[name] for name in key_fields + [value_field]})
+  return string_index(chunk.groupby(key_fields, sort=False, observed=True, dropna=False)[value_field].sum())
+
+
+# Adds up partial count tables. Returns one Series of ints sorted by its keys.
+def merge_counts(partial_counts):
+  partial_counts = [counts for counts in partial_counts if len(counts) > 0]
+
+  if not partial_counts:
+    return pd.Series(dtype=int)
+
+  merged = pd.concat(partial_counts)
+  return merged.groupby(level=list(range(merged.index.nlevels))).sum().sort_index().astype(int)
+
+
+# Counts the groups of the rows within one [start, end) byte range of a file (run by the workers)
+def count_range(file_name, column_types, byte_range):
+  columns, _ = csv_ingest.read_columns(file_name, column_types, byte_range=byte_range)
+  return count_chunk(columns)
+
+
+# Yields the count table of each byte range of a file, counting the ranges on a pool of worker processes if workers > 1.
+# The pool is handed at most one range per worker at a time, so no more than workers ranges are parsed or waiting to be added
+# at once (the memory plan_memory budgets for), and the tables come out in the order the ranges finish.
+def iter_range_counts(file_name, column_types, byte_ranges, workers=1):
+  if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+    for byte_range in byte_ranges:
+      yield count_range(file_name, column_types, byte_range)
+    return
+
+  byte_ranges = iter(byte_ranges)
+  running = set()
+  with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as executor:
+    while True:
+      for byte_range in itertools.islice(byte_ranges, workers - len(running)):
+        running.add(executor.submit(count_range, file_name, column_types, byte_range))
+      if not running:
+        return
+
+      done, running = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+      for future in done:
+        counts = future.result()
+        # The workers' own metrics stay in their processes, so the rows they read are added here
+        metrics.add_rows_read(counts.sum())
+        yield counts
+
+
+# Counts the groups of a file serially, chunk_rows rows at a time, through the columnar input cache if cache_dir is given.
+# If prefetch is given, the file is parsed on a reader thread up to prefetch chunks ahead (see pipeline.py).
+def count_groups(file_name, column_types, chunk_rows=None, cache_dir=None, prefetch=0):
+  table = GroupTable()
+  for columns, _ in csv_ingest.iter_columns(file_name, column_types, chunk_rows, cache_dir, prefetch=prefetch):
+    table.add(count_chunk(columns))
+  return table
+
+
+# Returns the size of the byte ranges a file of file_size bytes is cut into for workers worker processes:
+# RANGES_PER_WORKER ranges per worker, between MIN_RANGE_BYTES and RANGE_BYTES
+def range_size(file_size, workers):
+  return max(MIN_RANGE_BYTES, min(RANGE_BYTES, file_size // (workers * RANGES_PER_WORKER)))
+
+
+# Counts the groups of a file on a pool of worker processes, each counting one byte range of the file at a time.
+# The ranges are range_bytes long, or sized from the file with range_size if it is None. More workers than CPUs only add
+# overhead, so at most os.cpu_count() are started, and a file that gives a single range (or a single worker) is counted serially.
+# Raises OSError if the file cannot be read and ValueError if a column is missing.
+def count_groups_parallel(file_name, column_types, workers, range_bytes=None):
+  workers = min(workers, os.cpu_count() or 1)
+  if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods() or compressed.compression(file_name) is not None:
+    return count_groups(file_name, column_types, RANGE_BYTES // ROW_BYTES)
+
+  # Checks the columns once here, so a missing column is reported before any worker starts
+  csv_ingest.resolve_columns(csv_ingest.read_header(file_name), list(column_types))
+  if range_bytes is None:
+    range_bytes = range_size(os.path.getsize(file_name), workers)
+  byte_ranges = csv_ingest.split_byte_ranges(file_name, range_bytes)
+
+  if len(byte_ranges) <= 1:
+    return count_groups(file_name, column_types, RANGE_BYTES // ROW_BYTES)
+
+  table = GroupTable()
+  for counts in iter_range_counts(file_name, column_types, byte_ranges, workers):
+    table.add(counts)
+  metrics.count("byte ranges", len(byte_ranges))
+
+  return table
+
+
+# Works out the byte range size and the largest running table that fit in a memory budget of max_memory bytes.
+# The memory the process already uses (the interpreter and its libraries) and PARSER_MEMORY are taken off the budget first, then half of
+# the rest goes to parsing the ranges (split between the workers) and a quarter to the running table, which is
+# briefly copied while partial tables are added to it.
+# Returns (range_bytes, max_groups). Raises ValueError if the budget is too small.
+def plan_memory(max_memory, workers=1):
+  used_mb = metrics.peak_rss_mb() or 0
+  available = max_memory - int(used_mb * (1 << 20)) - PARSER_MEMORY
+
+  range_bytes = min(available // 2 // (workers * RANGE_MEMORY_FACTOR), RANGE_BYTES)
+  if range_bytes < MIN_RANGE_BYTES:
+    needed_mb = used_mb + (PARSER_MEMORY + 2 * workers * RANGE_MEMORY_FACTOR * MIN_RANGE_BYTES) / (1 << 20)
+    raise ValueError(f"a memory budget of {max_memory / (1 << 20):.0f} MB is too small, "
+                     f"{used_mb:.0f} MB is already in use and at least {needed_mb:.0f} MB is needed")
+
+  return range_bytes, max(available // 4 // BYTES_PER_GROUP, 1)
+
+
+# Counts the groups of a file within a memory budget of max_memory bytes, on a pool of worker processes if workers > 1.
+# Groups beyond the budget are spilled to files in spill_dir (default: the system temporary folder).
+# Raises OSError if the file cannot be read and ValueError if a column is missing or the budget is too small.
+def count_groups_bounded(file_name, column_types, max_memory, workers=1, spill_dir=None):
+  range_bytes, max_groups = plan_memory(max_memory, workers)
+
+  csv_ingest.resolve_columns(csv_ingest.read_header(file_name), list(column_types))
+  table = GroupTable(max_groups, spill_dir)
+
+  if compressed.compression(file_name) is not None:
+    for columns, _ in iter_range_chunks(file_name, column_types, range_bytes):
+      table.add(count_chunk(columns))
+    return table
+
+  byte_ranges = csv_ingest.split_byte_ranges(file_name, range_bytes)
+  for counts in iter_range_counts(file_name, column_types, byte_ranges, workers):
+    table.add(counts)
+  metrics.count("byte ranges", len(byte_ranges))
+
+  return table
+
+
+# Yields the (columns, invalid) chunks of a file, one line-aligned byte range of about range_bytes at a time.
+# Compressed files cannot be cut into byte ranges, so they are streamed in chunks of about as many rows instead.
+def iter_range_chunks(file_name, column_types, range_bytes):
+  if compressed.compression(file_name) is not None:
+    yield from csv_ingest.iter_columns(file_name, column_types, max(range_bytes // ROW_BYTES, 1))
+    return
+
+  for byte_range in csv_ingest.split_byte_ranges(file_name, range_bytes):
+    yield csv_ingest.read_columns(file_name, column_types, byte_range=byte_range)
+    metrics.count("byte ranges")
+
+
+# Adds up value_field for every combination of the key_fields over the rows of one or more files, read one line-aligned
+# byte range (or chunk of a compressed file) at a time. column_types (name -> type) must hold the key and value fields.
+# With a max_memory budget (in bytes), the ranges and the running table are sized to fit it. Otherwise the table spills
+# past DEFAULT_MAX_GROUPS groups. Spill files go to spill_dir (default: the system temporary folder).
+# Raises OSError if a file cannot be read and ValueError if a column is missing or the budget is too small.
+def sum_groups(file_names, column_types, key_fields, value_field, max_memory=None, spill_dir=None):
+  range_bytes, max_groups = (RANGE_BYTES, DEFAULT_MAX_GROUPS) if max_memory is None else plan_memory(max_memory)
+
+  # Checks every file before reading any, so a bad file is reported before the (long) aggregation
+  for file_name in file_names:
+    csv_ingest.resolve_columns(csv_ingest.read_header(file_name), list(column_types))
+
+  table = GroupTable(max_groups, spill_dir)
+  for file_name in file_names:
+    for columns, _ in iter_range_chunks(file_name, column_types, range_bytes):
+      table.add(sum_chunk(columns, key_fields, value_field))
+
+  return table
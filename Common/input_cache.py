@@ -0,0 +1,232 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Content-addressed columnar cache of the CSV files read through csv_ingest. The first time a file is read, the typed columns are saved as .npy files under a folder named after the SHA-256 of the file's contents. Later reads of an unchanged file memory-map those arrays and skip CSV parsing completely.
+
+  Layout of the cache folder:
+    - digests.json                              remembers the SHA-256 of each file by (path, size, modification time) so unchanged files are not rehashed
+    - <sha256>/<column>.<type>.values.npy       typed values (DATE and INTEGER columns)
+    - <sha256>/<column>.<type>.codes.npy        integer codes (STRING and CATEGORY columns)
+    - <sha256>/<column>.<type>.categories.npy   the strings the codes refer to
+    - <sha256>/<column>.<type>.invalid.npy      mask of the rows whose value could not be converted
+
+  When the cache grows past MAX_CACHE_BYTES, the least recently used entries are deleted.
+'''
+
+# Packages/Modules #
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import lazy_imports
+
+# numpy and pandas are only imported once columns are cached or read, so file_digest and evict
+# can be used without them (see figure_cache.py)
+np = lazy_imports.lazy_module("numpy")
+pd = lazy_imports.lazy_module("pandas")
+
+
+# Constants #
+# Total size the cache folder may grow to before old entries are evicted
+MAX_CACHE_BYTES = 4 << 30
+
+# Number of bytes read at a time when hashing a file
+HASH_BLOCK_SIZE = 1 << 20
+
+# Name of the file remembering the digest of each input file
+DIGESTS_FILE_NAME = "digests.json"
+
+# Column types stored as integer codes and a list of categories
+ENCODED_TYPES = ("str", "category")
+
+
+# Returns the SHA-256 of a file's contents as a hex string.
+# The digest is remembered in the cache folder by (path, size, modification time).
+def file_digest(file_name, cache_dir):
+  stat = os.stat(file_name)
+  stat_key = f"{os.path.abspath(file_name)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+  digests_path = os.path.join(cache_dir, DIGESTS_FILE_NAME)
+  try:
+    with open(digests_path) as digests_file:
+      digests = json.load(digests_file)
+  except (IOError, ValueError):
+    digests = {}
+
+  if stat_key in digests:
+    return digests[stat_key]
+
+  sha256 = hashlib.sha256()
+  with open(file_name, "rb") as data_file:
+    for block in iter(lambda: data_file.read(HASH_BLOCK_SIZE), b""):
+      sha256.update(block)
+
+  # Entries for older versions of the same path are dropped
+  path_prefix = f"{os.path.abspath(file_name)}|"
+  digests = {key: value for key, value in digests.items() if not key.startswith(path_prefix)}
+  digests[stat_key] = sha256.hexdigest()
+
+  os.makedirs(cache_dir, exist_ok=True)
+  write_atomically(digests_path, lambda temp_file: temp_file.write(json.dumps(digests, indent=1).encode()))
+
+  return digests[stat_key]
+
+
+# Returns the [file name, SHA-256] of every Python module in a folder, sorted by name.
+# A key holding them changes whenever any of the modules changes (see run_all.py and figure_cache.py).
+def module_digests(folder, cache_dir):
+  file_names = sorted(file_name for file_name in os.listdir(folder) if file_name.endswith(".py"))
+  return [[file_name, file_digest(os.path.join(folder, file_name), cache_dir)] for file_name in file_names]
+
+
+# Writes a file by writing a temporary file beside it and renaming it into place,
+# so a reader never sees a half written file
+def write_atomically(path, write):
+  temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+  try:
+    with os.fdopen(temp_fd, "wb") as temp_file:
+      write(temp_file)
+    os.replace(temp_path, path)
+  except BaseException:
+    if os.path.exists(temp_path):
+      os.remove(temp_path)
+    raise
+
+
+# Returns the path of one array of a cached column
+def column_path(cache_dir, digest, name, column_type, part):
+  safe_name = "".join(char if char.isalnum() or char in "-_" else "_" for char in name)
+  return os.path.join(cache_dir, digest, f"{safe_name}.{column_type}.{part}.npy")
+
+
+# Returns True if every requested column (name -> type) of the entry is cached
+def has_columns(cache_dir, digest, column_types):
+  return all(os.path.exists(column_path(cache_dir, digest, name, column_type, "invalid"))
+             for name, column_type in column_types.items())
+
+
+# Memory-maps the requested columns (name -> type) of a cache entry.
+# Returns the raw arrays: {name: (values or codes, categories or None, invalid)}, or None if the entry is missing a column.
+def map_columns(cache_dir, digest, column_types):
+  if not has_columns(cache_dir, digest, column_types):
+    return None
+
+  arrays = {}
+  for name, column_type in column_types.items():
+    invalid = np.load(column_path(cache_dir, digest, name, column_type, "invalid"), mmap_mode="r")
+
+    if column_type in ENCODED_TYPES:
+      codes = np.load(column_path(cache_dir, digest, name, column_type, "codes"), mmap_mode="r")
+      categories = np.load(column_path(cache_dir, digest, name, column_type, "categories"))
+      arrays[name] = (codes, categories, invalid)
+    else:
+      values = np.load(column_path(cache_dir, digest, name, column_type, "values"), mmap_mode="r")
+      arrays[name] = (values, None, invalid)
+
+  # Marks the entry as recently used for eviction
+  os.utime(os.path.join(cache_dir, digest))
+
+  return arrays
+
+
+# Converts rows [start, stop) of memory-mapped column arrays into the (columns, invalid) pair csv_ingest returns
+def decode_columns(arrays, column_types, start=0, stop=None):
+  columns = {}
+  invalid = {}
+
+  for name, column_type in column_types.items():
+    values, categories, invalid_rows = arrays[name]
+    values = values[start:stop]
+
+    if column_type == "category":
+      columns[name] = pd.Categorical.from_codes(values, categories.astype(object))
+    elif column_type == "str":
+      columns[name] = categories.astype(object)[values] if len(categories) else np.array([""] * len(values), dtype=object)
+    else:
+      columns[name] = values
+
+    invalid[name] = invalid_rows[start:stop]
+
+  return columns, invalid
+
+
+# Collects the typed chunks of a file as they are parsed, then writes them to the cache in one go.
+# String columns are dictionary-encoded while collecting, so only integer codes are held in memory.
+class ColumnCacheBuilder:
+
+  def __init__(self, cache_dir, digest, column_types):
+    self.cache_dir = cache_dir
+    self.digest = digest
+    self.column_types = column_types
+    self.parts = {name: [] for name in column_types}
+    self.invalid_parts = {name: [] for name in column_types}
+    self.category_codes = {name: {} for name in column_types if column_types[name] in ENCODED_TYPES}
+
+  # Adds one (columns, invalid) chunk
+  def add_chunk(self, columns, invalid):
+    for name, column_type in self.column_types.items():
+      values = columns[name]
+
+      if column_type in ENCODED_TYPES:
+        if isinstance(values, pd.Categorical):
+          chunk_codes, chunk_categories = values.codes, values.categories
+        else:
+          chunk_codes, chunk_categories = pd.factorize(values)
+
+        # Maps the chunk's own codes onto the codes shared by every chunk
+        known_codes = self.category_codes[name]
+        remap = np.array([known_codes.setdefault(category, len(known_codes)) for category in chunk_categories], dtype=np.int32)
+        values = remap[chunk_codes] if len(remap) else np.zeros(len(chunk_codes), dtype=np.int32)
+
+      self.parts[name].append(np.asarray(values))
+      self.invalid_parts[name].append(np.asarray(invalid[name], dtype=bool))
+
+  # Writes every collected column to the cache and evicts old entries if the cache is too large
+  def finish(self):
+    os.makedirs(os.path.join(self.cache_dir, self.digest), exist_ok=True)
+
+    for name, column_type in self.column_types.items():
+      values = np.concatenate(self.parts[name]) if self.parts[name] else np.zeros(0)
+
+      if column_type in ENCODED_TYPES:
+        categories = np.array(list(self.category_codes[name]), dtype=str)
+        self.save(name, column_type, "codes", values.astype(np.int32))
+        self.save(name, column_type, "categories", categories)
+      else:
+        self.save(name, column_type, "values", values)
+
+      # The invalid mask is written last, it marks the column as complete
+      invalid_rows = np.concatenate(self.invalid_parts[name]) if self.invalid_parts[name] else np.zeros(0, dtype=bool)
+      self.save(name, column_type, "invalid", invalid_rows)
+
+    evict(self.cache_dir, MAX_CACHE_BYTES, keep=self.digest)
+
+  def save(self, name, column_type, part, array):
+    write_atomically(column_path(self.cache_dir, self.digest, name, column_type, part),
+                     lambda temp_file: np.save(temp_file, array, allow_pickle=False))
+
+
+# Returns the total size in bytes of the files in a folder
+def folder_size(path):
+  return sum(os.path.getsize(os.path.join(path, file_name)) for file_name in os.listdir(path))
+
+
+# Deletes the least recently used entries until the cache is at most max_bytes (the entry named keep is never deleted)
+def evict(cache_dir, max_bytes, keep=None):
+  entries = []
+  for entry_name in os.listdir(cache_dir):
+    entry_path = os.path.join(cache_dir, entry_name)
+    if os.path.isdir(entry_path):
+      entries.append((os.path.getmtime(entry_path), entry_name, folder_size(entry_path)))
+
+  total_bytes = sum(size for _, _, size in entries)
+  for _, entry_name, size in sorted(entries):
+    if total_bytes <= max_bytes:
+      break
+    if entry_name == keep:
+      continue
+
+    shutil.rmtree(os.path.join(cache_dir, entry_name), ignore_errors=True)
+    total_bytes -= size
@@ -0,0 +1,112 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Deferred imports for the plotting scripts. Importing numpy, pandas, matplotlib and seaborn takes about a second, which a run that stops on a usage or argument error used to pay in full. lazy_module returns a stand-in for a module that imports it the first time one of its attributes is used. A script can then check its arguments first, and only imports the modules its chosen path uses (e.g. --render=direct never imports seaborn).
+
+  matplotlib.pyplot is imported with the non-interactive Agg backend, since the scripts save their figures and never show them. pyplot then does not look for (or import) a GUI toolkit. The backend is left alone if pyplot was already imported, e.g. by run_all.py.
+
+  Every deferred import is timed and charged to the "import" stage (see metrics.py). With --time-startup, a script prints to stderr when it exits how long it ran before its first deferred import (checking its arguments), then the time of each deferred import.
+
+Example:
+  pd = lazy_imports.lazy_module("pandas")
+  lazy_imports.time_startup(flags)
+  ...
+  frame = pd.DataFrame(columns)  # pandas is imported here
+'''
+
+# Packages/Modules #
+import os
+import sys
+import time
+import atexit
+import importlib
+import metrics
+
+
+# Constants #
+# Backend set before matplotlib is imported
+HEADLESS_BACKEND = "Agg"
+
+# Packages that import matplotlib.pyplot, which must only be imported once the backend is set
+PYPLOT_PACKAGES = ("matplotlib", "seaborn")
+
+# When this module was imported, along with the script's other startup imports
+started = time.perf_counter()
+
+# When the first deferred import started, None until then
+first_import = None
+
+# Seconds taken by each deferred import, in the order they happened
+import_seconds = {}
+
+
+# Stands in for a module until one of its attributes is used, then passes every attribute on to the imported module
+class LazyModule:
+
+  def __init__(self, module_name):
+    self.__dict__["module_name"] = module_name
+
+  def __getattr__(self, name):
+    return getattr(load(self.module_name), name)
+
+
+# Returns a stand-in for the named module (e.g. "pandas" or "matplotlib.pyplot")
+def lazy_module(module_name):
+  return LazyModule(module_name)
+
+
+# Returns the named module, importing it (timed) if it was not imported yet
+def load(module_name):
+  global first_import
+
+  module = sys.modules.get(module_name)
+  if module is not None:
+    return module
+
+  now = time.perf_counter()
+  if first_import is None:
+    first_import = now
+
+  with metrics.stage("import"):
+    if module_name.split(".")[0] in PYPLOT_PACKAGES and "matplotlib.pyplot" not in sys.modules:
+      import matplotlib
+      matplotlib.use(HEADLESS_BACKEND)
+    module = importlib.import_module(module_name)
+
+  import_seconds[module_name] = time.perf_counter() - now
+  return module
+
+
+# Returns how many seconds ago this process started, or None where it cannot be told (no /proc)
+def process_age():
+  try:
+    with open("/proc/self/stat") as stat_file:
+      start_ticks = int(stat_file.read().rpartition(")")[2].split()[19])
+    with open("/proc/uptime") as uptime_file:
+      uptime = float(uptime_file.read().split()[0])
+    return max(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+  except (OSError, ValueError, IndexError, AttributeError):
+    return None
+
+
+# Prints how long the script ran before its first deferred import, and how long each deferred import took.
+# Times are counted from the start of the process where it can be told, otherwise from the script's startup imports.
+def print_startup_report():
+  now = time.perf_counter()
+  age = process_age()
+  process_started = now - age if age is not None else started
+  checked = (first_import if first_import is not None else now) - process_started
+
+  print(f"{os.path.basename(sys.argv[0])}: {now - process_started:.3f} s since the {'process' if age is not None else 'script'} started", file=sys.stderr)
+  print(f"  {'before the first deferred import':<34} {checked:10.4f} s", file=sys.stderr)
+  for module_name, seconds in import_seconds.items():
+    print(f"  {'import ' + module_name:<34} {seconds:10.4f} s", file=sys.stderr)
+  if "matplotlib" in sys.modules:
+    print(f"  matplotlib backend: {sys.modules['matplotlib'].get_backend()}", file=sys.stderr)
+
+
+# Prints the startup report when the script exits, if --time-startup was given
+def time_startup(flags):
+  if "time-startup" in flags:
+    atexit.register(print_startup_report)
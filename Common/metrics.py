@@ -0,0 +1,239 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Stage-level timing and counters shared by every script. A script wraps each part of its work in a stage (open, parse, convert, aggregate, write, render), csv_ingest times its own open, parse and convert stages, and the plotting scripts' deferred imports are timed as the import stage (see lazy_imports.py). Stage times are exclusive: while a nested stage runs (for example a write inside the aggregate loop), the outer stage is paused.
+
+  Per-row diagnostics are counted instead of printed:
+    - invalid_values  values of each field that could not be converted (counted by csv_ingest)
+    - rejected_rows   rows a script skipped, by reason
+    - counters        any other event a script counts
+
+  Optional flags handled here (every script accepts them):
+    - --profile               Prints the stage times, rows per second, counters and peak memory to stderr when the script ends
+    - --profile=profile_file  Same, and also runs the script under cProfile and saves the statistics to profile_file (read them with python -m pstats profile_file)
+    - --metrics-json=file     Writes the same report as JSON
+
+  With debugOn set, the counters are printed to stderr when the script ends.
+
+Example:
+  metrics.start(flags)
+  with metrics.stage("aggregate"):
+    ...
+  metrics.reject("no vaccine data for the date", number_of_rows)
+  metrics.finish(flags, debugOn)
+'''
+
+# Packages/Modules #
+import os
+import sys
+import json
+import time
+import cProfile
+import contextlib
+
+# resource is only available on Unix, peak memory is not reported without it
+try:
+  import resource
+except ImportError:
+  resource = None
+
+
+# Collects the stage times and counters of one script run
+class Metrics:
+
+  def __init__(self):
+    self.started = time.perf_counter()
+    self.stage_seconds = {}
+    self.stage_stack = []
+    self.stage_started = self.started
+    self.rows_read = 0
+    self.rows_written = 0
+    self.invalid_values = {}
+    self.rejected_rows = {}
+    self.counters = {}
+
+  # Adds the time since the last stage change to the stage on top of the stack
+  def charge(self, now):
+    if self.stage_stack:
+      name = self.stage_stack[-1]
+      self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + now - self.stage_started
+    self.stage_started = now
+
+  def enter(self, name):
+    self.charge(time.perf_counter())
+    self.stage_stack.append(name)
+
+  def leave(self):
+    self.charge(time.perf_counter())
+    self.stage_stack.pop()
+
+  # Returns the report as a dictionary (the --metrics-json contents)
+  def report(self, script_name):
+    total_seconds = time.perf_counter() - self.started
+    stages = {name: round(seconds, 6) for name, seconds in self.stage_seconds.items()}
+    stages["other"] = round(max(total_seconds - sum(self.stage_seconds.values()), 0.0), 6)
+
+    return {
+      "script": script_name,
+      "total_seconds": round(total_seconds, 6),
+      "stages": stages,
+      "rows_read": self.rows_read,
+      "rows_written": self.rows_written,
+      "rows_per_second": round(self.rows_read / total_seconds, 1) if total_seconds > 0 else None,
+      "invalid_values": self.invalid_values,
+      "rejected_rows": self.rejected_rows,
+      "counters": self.counters,
+      "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# Wraps standard output so the time spent writing is charged to the "write" stage and the lines written are counted.
+# Every other attribute (encoding, fileno, buffer, isatty...) is passed on to the wrapped stream.
+class TimedStream:
+
+  def __init__(self, stream):
+    self.stream = stream
+
+  # Only called for attributes the wrapper lacks. stream itself is missing while a copy is being built, which must not recurse.
+  def __getattr__(self, name):
+    if name == "stream":
+      raise AttributeError(name)
+    return getattr(self.stream, name)
+
+  def write(self, text):
+    current.enter("write")
+    try:
+      current.rows_written += text.count("\n")
+      return self.stream.write(text)
+    finally:
+      current.leave()
+
+  def flush(self):
+    self.stream.flush()
+
+
+# Metrics of the running script (replaced by start)
+current = Metrics()
+
+# cProfile profiler, when --profile=profile_file was given
+profiler = None
+
+
+# Returns the peak resident memory of this process in megabytes, or None if it cannot be measured
+def peak_rss_mb():
+  if resource is None:
+    return None
+
+  # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+  max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  return round(max_rss / (1 << 20) if sys.platform == "darwin" else max_rss / (1 << 10), 1)
+
+
+# Returns True if a report was asked for with --profile or --metrics-json
+def is_requested(flags):
+  return "profile" in flags or "metrics-json" in flags
+
+
+# Starts measuring a script run: resets the metrics, wraps standard output when a report was asked for,
+# and starts cProfile if --profile was given a file name
+def start(flags):
+  global current, profiler
+  current = Metrics()
+
+  if is_requested(flags):
+    sys.stdout = TimedStream(sys.stdout)
+
+  if isinstance(flags.get("profile"), str):
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+
+# Times a block of work as the named stage
+@contextlib.contextmanager
+def stage(name):
+  current.enter(name)
+  try:
+    yield
+  finally:
+    current.leave()
+
+
+# Yields the items of an iterable, charging the time spent producing each item to the named stage
+# (the time the caller spends on each item is not charged)
+def timed_iter(iterable, name):
+  iterator = iter(iterable)
+
+  while True:
+    current.enter(name)
+    try:
+      item = next(iterator)
+    except StopIteration:
+      return
+    finally:
+      current.leave()
+
+    yield item
+
+
+# Counters, each adding number (default 1) under a name
+def add_rows_read(number):
+  current.rows_read += int(number)
+
+
+def add_rows_written(number):
+  current.rows_written += int(number)
+
+
+def invalid_values(field_name, number):
+  if number:
+    current.invalid_values[field_name] = current.invalid_values.get(field_name, 0) + int(number)
+
+
+def reject(reason, number=1):
+  if number:
+    current.rejected_rows[reason] = current.rejected_rows.get(reason, 0) + int(number)
+
+
+def count(name, number=1):
+  if number:
+    current.counters[name] = current.counters.get(name, 0) + int(number)
+
+
+# Ends the script run: puts standard output back, prints the counters if debugOn is set,
+# and writes the reports asked for with --profile and --metrics-json.
+# Exits with an error message if a report file cannot be written.
+def finish(flags, debugOn=False):
+  global profiler
+
+  if profiler is not None:
+    profiler.disable()
+
+  sys.stdout.flush()
+  if isinstance(sys.stdout, TimedStream):
+    sys.stdout = sys.stdout.stream
+
+  report = current.report(os.path.basename(sys.argv[0]))
+
+  if debugOn:
+    for title in ("invalid_values", "rejected_rows", "counters"):
+      for name, number in report[title].items():
+        print(f"{title}: {name}: {number}", file=sys.stderr)
+
+  if "profile" in flags:
+    print(f"{report['script']}: {report['total_seconds']:.3f} s, {report['rows_read']} rows read ({report['rows_per_second']} rows/s), "
+          f"{report['rows_written']} rows written, peak memory {report['peak_rss_mb']} MB", file=sys.stderr)
+    for name, seconds in report["stages"].items():
+      print(f"  {name:<10} {seconds:10.4f} s", file=sys.stderr)
+
+  try:
+    if profiler is not None:
+      profiler.dump_stats(flags["profile"])
+      profiler = None
+
+    if isinstance(flags.get("metrics-json"), str):
+      with open(flags["metrics-json"], "w") as metrics_file:
+        json.dump(report, metrics_file, indent=1)
+  except OSError as err:
+    print(f"Unable to write the profiling report : {err}", file=sys.stderr)
+    sys.exit(1)
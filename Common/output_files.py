@@ -0,0 +1,56 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Opens the optional outputs a preprocessing script writes besides its printed CSV: the date index (--date-index), the category dictionary (--dictionary), the binary series (--binary), the partition store (--partitions) and the SQLite table (--sqlite).
+
+  Each output whose flag was not given gets its writer's stand-in, which does nothing, so a script adds every row to every output without checking which flags were set. The dictionary is only opened for outputs with a CATEGORY field.
+
+Example:
+  outputs = output_files.open_outputs(flags, OUTPUT_TABLE, OUTPUT_FIELDS)
+  print(f"date,{outputs.encoder.header('phu_name')},number_of_outbreaks")
+  outputs.add(date, phu_name, number_of_outbreaks)
+  print(f"{date},{outputs.encoder.encode_quoted('phu_name', phu_name)},{number_of_outbreaks}")
+  outputs.save()
+'''
+
+# Packages/Modules #
+import binary_series
+import category_codes
+import column_types
+import date_index
+import partition_store
+import sqlite_store
+
+
+# Holds the writer of every optional output of one preprocessed file
+class OutputFiles:
+
+  def __init__(self, flags, table_name, output_types):
+    self.flags = flags
+    self.index = date_index.open_writer(flags.get("date-index"))
+    self.encoder = category_codes.open_encoder(flags.get("dictionary") if column_types.CATEGORY in output_types.values() else None)
+    self.series = binary_series.open_writer(flags.get("binary"), output_types)
+    self.store = partition_store.open_writer(flags.get("partitions"), output_types)
+    self.database = sqlite_store.open_writer(flags.get("sqlite"), table_name, output_types)
+
+  # Adds one output row, its date first. Called just before the row is printed, so the date index marks where it starts.
+  def add(self, *row):
+    self.index.mark(row[0])
+    self.series.add(*row)
+    self.store.add(*row)
+    self.database.add(*row)
+
+  # Writes every output that was requested
+  def save(self):
+    self.index.save(self.flags.get("date-index"))
+    self.encoder.save(self.flags.get("dictionary"))
+    self.series.save(self.flags.get("binary"))
+    self.store.save(self.flags.get("partitions"))
+    self.database.save(self.flags.get("sqlite"))
+
+
+# Opens the outputs requested by the flags, for an output with the fields and types of output_types.
+# Raises ValueError if an output flag was given without its file name.
+def open_outputs(flags, table_name, output_types):
+  return OutputFiles(flags, table_name, output_types)
@@ -0,0 +1,185 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Partitioned on-disk store of a preprocessed time series, so a plot of a few categories over a few months opens only the files holding those rows.
+
+  With --partitions=<store_folder>, a preprocessing script also writes its output rows into one series file (see binary_series.py) per category code and month of the date:
+    <store_folder>/<field>=<code>/month=YYYY-MM.series
+  e.g. q4_store/phu_name=3/month=2021-10.series. A series without a category field (question 1) is partitioned by month only.
+
+  Every category is given the same code in all the partitions. The manifest <store_folder>/partitions.json lists:
+    - fields      [name, type] of each record field
+    - categories  the categories of each category field, listed in code order
+    - partitions  the category codes, month and path of each partition
+
+  The plotting scripts can be given the store folder in place of the preprocessed CSV. The manifest is used to pick the partitions of the requested categories and months, only those are mapped, and their rows are put back in the order the script wrote them (each record also holds its output row number, ROW_FIELD), which is the order of the preprocessed CSV. The work then follows the size of the answer rather than the size of the whole series.
+
+Example:
+  store = partition_store.open_writer(flags.get("partitions"), OUTPUT_FIELDS)
+  store.add(date, phu_name, number_of_outbreaks)
+  store.save(flags.get("partitions"))
+
+  columns, invalid = partition_store.read_columns("q4_store", Q4_FIELDS, start_date, end_date, {"phu_name": ["TORONTO"]})
+'''
+
+# Packages/Modules #
+import os
+import re
+import json
+import numpy as np
+import pandas as pd
+import binary_series
+import category_codes
+import csv_ingest
+import metrics
+
+
+# Constants #
+MANIFEST_NAME = "partitions.json"
+
+# Name of the month partition of rows whose date is not a valid date (never within a requested date range)
+UNKNOWN_MONTH = "unknown"
+
+# Extra field of every partition record holding the row's position in the script's output, so rows read from several
+# partitions are put back in the order they were written (the order of the CSV output)
+ROW_FIELD = "output_row"
+
+
+# Returns the "YYYY-MM" month of a date ("YYYY-MM-DD" string, date or Timestamp), or UNKNOWN_MONTH
+def month_of(date):
+  month = str(date)[:7]
+  return month if re.fullmatch(r"\d{4}-\d{2}", month) else UNKNOWN_MONTH
+
+
+# Returns the path of a partition, relative to the store folder
+def partition_path(category_fields, codes, month):
+  folders = [f"{name}={code}" for name, code in zip(category_fields, codes)]
+  return os.path.join(*folders, f"month={month}{binary_series.SERIES_SUFFIX}")
+
+
+# Collects the output rows of a preprocessing script into one series per partition and writes the store at the end
+class PartitionWriter:
+
+  def __init__(self, column_types):
+    self.column_types = column_types
+    self.fields = list(column_types.items())
+    self.category_fields = [name for name, column_type in self.fields if column_type == csv_ingest.CATEGORY]
+    self.date_field = next(name for name, column_type in self.fields if column_type == csv_ingest.DATE)
+    self.partition_types = dict(column_types, **{ROW_FIELD: csv_ingest.INTEGER})
+    self.encoder = category_codes.CategoryEncoder()
+    self.partitions = {}
+    self.number_of_rows = 0
+
+  # Adds one row to its partition, given its values in the order of the fields
+  def add(self, *row):
+    values = dict(zip(self.column_types, row))
+    key = (tuple(self.encoder.encode(name, values[name]) for name in self.category_fields), month_of(values[self.date_field]))
+
+    partition = self.partitions.get(key)
+    if partition is None:
+      partition = self.partitions[key] = binary_series.SeriesWriter(self.partition_types, self.encoder)
+    partition.add(*row, self.number_of_rows)
+    self.number_of_rows += 1
+
+  # Writes every partition, then the manifest (a store is only read through its manifest, so stale partitions are ignored)
+  def save(self, store_dir):
+    listed = []
+    for (codes, month), partition in sorted(self.partitions.items()):
+      path = partition_path(self.category_fields, codes, month)
+      os.makedirs(os.path.join(store_dir, os.path.dirname(path)), exist_ok=True)
+      partition.save(os.path.join(store_dir, path))
+      listed.append([list(codes), month, path])
+
+    with open(os.path.join(store_dir, MANIFEST_NAME), "w") as manifest_file:
+      json.dump({
+        "fields": self.fields,
+        "categories": {name: list(self.encoder.codes.get(name, {})) for name in self.category_fields},
+        "partitions": listed,
+      }, manifest_file)
+
+
+# Stands in for a PartitionWriter when no store is requested
+class NoPartitions:
+
+  def add(self, *row):
+    pass
+
+  def save(self, store_dir):
+    pass
+
+
+# Returns the writer for the value of the "--partitions" flag and the fields (name -> type) of the output rows:
+# None returns a NoPartitions, True (no folder given) raises a ValueError
+def open_writer(store_dir, column_types):
+  if store_dir is None:
+    return NoPartitions()
+  if store_dir is True:
+    raise ValueError("--partitions needs the store folder, e.g. --partitions=q4_store")
+
+  return PartitionWriter(column_types)
+
+
+# Loads the manifest of a store folder.
+# Raises ValueError if it is missing or cannot be read.
+def load(store_dir):
+  try:
+    with open(os.path.join(store_dir, MANIFEST_NAME)) as manifest_file:
+      manifest = json.load(manifest_file)
+    return manifest["fields"], manifest["categories"], manifest["partitions"]
+  except (IOError, ValueError, KeyError) as err:
+    raise ValueError(f"'{store_dir}' is not a readable partition store ({err})")
+
+
+# Returns the empty columns and invalid masks of a store none of whose partitions were picked
+def empty_columns(column_types, categories):
+  columns = {}
+  for name, column_type in column_types.items():
+    if column_type == csv_ingest.CATEGORY:
+      columns[name] = pd.Categorical.from_codes(np.zeros(0, dtype=np.int32), categories=categories[name])
+    else:
+      columns[name] = np.zeros(0, dtype=binary_series.RECORD_TYPES[column_type])
+
+  return columns, {name: np.zeros(0, dtype=bool) for name in column_types}
+
+
+# Reads the requested columns (name -> type) of the rows dated within [start_date, end_date] of a store folder,
+# keeping only the rows whose category is in selected_categories (field name -> category names) for the fields it lists.
+# The store is read through its manifest: only the partitions of the selected categories and months are mapped.
+# Returns the dictionary of columns and the dictionary of invalid row masks.
+# Raises OSError if a file cannot be read and ValueError if the folder is not a store or a column is missing.
+def read_columns(data_file_name, column_types, start_date, end_date, selected_categories=None):
+  selected_categories = selected_categories or {}
+  fields, categories, partitions = load(data_file_name)
+  category_fields = [name for name, column_type in fields if column_type == csv_ingest.CATEGORY]
+
+  # Picks the partitions of the selected category codes and of the months overlapping the date range
+  wanted_codes = {name: set(pd.Index(categories[name]).get_indexer(names)) for name, names in selected_categories.items()}
+  first_month, last_month = str(start_date)[:7], str(end_date)[:7]
+  picked = [path for codes, month, path in partitions
+            if month != UNKNOWN_MONTH and first_month <= month <= last_month
+            and all(code in wanted_codes.get(name, [code]) for name, code in zip(category_fields, codes))]
+  metrics.count("partitions read", len(picked))
+
+  if not picked:
+    return empty_columns(column_types, categories)
+
+  partition_types = dict(column_types, **{ROW_FIELD: csv_ingest.INTEGER})
+  parts = [binary_series.read_columns(os.path.join(data_file_name, path), partition_types, start_date, end_date) for path in picked]
+
+  # Joins the partitions, then puts the rows back in the order they were written
+  with metrics.stage("aggregate"):
+    columns = {}
+    for name, column_type in partition_types.items():
+      if column_type == csv_ingest.CATEGORY:
+        codes = np.concatenate([part_columns[name].codes for part_columns, _ in parts])
+        columns[name] = pd.Categorical.from_codes(codes, categories=categories[name])
+      else:
+        columns[name] = np.concatenate([part_columns[name] for part_columns, _ in parts])
+    invalid = {name: np.concatenate([part_invalid[name] for _, part_invalid in parts]) for name in column_types}
+
+    order = np.argsort(columns.pop(ROW_FIELD), kind="stable")
+    columns = {name: values[order] for name, values in columns.items()}
+    invalid = {name: values[order] for name, values in invalid.items()}
+
+  return columns, invalid
@@ -0,0 +1,105 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Producer-consumer pipeline between reading a file and processing it. A reader thread runs the file reader (I/O, decompression and CSV tokenizing) and fills a bounded queue of raw chunks, while the main thread converts and aggregates the chunks it has already received. On slow or network-mounted storage the read of the next chunk then overlaps the work on the current one.
+
+  pyarrow and the pandas C parser release the GIL while they read and tokenize, so the two threads really do run at the same time.
+
+  When the pipeline ends, its backpressure is added to the script's counters (see metrics.py):
+    - pipeline chunks                     chunks passed through the queue
+    - pipeline waits for the reader       chunks the main thread had to wait for (the queue was empty, reading is the bottleneck)
+    - pipeline reader waits               chunks the reader had to hold back (the queue was full, processing is the bottleneck)
+    - pipeline reader blocked (ms)        time the reader spent waiting for room in the queue
+
+  The time the main thread spends waiting is charged to the parse stage by the caller, so --profile shows how much of the reading was not hidden.
+
+Example:
+  for raw_columns in metrics.timed_iter(pipeline.prefetch(iter_raw_chunks_pyarrow(...), 4), "parse"):
+    ...
+'''
+
+# Packages/Modules #
+import time
+import queue
+import threading
+import metrics
+
+
+# Constants #
+# How often a blocked reader checks whether the main thread stopped the pipeline (seconds)
+STOP_CHECK_INTERVAL = 0.1
+
+# Marks the end of the chunks in the queue
+END = object()
+
+
+# Yields the items of an iterable, produced on a reader thread that may hold up to depth items the caller has not taken yet.
+# An exception raised by the iterable is raised again in the caller. If the caller stops early, the reader thread is
+# stopped and the iterable is closed.
+def prefetch(iterable, depth):
+  chunks = queue.Queue(depth)
+  stopped = threading.Event()
+  reader_stats = {"waits": 0, "blocked": 0.0, "error": None}
+
+  # Queues an item, waiting for room unless the pipeline is stopped. Returns False if it was stopped.
+  def put(item):
+    try:
+      chunks.put_nowait(item)
+      return True
+    except queue.Full:
+      reader_stats["waits"] += 1
+
+    blocked_since = time.perf_counter()
+    try:
+      while not stopped.is_set():
+        try:
+          chunks.put(item, timeout=STOP_CHECK_INTERVAL)
+          return True
+        except queue.Full:
+          pass
+      return False
+    finally:
+      reader_stats["blocked"] += time.perf_counter() - blocked_since
+
+  def read():
+    iterator = iter(iterable)
+    try:
+      for item in iterator:
+        if not put(item):
+          break
+    except Exception as err:
+      reader_stats["error"] = err
+    finally:
+      if hasattr(iterator, "close"):
+        iterator.close()
+      put(END)
+
+  reader = threading.Thread(target=read, daemon=True)
+  reader.start()
+
+  number_of_chunks = 0
+  consumer_waits = 0
+  try:
+    while True:
+      try:
+        item = chunks.get_nowait()
+      except queue.Empty:
+        consumer_waits += 1
+        item = chunks.get()
+
+      if item is END:
+        break
+
+      number_of_chunks += 1
+      yield item
+
+    if reader_stats["error"] is not None:
+      raise reader_stats["error"]
+  finally:
+    stopped.set()
+    reader.join()
+    metrics.count("pipeline chunks", number_of_chunks)
+    metrics.count("pipeline waits for the reader", consumer_waits)
+    metrics.count("pipeline reader waits", reader_stats["waits"])
+    metrics.count("pipeline reader blocked (ms)", reader_stats["blocked"] * 1000)
@@ -0,0 +1,205 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Helpers shared by the plotting scripts to build the long-format DataFrame handed to seaborn directly in memory, instead of writing the filtered rows to the plotting file and reading that file back with pandas.
+
+  The plotting file given on the commandline is now only a side output written from the DataFrame. Passing "-" as its name skips writing it.
+
+  read_columns is the one reader of the plotting scripts. It picks the back end from the preprocessed path given (a store folder, an SQLite database, a series file or a CSV with its sidecars), and each back end reads only its own format.
+
+  Category columns (PHU names, school boards, age groups) are pandas Categoricals (see category_codes.py). Rows are picked by comparing their integer codes, not their strings.
+
+  decimate is the --decimate stage of the plotting scripts. A multi-year daily series has more points than the plot is pixels wide, and every point is drawn (and written into an SVG) though most of them land on the same pixel columns. Each line is cut down to about one point per pixel of the plot's width before drawing:
+    - "minmax" splits a line into buckets of equal length (2 pixels wide) and keeps the lowest and highest point of each.
+    - "lttb" (Largest-Triangle-Three-Buckets) keeps one point per bucket, the one forming the largest triangle with the point kept before it and the mean of the next bucket.
+  Both always keep each line's first, last, lowest and highest points, so no peak is lost. The points are picked from the mean of each x value, and every row of a kept x value is kept, so seaborn's confidence interval is the same at the points drawn. The plotting file still holds every row.
+
+  draw_lines is the --render=direct path of the plotting scripts. It aggregates the plotting DataFrame once in pandas (the mean of each x value of each line) and draws one matplotlib line per hue level, instead of sns.lineplot, which bootstraps a 95% confidence interval (1000 resamples) at every x value that has several rows. An error band is only drawn when asked for: "sd" (mean +- standard deviation) or "ci" (mean +- 1.96 standard errors, a normal approximation rather than a bootstrap).
+'''
+
+# Packages/Modules #
+import os
+import numpy as np
+import pandas as pd
+import binary_series
+import category_codes
+import date_index
+import metrics
+import partition_store
+import sqlite_store
+
+
+# Constants #
+# Name given as the plotting file to skip writing it
+NO_PLOTTING_FILE = "-"
+
+# Fewest points a line is decimated to, whatever the width of the plot
+MIN_DECIMATED_POINTS = 16
+
+# Standard errors on each side of the mean drawn by the "ci" error band (95% under a normal approximation)
+CI_STANDARD_ERRORS = 1.96
+
+
+# Reads the requested columns (name -> type) of the rows dated within [start_date, end_date] of a preprocessed file, in
+# whichever format it was written. The reader is picked from the path and the file's first bytes:
+#   - a folder                  partition_store.read_columns, opening only the partitions of selected_categories' categories and the months in range
+#   - an SQLite database        sqlite_store.read_columns, querying table_name for the dates and selected_categories
+#   - a series file             binary_series.read_columns, mapping only the records in range
+#   - any other file (CSV)      category_codes.read_columns (decoding a --dictionary file), only over the byte range its date index gives
+#                               if it has one, and through the columnar input cache if cache_dir is given
+# Rows of other dates or categories may still be returned, so the caller filters them.
+# Returns the dictionary of columns and the dictionary of invalid row masks.
+# Raises OSError if the file cannot be read and ValueError if it cannot be read as its format or a column is missing.
+def read_columns(data_file_name, table_name, column_types, start_date, end_date, selected_categories=None, cache_dir=None):
+  if os.path.isdir(data_file_name):
+    return partition_store.read_columns(data_file_name, column_types, start_date, end_date, selected_categories)
+  if sqlite_store.is_database(data_file_name):
+    return sqlite_store.read_columns(data_file_name, table_name, column_types, start_date, end_date, selected_categories)
+  if binary_series.is_series(data_file_name):
+    return binary_series.read_columns(data_file_name, column_types, start_date, end_date)
+
+  return category_codes.read_columns(data_file_name, column_types, cache_dir, date_index.find_byte_range(data_file_name, start_date, end_date))
+
+
+# Returns a boolean mask of the dates (datetime64[D] array) within [start_date, end_date]. NaT dates are never in range.
+def in_date_range(dates, start_date, end_date):
+  dates = np.asarray(dates, dtype="datetime64[D]")
+  return (dates >= np.datetime64(start_date, "D")) & (dates <= np.datetime64(end_date, "D"))
+
+
+# Returns the dates (datetime64[D] array) as "YYYY-MM-DD" strings, the same labels the plotting file used to hold
+def date_labels(dates):
+  return np.datetime_as_string(np.asarray(dates, dtype="datetime64[D]"), unit="D").astype(object)
+
+
+# Returns a boolean mask of the rows of a Categorical whose category is one of names, comparing integer codes
+def category_mask(categorical, names):
+  wanted_codes = categorical.categories.get_indexer(names)
+  return np.isin(categorical.codes, wanted_codes[wanted_codes >= 0])
+
+
+# Returns the selected rows of a Categorical, keeping only the categories left, in the order they first appear.
+# seaborn orders (and colours) the hue of a Categorical by its categories, so this keeps the order a column of strings had.
+def selected_categories(categorical, selected):
+  subset = categorical[selected].remove_unused_categories()
+  first_codes = pd.unique(subset.codes[subset.codes >= 0])
+  return subset.reorder_categories(subset.categories[first_codes])
+
+
+# Writes the plotting DataFrame to the plotting file, unless its name is NO_PLOTTING_FILE.
+# Raises OSError if the file cannot be written.
+def write_plotting_file(frame, plotting_file_name):
+  if plotting_file_name == NO_PLOTTING_FILE:
+    return
+
+  with metrics.stage("write"):
+    frame.to_csv(plotting_file_name, index=False, encoding="utf-8-sig")
+  metrics.add_rows_written(len(frame))
+
+
+# Draws the plotting DataFrame on a matplotlib Axes as sns.lineplot(x=x, y=y, hue=hue) would, without its bootstrap:
+# one line per hue level through the mean y of each x value, with x values placed in the order they first appear.
+# error_band is "none", "sd" or "ci". Returns the Axes.
+def draw_lines(ax, frame, x, y, hue, error_band="none"):
+  x_order = pd.unique(frame[x])
+  ax.xaxis.update_units(x_order)
+
+  # Aggregates once: the mean, standard deviation and number of rows of every (hue level, x value)
+  positions = pd.Index(x_order).get_indexer(frame[x])
+  stats = frame[y].groupby([frame[hue], positions], observed=True).agg(["mean", "std", "count"])
+
+  levels = frame[hue].cat.categories if isinstance(frame[hue].dtype, pd.CategoricalDtype) else pd.unique(frame[hue])
+  for level in levels:
+    if level not in stats.index.get_level_values(0):
+      continue
+
+    line_stats = stats.loc[level]
+    line_x = x_order[line_stats.index.to_numpy()]
+    line, = ax.plot(line_x, line_stats["mean"].to_numpy(), label=level)
+
+    if error_band != "none":
+      spread = line_stats["std"].to_numpy()
+      if error_band == "ci":
+        spread = CI_STANDARD_ERRORS * spread / np.sqrt(line_stats["count"].to_numpy())
+      ax.fill_between(line_x, line_stats["mean"].to_numpy() - spread, line_stats["mean"].to_numpy() + spread, color=line.get_color(), alpha=0.2, linewidth=0)
+
+  ax.set_xlabel(x)
+  ax.set_ylabel(y)
+  if len(levels) > 0:
+    ax.legend(title=hue)
+
+  return ax
+
+
+# Returns the positions of the points of a line kept by min/max bucketing: the first and last points, then the lowest
+# and highest point of each of target_points // 2 buckets of equal length
+def minmax_indices(x, y, target_points):
+  if len(y) <= target_points:
+    return np.arange(len(y))
+
+  edges = np.linspace(0, len(y), target_points // 2 + 1).astype(int)
+  kept = [0, len(y) - 1]
+  for start, end in zip(edges[:-1], edges[1:]):
+    kept += [start + np.argmin(y[start:end]), start + np.argmax(y[start:end])]
+
+  return np.unique(kept)
+
+
+# Returns the positions of the points of a line kept by Largest-Triangle-Three-Buckets: the first and last points, then
+# for each of target_points - 2 buckets the point forming the largest triangle with the point kept before it and the mean
+# of the next bucket. The lowest and highest points are always kept too.
+def lttb_indices(x, y, target_points):
+  if len(y) <= target_points:
+    return np.arange(len(y))
+
+  x = x.astype(float)
+  edges = np.linspace(1, len(y) - 1, target_points - 1).astype(int)
+  kept = [0]
+
+  for bucket in range(target_points - 2):
+    start, end = edges[bucket], edges[bucket + 1]
+    if bucket + 2 < len(edges):
+      next_x, next_y = x[end:edges[bucket + 2]].mean(), y[end:edges[bucket + 2]].mean()
+    else:
+      next_x, next_y = x[-1], y[-1]
+
+    previous = kept[-1]
+    areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous]) - (x[previous] - x[start:end]) * (next_y - y[previous]))
+    kept.append(start + np.argmax(areas))
+
+  kept += [len(y) - 1, np.argmin(y), np.argmax(y)]
+  return np.unique(kept)
+
+
+# Decimation method of each name accepted by "--decimate" (see cli_flags.DECIMATIONS)
+DECIMATORS = {
+  "minmax": minmax_indices,
+  "lttb": lttb_indices,
+}
+
+
+# Returns the rows of the plotting DataFrame left to draw on ax after each hue level's line is decimated with method
+# ("minmax" or "lttb", None keeps every row) to about one point per pixel of the Axes' width.
+# Every x value is registered on the x-axis first (in the order they first appear), so the x values left out keep their place.
+def decimate(ax, frame, x, y, hue, method=None):
+  if method is None:
+    return frame
+
+  with metrics.stage("aggregate"):
+    x_order = pd.unique(frame[x])
+    ax.xaxis.update_units(x_order)
+    target_points = max(int(ax.bbox.width), MIN_DECIMATED_POINTS)
+
+    # Picks the x values of each line from the mean y of each x value, then keeps every row of those x values
+    positions = pd.Index(x_order).get_indexer(frame[x])
+    means = frame[y].groupby([frame[hue], positions], observed=True).mean()
+
+    keep = np.zeros(len(frame), dtype=bool)
+    for level, line_means in means.groupby(level=0, observed=True):
+      line_positions = line_means.index.get_level_values(1).to_numpy()
+      kept = DECIMATORS[method](line_positions, line_means.to_numpy(dtype=float), target_points)
+      keep |= (frame[hue] == level).to_numpy() & np.isin(positions, line_positions[kept])
+
+  metrics.count("rows left out by decimation", len(frame) - np.count_nonzero(keep))
+  return frame[keep]
@@ -0,0 +1,103 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Consolidates a set of dated archive snapshots of the same data file into one series. Each snapshot repeats the records of earlier ones and may revise them, so for every key the total is taken from the latest snapshot that has it (last snapshot wins) rather than added up over the snapshots.
+
+  Snapshots are ordered by file name. The archive names end in the time they were taken (e.g. schoolrecentcovid2021_2022_2022-02-08_22-17.csv), so this is the order they were taken in.
+
+  The snapshots are parsed on a pool of forked worker processes, one whole snapshot at a time, and folded into the latest totals in file name order as they come back. Where fork is not available (Windows), they are parsed one after the other. The latest totals are held in memory, so there is no memory budget or spilling as with group_counts.sum_groups.
+
+Example:
+  file_names = snapshots.find_snapshots(["archive/"])
+  school_cases = snapshots.latest_sums(file_names, SCHOOL_FIELDS, ["collected_date", "school_board"], "total_confirmed_cases", 8)
+'''
+
+# Packages/Modules #
+import os
+import glob
+import itertools
+import collections
+import multiprocessing
+import concurrent.futures
+import pandas as pd
+import csv_ingest
+import group_counts
+import metrics
+
+
+# Returns the snapshot files named by a list of patterns, sorted by file name. Each pattern is a folder (every .csv
+# file in it), a glob pattern such as "archive/schoolrecentcovid*.csv", or a file name.
+# Raises ValueError if no file matches.
+def find_snapshots(patterns):
+  file_names = set()
+
+  for pattern in patterns:
+    if os.path.isdir(pattern):
+      file_names.update(glob.glob(os.path.join(pattern, "*.csv")))
+    else:
+      file_names.update(glob.glob(pattern) or [pattern])
+
+  if not file_names:
+    raise ValueError(f"No snapshot files match {', '.join(patterns)}")
+
+  return sorted(file_names, key=lambda file_name: (os.path.basename(file_name), file_name))
+
+
+# Adds up value_field for every combination of the key_fields of one snapshot (run by the workers).
+# Returns the Series of totals indexed by tuples of strings, and the number of rows read.
+def sum_snapshot(file_name, column_types, key_fields, value_field):
+  columns, _ = csv_ingest.read_columns(file_name, column_types)
+  return group_counts.sum_chunk(columns, key_fields, value_field), len(columns[value_field])
+
+
+# Yields the totals of each snapshot (see sum_snapshot) in file_names order, parsing them on a pool of worker processes if workers > 1.
+# The pool is handed at most one snapshot per worker at a time, so no more than workers snapshots' totals are held at once.
+def iter_snapshot_sums(file_names, column_types, key_fields, value_field, workers=1):
+  if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+    for file_name in file_names:
+      yield sum_snapshot(file_name, column_types, key_fields, value_field)[0]
+    return
+
+  file_names = iter(file_names)
+  running = collections.deque()
+  with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as executor:
+    while True:
+      for file_name in itertools.islice(file_names, workers - len(running)):
+        running.append(executor.submit(sum_snapshot, file_name, column_types, key_fields, value_field))
+      if not running:
+        return
+
+      sums, number_of_rows = running.popleft().result()
+      # The workers' own metrics stay in their processes, so the rows they read are added here
+      metrics.add_rows_read(number_of_rows)
+      yield sums
+
+
+# Adds up value_field for every combination of the key_fields in each snapshot, on a pool of worker processes if workers > 1,
+# and keeps the total of each key from the last snapshot (in file_names order) that has it.
+# The snapshots are folded into the latest totals one at a time, so only those and the snapshots being parsed are held in memory.
+# Returns a group_counts.GroupTable of the consolidated totals.
+# Raises OSError if a snapshot cannot be read and ValueError if a column is missing.
+def latest_sums(file_names, column_types, key_fields, value_field, workers=1):
+  # Checks every snapshot before reading any, so a bad file is reported before the workers start
+  for file_name in file_names:
+    csv_ingest.resolve_columns(csv_ingest.read_header(file_name), list(column_types))
+
+  # Each snapshot comes after the ones folded in so far, so keeping the last of each key keeps the latest total
+  latest = None
+  for sums in iter_snapshot_sums(file_names, column_types, key_fields, value_field, workers):
+    if len(sums) == 0:
+      continue
+
+    combined = sums if latest is None else pd.concat([latest, sums])
+    replaced = combined.index.duplicated(keep="last")
+    metrics.count("records replaced by a later snapshot", replaced.sum())
+    latest = combined[~replaced]
+
+  table = group_counts.GroupTable()
+  if latest is not None:
+    metrics.count("snapshot files", len(file_names))
+    table.add(latest)
+
+  return table
@@ -0,0 +1,147 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  SQLite store of the preprocessed outputs, so one database file can replace the loose preprocessed CSVs and be queried by date and category.
+
+  With --sqlite=<database_file>, a preprocessing script also inserts its output rows into its own table of the database (question1 ... question4), replacing the rows of its last run. The rows are inserted with executemany in a single transaction. A composite index on the date and the category field (e.g. (date, phu_name)) is then built, so the plotting queries are indexed range lookups. Dates are stored as "YYYY-MM-DD" text, which sorts and compares like the dates.
+
+  The database is put in WAL mode, so several plotting processes can read from it at the same time, even while a preprocessing script is writing another table. The sqlite3 module is part of the standard library, so no server or extra package is needed.
+
+  The plotting scripts can be given the database file in place of the preprocessed CSV. They select only the rows within the date range and, where the plot needs only some categories, of those categories. The rows come back in the order they were printed, so the plots are the same as from the CSV.
+
+Example:
+  database = sqlite_store.open_writer(flags.get("sqlite"), "question4", OUTPUT_FIELDS)
+  database.add(date, phu_name, number_of_outbreaks)
+  database.save(flags.get("sqlite"))
+
+  columns, invalid = sqlite_store.read_columns("covid.sqlite", "question4", Q4_FIELDS, start_date, end_date, {"phu_name": ["TORONTO"]})
+'''
+
+# Packages/Modules #
+import os
+import pathlib
+import sqlite3
+import csv_ingest
+import metrics
+
+
+# Constants #
+# First bytes of an SQLite database file
+MAGIC = b"SQLite format 3\x00"
+
+# SQLite column type and Python conversion of each csv_ingest column type
+SQL_TYPES = {
+  csv_ingest.DATE: ("TEXT", str),
+  csv_ingest.INTEGER: ("INTEGER", int),
+  csv_ingest.FLOAT: ("REAL", float),
+  csv_ingest.CATEGORY: ("TEXT", str),
+  csv_ingest.STRING: ("TEXT", str),
+}
+
+
+# Returns a name quoted for use as an SQL identifier
+def quote(name):
+  return '"' + name.replace('"', '""') + '"'
+
+
+# Collects the output rows of a preprocessing script and inserts them into its table at the end
+class TableWriter:
+
+  def __init__(self, table_name, column_types):
+    self.table_name = table_name
+    self.fields = list(column_types.items())
+    self.converters = [SQL_TYPES[column_type][1] for _, column_type in self.fields]
+    self.rows = []
+
+  # Adds one row, given its values in the order of the fields
+  def add(self, *row):
+    self.rows.append(tuple(convert(value) for convert, value in zip(self.converters, row)))
+
+  # Replaces the table's rows with the collected ones in a single transaction, then indexes the table by date and category.
+  # Raises OSError if the database cannot be written.
+  def save(self, database_file_name):
+    table = quote(self.table_name)
+    date_fields = [name for name, column_type in self.fields if column_type == csv_ingest.DATE]
+    category_fields = [name for name, column_type in self.fields if column_type == csv_ingest.CATEGORY]
+
+    try:
+      connection = sqlite3.connect(database_file_name)
+      try:
+        connection.execute("PRAGMA journal_mode=WAL")
+        with connection:
+          connection.execute(f"DROP TABLE IF EXISTS {table}")
+          connection.execute(f"CREATE TABLE {table} ({', '.join(quote(name) + ' ' + SQL_TYPES[column_type][0] for name, column_type in self.fields)})")
+          connection.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' for _ in self.fields)})", self.rows)
+          connection.execute(f"CREATE INDEX {quote(self.table_name + '_by_' + '_'.join(date_fields + category_fields))} "
+                             f"ON {table} ({', '.join(quote(name) for name in date_fields + category_fields)})")
+      finally:
+        connection.close()
+    except sqlite3.Error as err:
+      raise OSError(f"Unable to write table '{self.table_name}' of '{database_file_name}' ({err})")
+
+
+# Stands in for a TableWriter when no database is requested
+class NoDatabase:
+
+  def add(self, *row):
+    pass
+
+  def save(self, database_file_name):
+    pass
+
+
+# Returns the writer for the value of the "--sqlite" flag, the name of the script's table and the fields (name -> type) of
+# the output rows: None returns a NoDatabase, True (no file name given) raises a ValueError
+def open_writer(database_file_name, table_name, column_types):
+  if database_file_name is None:
+    return NoDatabase()
+  if database_file_name is True:
+    raise ValueError("--sqlite needs the database file name, e.g. --sqlite=covid.sqlite")
+
+  return TableWriter(table_name, column_types)
+
+
+# Returns True if a file is an SQLite database
+def is_database(file_name):
+  if os.path.isdir(file_name):
+    return False
+
+  with open(file_name, "rb") as data_file:
+    return data_file.read(len(MAGIC)) == MAGIC
+
+
+# Reads the requested columns (name -> type) of the rows dated within [start_date, end_date] of the table_name table of an
+# SQLite database, keeping only the rows whose category is in selected_categories (field name -> category names) for the
+# fields it lists. The query uses the table's date and category index. Other formats are read by plot_data.read_columns.
+# Returns the dictionary of columns and the dictionary of invalid row masks.
+# Raises OSError if a file cannot be read and ValueError if the table or a column is missing.
+def read_columns(data_file_name, table_name, column_types, start_date, end_date, selected_categories=None):
+  selected_categories = selected_categories or {}
+  date_fields = [name for name, column_type in column_types.items() if column_type == csv_ingest.DATE]
+
+  conditions = [f"{quote(name)} BETWEEN ? AND ?" for name in date_fields[:1]]
+  parameters = [str(start_date), str(end_date)] if date_fields else []
+  for name, names in selected_categories.items():
+    conditions.append(f"{quote(name)} IN ({', '.join('?' for _ in names)})")
+    parameters += list(names)
+
+  query = f"SELECT {', '.join(quote(name) for name in column_types)} FROM {quote(table_name)}"
+  if conditions:
+    query += " WHERE " + " AND ".join(conditions)
+  query += " ORDER BY rowid"
+
+  with metrics.stage("parse"):
+    try:
+      connection = sqlite3.connect(pathlib.Path(data_file_name).resolve().as_uri() + "?mode=ro", uri=True)
+      try:
+        rows = connection.execute(query, parameters).fetchall()
+      finally:
+        connection.close()
+    except sqlite3.Error as err:
+      raise ValueError(f"Unable to query table '{table_name}' of '{data_file_name}' ({err})")
+
+    raw_columns = {name: [row[position] for row in rows] for position, name in enumerate(column_types)}
+
+  columns, invalid = csv_ingest.convert_chunk(raw_columns, column_types)
+  return columns, invalid
@@ -0,0 +1,90 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Watermarks for incremental preprocessing of daily-appended input files. A state file (JSON) remembers, for every input, the byte offset up to which the file has already been processed, along with whatever aggregate state the script still needs (for example an output group that is not finished yet). The next run reads only the bytes appended after the offset and its output is appended to the existing preprocessed file.
+
+  Each watermark holds:
+    - offset        byte offset just after the last complete line that was processed
+    - tail_sha256   SHA-256 of the TAIL_HASH_BYTES bytes before the offset, to detect a file that was rewritten rather than appended to
+
+  Only complete lines are processed, so a file caught in the middle of being appended to is picked up from the start of its last line next time.
+
+  Compressed files (see compressed.py) have no byte offsets to resume from, so they cannot be processed incrementally.
+'''
+
+# Packages/Modules #
+import os
+import json
+import hashlib
+import tempfile
+import compressed
+
+
+# Constants #
+# Number of bytes before the watermark that are hashed to check the file was only appended to
+TAIL_HASH_BYTES = 4096
+
+# Number of bytes read at a time when searching backwards for the last complete line
+LINE_SEARCH_BLOCK_SIZE = 1 << 16
+
+
+# Loads the state file. Returns None if it does not exist yet (the first incremental run).
+def load_state(state_file_name):
+  try:
+    with open(state_file_name) as state_file:
+      return json.load(state_file)
+  except FileNotFoundError:
+    return None
+
+
+# Saves the state file, replacing it in one step so an interrupted run never leaves half a state file
+def save_state(state_file_name, state):
+  state_dir = os.path.dirname(os.path.abspath(state_file_name))
+  temp_fd, temp_path = tempfile.mkstemp(dir=state_dir, suffix=".tmp")
+
+  with os.fdopen(temp_fd, "w") as temp_file:
+    json.dump(state, temp_file, indent=1)
+
+  os.replace(temp_path, state_file_name)
+
+
+# Returns the SHA-256 of the TAIL_HASH_BYTES bytes of an open binary file before the offset
+def tail_digest(data_file, offset):
+  start = max(offset - TAIL_HASH_BYTES, 0)
+  data_file.seek(start)
+  return hashlib.sha256(data_file.read(offset - start)).hexdigest()
+
+
+# Returns the (start, end) byte range of the complete lines appended to a file since its watermark,
+# and the new watermark to store once that range has been processed.
+# A watermark of None means the file has not been processed yet (the range then starts at 0).
+# Raises a ValueError if the file is compressed, or was truncated or rewritten since the watermark was stored.
+def appended_range(file_name, file_watermark):
+  start = 0 if file_watermark is None else file_watermark["offset"]
+
+  if compressed.compression(file_name) is not None:
+    raise ValueError(f"'{file_name}' is compressed, decompress it to process it incrementally")
+
+  with open(file_name, "rb") as data_file:
+    size = os.fstat(data_file.fileno()).st_size
+
+    if size < start or (file_watermark is not None and tail_digest(data_file, start) != file_watermark["tail_sha256"]):
+      raise ValueError(f"'{file_name}' was rewritten since the last incremental run, rebuild the output without --incremental")
+
+    # Stops after the last complete line, searching backwards from the end of the file
+    end = start
+    block_end = size
+    while block_end > start:
+      block_start = max(block_end - LINE_SEARCH_BLOCK_SIZE, start)
+      data_file.seek(block_start)
+      newline_position = data_file.read(block_end - block_start).rfind(b"\n")
+
+      if newline_position >= 0:
+        end = block_start + newline_position + 1
+        break
+      block_end = block_start
+
+    new_watermark = {"offset": end, "tail_sha256": tail_digest(data_file, end)}
+
+  return (start, end), new_watermark
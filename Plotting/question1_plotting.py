@@ -3,7 +3,7 @@ Authors: Roman Blotsky (1168123), Mehtab Kaur (1054984), Kirisan Suthanthireswar
 Last Updated: (15-03-2022)
 
 Functionality:
-  This file will take a number of command line arguments including a data file, an output file, and a timeframe to plot. It will take the data between the given timeframe from the data file, write it to the output file, and then create a plot from that file using imported libraries. The output is written to standard output unless redirected to a file (recommended to redirect to a PDF)
+  This file will take a number of command line arguments including a data file, an output file, and a timeframe to plot. It will take the data between the given timeframe from the data file, write it to the output file (skipped if the output file is "-"), and create a plot from that data in memory using imported libraries. The output is written to standard output unless redirected to a file (recommended to redirect to a PDF)
 
   There are 8 commandline arguments and 1 optional argument: 
     - q1_processed_file (string)
@@ -17,29 +17,170 @@ Functionality:
     - graphics_file (string)
     - debugOn (integer, optional)
 
+  Optional flags (may be placed anywhere after the script name):
+    - --cache[=cache_dir]  Reads the preprocessed file through the columnar input cache (default folder: .cache/inputs). Unchanged files skip CSV parsing.
+    - --figure-cache[=cache_dir]  Copies the figure (and plotting file) from the rendered-figure cache (default folder: .cache/figures) when it was already drawn from the same preprocessed data, arguments and library versions, otherwise draws it and stores a copy (see Common/figure_cache.py).
+    - --decimate[=minmax|lttb]  Draws each line with about one point per pixel of the plot's width, picked by min/max bucketing (default) or Largest-Triangle-Three-Buckets, always keeping its peaks. Speeds up long-range plots and keeps their SVGs small. The plotting file still holds every row (see Common/plot_data.py).
+    - --render=seaborn|direct  How the lines are drawn: sns.lineplot (default), or directly with matplotlib from means computed once in pandas, skipping seaborn's bootstrapped confidence intervals (see Common/plot_data.py).
+    - --error-band=none|sd|ci  With --render=direct, the error band drawn around each line (default: none).
+    - --batch=job_file  Renders every figure listed in a JSON or CSV job file (date range, graphics file and optional plotting file of each) from one read of q1_processed_file, which is then the only argument (see Common/batch_plots.py).
+    - --workers[=N]  With --batch, renders the figures on N worker processes (default: every CPU).
+    - --profile[=profile_file], --metrics-json=file  Reports the time spent in each stage, rows per second, rejected rows and peak memory (see Common/metrics.py).
+    - --time-startup  Prints to stderr on exit how long the script ran before importing numpy, pandas, seaborn and matplotlib, and how long each import took. These are only imported once the arguments are checked, and only if used (see Common/lazy_imports.py). Figures are drawn with the non-interactive Agg backend.
+    - The preprocessed file is read through its sidecar date index (<q1_processed_file>.dateidx) when one exists, so only the rows within the date range are parsed.
+    - The preprocessed file may also be the binary series file written by the preprocessing script with --binary. Its records are memory-mapped, and only those within the date range are loaded.
+    - It may also be the store folder written with --partitions, of which only the partitions of the plotted months are read.
+    - Or it may be the SQLite database written with --sqlite, from whose question1 table only the rows to plot are selected.
+
 To run on commandline:
 python Plotting/question1_plotting.py question1_preprocessed.csv question1_plotted_data.csv 2020 8 10 2022 3 10 plot1.pdf
+python Plotting/question1_plotting.py question1_preprocessed.csv --batch=question1_jobs.csv --workers
 '''
 
 # Packages/Modules #
+import os
 import sys
-import csv
 import datetime
-import pandas as pd
-import seaborn as sns
-from matplotlib import pyplot as plt
-from matplotlib import ticker as ticktools
+
+# Shared modules live in the Common folder beside this one
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+import cli_flags
+import column_types
+import lazy_imports
+import metrics
+
+# numpy, pandas, seaborn, matplotlib and the shared modules that use them are imported the first time
+# they are used, once the arguments are checked (see Common/lazy_imports.py). pyplot uses the Agg backend.
+np = lazy_imports.lazy_module("numpy")
+pd = lazy_imports.lazy_module("pandas")
+sns = lazy_imports.lazy_module("seaborn")
+plt = lazy_imports.lazy_module("matplotlib.pyplot")
+ticktools = lazy_imports.lazy_module("matplotlib.ticker")
+
+batch_plots = lazy_imports.lazy_module("batch_plots")
+figure_cache = lazy_imports.lazy_module("figure_cache")
+plot_data = lazy_imports.lazy_module("plot_data")
 
 
 # CONSTANTS #
 NUM_X_TICKS = 5
 
+# Fields read from the preprocessed file (header name -> type)
+Q1_FIELDS = {
+  "date": column_types.DATE,
+  "icu_percent_unvac": column_types.FLOAT,
+  "icu_percent_partial_vac": column_types.FLOAT,
+  "icu_percent_full_vac": column_types.FLOAT,
+}
+
+# Vaccination status plotted for each percentage field, in plotting order
+VACCINATION_STATUSES = {
+  "icu_percent_unvac": "Unvaccinated",
+  "icu_percent_partial_vac": "Partially Vaccinated",
+  "icu_percent_full_vac": "Fully Vaccinated",
+}
+
+# Builds the long-format plotting data of the rows within the date range, one row per date and vaccination status
+def plot_frame(q1_columns, start_date, end_date):
+  with metrics.stage("aggregate"):
+    in_range = plot_data.in_date_range(q1_columns["date"], start_date, end_date)
+    dates = plot_data.date_labels(q1_columns["date"][in_range])
+
+    return pd.DataFrame({
+      "Date": np.repeat(dates, len(VACCINATION_STATUSES)),
+      "% of Population in ICU": np.column_stack([q1_columns[field][in_range] for field in VACCINATION_STATUSES]).ravel(),
+      "Vaccination Status": np.tile(list(VACCINATION_STATUSES.values()), len(dates)),
+    })
+
+# Returns the plot parameters the figure cache keys a figure by (see Common/figure_cache.py)
+def plot_parameters(start_date, end_date, renderer, error_band, decimation):
+  return {"start_date": start_date, "end_date": end_date, "categories": [], "render": renderer, "error_band": error_band, "decimate": decimation}
+
+# Draws the plotting data on ax and returns the Axes drawn on
+def draw_plot(ax, q1_plotter, renderer, error_band, decimation):
+
+  # Draws only about one point per pixel of the plot's width if --decimate was given (see Common/plot_data.py)
+  q1_plotter = plot_data.decimate(ax, q1_plotter, "Date", "% of Population in ICU", "Vaccination Status", decimation)
+
+  # Creates a lineplot using seaborn 
+  # (Each name here must have the same name as its column in the DataFrame)
+  if renderer == "direct":
+    ax = plot_data.draw_lines(ax, q1_plotter, "Date", "% of Population in ICU", "Vaccination Status", error_band)
+  else:
+    ax = sns.lineplot(x = "Date", y = "% of Population in ICU", hue="Vaccination Status", data=q1_plotter, ax=ax)
+
+  # Set the max number of axis labels to NUM_X_TICKS, to avoid having ticks for each date
+  ax.xaxis.set_major_locator(ticktools.MaxNLocator(NUM_X_TICKS))
+
+  # Rotate the ticks on the x-axis to 45 degrees
+  plt.xticks(rotation = 45, ha = 'right')
+
+  return ax
+
+# Renders every figure of the job file given with --batch, reading the preprocessed file once
+def run_batch(q1_processed_file, flags, cache_dir, renderer, error_band, decimation):
+  try:
+    jobs = batch_plots.read_jobs(flags["batch"], False)
+    workers = cli_flags.workers(flags)
+    figure_cache_dir = cli_flags.figure_cache_dir(flags)
+  except (IOError, ValueError) as err:
+    print(f"Could not read the job file from --batch: {err}", file=sys.stderr)
+    sys.exit(1)
+
+  # Reads the rows of every job's dates at once
+  start_date, end_date = batch_plots.date_span(jobs)
+  try:
+    q1_columns, q1_invalid = plot_data.read_columns(q1_processed_file, "question1", Q1_FIELDS, start_date, end_date, cache_dir=cache_dir)
+  except (IOError, ValueError):
+    print(f"Could not open \"q1_preprocessed_file\" from arguments: {q1_processed_file} is an invalid file path!", file=sys.stderr)
+    sys.exit(1)
+
+  metrics.reject("could not convert the date", np.count_nonzero(q1_invalid["date"]))
+
+  # Writes the plotting data and draws the figure of one job, unless the figure cache already holds it
+  def render_job(ax, job):
+    figures = figure_cache.open_cache(figure_cache_dir, __file__, q1_processed_file, plot_parameters(job["start_date"], job["end_date"], renderer, error_band, decimation), job["graphics_file"])
+    if figures.restore(job["graphics_file"], job["plotting_file"]):
+      return
+
+    q1_plotter = plot_frame(q1_columns, job["start_date"], job["end_date"])
+    plot_data.write_plotting_file(q1_plotter, job["plotting_file"])
+
+    with metrics.stage("render"):
+      draw_plot(ax, q1_plotter, renderer, error_band, decimation)
+      ax.figure.savefig(job["graphics_file"], bbox_inches="tight")
+
+    figures.store(job["graphics_file"], job["plotting_file"])
+
+  return batch_plots.run_jobs(jobs, render_job, None, workers)
+
 # MAIN FUNCTION #
 def main(argv):
 
-  # Ensures a valid amount of commandline arguments passed
-  if len(argv) < 10:
-    print("Usage: question1_plotting.py <q1_preprocessed_file>  <q1_plotting_file> <start_year> <start_month> <start_day> <end_year> <end_month> <end_day> <graphics_file> <debugOn (optional)>")
+  # Separates the optional "--flag" arguments from the positional ones
+  argv, flags = cli_flags.split_flags(argv)
+  metrics.start(flags)
+  lazy_imports.time_startup(flags)
+  cache_dir = cli_flags.cache_dir(flags)
+
+  # Picks how the lines are drawn and decimated (see Common/plot_data.py)
+  try:
+    renderer, error_band = cli_flags.render_options(flags)
+    decimation = cli_flags.decimation(flags)
+  except ValueError as err:
+    print(err, file=sys.stderr)
+    sys.exit(1)
+
+  # In batch mode, renders the figures of the job file instead of the one given by the arguments
+  if isinstance(flags.get("batch"), str) and len(argv) >= 2:
+    failures = run_batch(argv[1], flags, cache_dir, renderer, error_band, decimation)
+    metrics.finish(flags)
+    sys.exit(1 if failures > 0 else 0)
+
+  # Ensures a valid amount of commandline arguments passed (a --batch without a job file is a usage error too)
+  if len(argv) < 10 or "batch" in flags:
+    print("Usage: question1_plotting.py <q1_preprocessed_file>  <q1_plotting_file> <start_year> <start_month> <start_day> <end_year> <end_month> <end_day> <graphics_file> <debugOn (optional)> <--batch=job_file (optional, replaces the arguments after q1_preprocessed_file)> <--workers[=N] (optional)> <--cache[=cache_dir] (optional)> <--figure-cache[=cache_dir] (optional)> <--render=seaborn|direct (optional)> <--error-band=none|sd|ci (optional)> <--decimate[=minmax|lttb] (optional)> <--profile[=profile_file] (optional)> <--metrics-json=file (optional)> <--time-startup (optional)>", file=sys.stderr)
+    sys.exit(1)
 
   # Stores all the arguments
   try:
@@ -54,18 +195,6 @@ def main(argv):
     print(f"Invalid input given for end date! Must be integers, received: {argv[6]} {argv[7]} {argv[8]}", file=sys.stderr)
     sys.exit(1)
 
-  try:
-    q1_preprocessed_file = open(argv[1], encoding="utf-8-sig");
-  except IOError:
-    print(f"Could not open \"q1_preprocessed_file\" from arguments: {argv[1]} is an invalid file path!", file=sys.stderr)
-    sys.exit(1)
-
-  try:
-    q1_plotting_file = open(argv[2],"w",encoding="utf-8-sig")
-  except IOError:
-    print(f"Could not create \"q1_plotting_file\" from arguments: {argv[2]} is invalid or cannot be overwritten!", file=sys.stderr)
-    sys.exit(1)
-
   graphics_filename = argv[9]
 
   # Stores optional debugOn argument.
@@ -74,81 +203,52 @@ def main(argv):
     debugOn = bool(int(argv[10]) > 0)
   except:
     debugOn = False
+
+  # Copies the figure from the figure cache if it was already drawn from the same data and arguments
+  figures = figure_cache.open_cache(cli_flags.figure_cache_dir(flags), __file__, argv[1], plot_parameters(start_date, end_date, renderer, error_band, decimation), graphics_filename)
+  if figures.restore(graphics_filename, argv[2]):
+    metrics.finish(flags, debugOn)
+    return
+
+  try:
+    q1_columns, q1_invalid = plot_data.read_columns(argv[1], "question1", Q1_FIELDS, start_date, end_date, cache_dir=cache_dir)
+  except (IOError, ValueError):
+    print(f"Could not open \"q1_preprocessed_file\" from arguments: {argv[1]} is an invalid file path!", file=sys.stderr)
+    sys.exit(1)
   
-  # Stores current row index
-  current_row_index = 0
-  
-  # Creates a CSV reader from q1 preprocessed file
-  q1_reader = csv.reader(q1_preprocessed_file)
-
-  # Writes column headers
-  q1_plotting_file.write("Date,% of Population in ICU,Vaccination Status\n")
-
-  # Loops through all rows in q1_preprocessed_file
-  for row_data in q1_reader:
-
-    # Ignores first row
-    if row_data[0] == "date":
-      current_row_index += 1
-      continue
-
-    # Ensures there are at least 4 columns, terminates if not.
-    if len(row_data) < 4:
-      print(f"Row {current_row_index} has too few columns! Needs: 4, Has: {len(row_data)}", file=sys.stderr)
-      sys.exit(1)
-    
-    # Takes data from the file
-    try:
-      date = datetime.date.fromisoformat(row_data[0])
-    except ValueError:
-      print(f"Could not convert \"{row_data[0]}\" to a date on row {current_row_index}", file=sys.stderr)
-      date=datetime.date.min
-
-    unvac_percent = row_data[1]
-    partial_vac_percent = row_data[2]
-    full_vac_percent = row_data[3]
-
-    # If the date is within range, prints it to the new plotting data file
-    if date >= start_date and date <= end_date:
-      q1_plotting_file.write(f"{date},{unvac_percent},Unvaccinated\n")
-      q1_plotting_file.write(f"{date},{partial_vac_percent},Partially Vaccinated\n")
-      q1_plotting_file.write(f"{date},{full_vac_percent},Fully Vaccinated\n")
-
-  # Closes file
-  q1_plotting_file.close()
-  
-  # Starts plotting #
-  # Creates CSV reader for the plotting file
+  # Counts the rows whose date could not be converted, they are never within the date range
+  metrics.reject("could not convert the date", np.count_nonzero(q1_invalid["date"]))
+
+  # Keeps the rows within the date range
+  q1_plotter = plot_frame(q1_columns, start_date, end_date)
+
+  # Writes the plotting data to q1_plotting_file as a side output
   try:
-    q1_plotter = pd.read_csv(argv[2])
-  except IOError as err:
-    print("Unable to open generated CSV file", argv[2],
-      ": {}".format(err), file=sys.stderr)
-    sys.exit(-1)
+    plot_data.write_plotting_file(q1_plotter, argv[2])
+  except IOError:
+    print(f"Could not create \"q1_plotting_file\" from arguments: {argv[2]} is invalid or cannot be overwritten!", file=sys.stderr)
+    sys.exit(1)
 
   # If debugging, prints out the file frame (all data in the file nicely formatted)
   if debugOn:
     print(q1_plotter)
 
   # Generate a figure for the seaborn library to draw in.
-  fig = plt.figure()
+  with metrics.stage("render"):
+    fig = plt.figure()
+    draw_plot(fig.gca(), q1_plotter, renderer, error_band, decimation)
 
-  # Creates a lineplot using seaborn 
-  # (Each name here must have the same name as its column in the CSV file)
-  ax = sns.lineplot(x = "Date", y = "% of Population in ICU", hue="Vaccination Status", data=q1_plotter)
-
-  # Set the max number of axis labels to NUM_X_TICKS, to avoid having ticks for each date
-  ax.xaxis.set_major_locator(ticktools.MaxNLocator(NUM_X_TICKS))
+    # Saves the fig to a file
+    fig.savefig(graphics_filename, bbox_inches="tight")
 
-  # Rotate the ticks on the x-axis to 45 degrees
-  plt.xticks(rotation = 45, ha = 'right')
-
-  # Saves the fig to a file
-  fig.savefig(graphics_filename, bbox_inches="tight")
+  # Keeps a copy for later runs with the same data and arguments
+  figures.store(graphics_filename, argv[2])
 
   # Uncomment this line to show the figure on the screen.
   # (May need to use [CTR+C] to close the display after)
   #plt.show()
+
+  metrics.finish(flags, debugOn)
   
   #
   # END OF MAIN
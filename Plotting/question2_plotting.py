@@ -3,7 +3,7 @@ Authors: Roman Blotsky (1168123), Mehtab Kaur (1054984), Kirisan Suthanthireswar
 Last Updated: (15-03-2022)
 
 Functionality:
-  This file will take a number of command line arguments including a data file, an output file, and a timeframe and school board to plot. It will take the data between the given timeframe from the data file, write it to the output file, and then create a plot from that file using imported libraries. The output is written to standard output unless redirected to a file (recommended to redirect to a PDF)
+  This file will take a number of command line arguments including a data file, an output file, and a timeframe and school board to plot. It will take the data between the given timeframe from the data file, write it to the output file (skipped if the output file is "-"), and create a plot from that data in memory using imported libraries. The output is written to standard output unless redirected to a file (recommended to redirect to a PDF)
 
   There are 10 commandline arguments and 1 optional argument: 
     - q2_processed_file (string)
@@ -18,29 +18,162 @@ Functionality:
     - graphics_filename (string)
     - debugOn (integer, optional)
 
+  Optional flags (may be placed anywhere after the script name):
+    - --cache[=cache_dir]  Reads the preprocessed file through the columnar input cache (default folder: .cache/inputs). Unchanged files skip CSV parsing.
+    - --figure-cache[=cache_dir]  Copies the figure (and plotting file) from the rendered-figure cache (default folder: .cache/figures) when it was already drawn from the same preprocessed data, arguments and library versions, otherwise draws it and stores a copy (see Common/figure_cache.py).
+    - --decimate[=minmax|lttb]  Draws each line with about one point per pixel of the plot's width, picked by min/max bucketing (default) or Largest-Triangle-Three-Buckets, always keeping its peaks. Speeds up long-range plots and keeps their SVGs small. The plotting file still holds every row (see Common/plot_data.py).
+    - --render=seaborn|direct  How the lines are drawn: sns.lineplot (default), or directly with matplotlib from means computed once in pandas, skipping seaborn's bootstrapped confidence intervals (see Common/plot_data.py).
+    - --error-band=none|sd|ci  With --render=direct, the error band drawn around each line (default: none).
+    - --batch=job_file  Renders every figure listed in a JSON or CSV job file (date range, school board, graphics file and optional plotting file of each) from one read of q2_processed_file, which is then the only argument (see Common/batch_plots.py).
+    - --workers[=N]  With --batch, renders the figures on N worker processes (default: every CPU).
+    - --profile[=profile_file], --metrics-json=file  Reports the time spent in each stage, rows per second, rejected rows and peak memory (see Common/metrics.py).
+    - --time-startup  Prints to stderr on exit how long the script ran before importing numpy, pandas, seaborn and matplotlib, and how long each import took. These are only imported once the arguments are checked, and only if used (see Common/lazy_imports.py). Figures are drawn with the non-interactive Agg backend.
+    - The preprocessed file is read through its sidecar date index (<q2_processed_file>.dateidx) when one exists, so only the rows within the date range are parsed.
+    - The preprocessed file may also be the binary series file written by the preprocessing script with --binary. Its records are memory-mapped, and only those within the date range are loaded.
+    - It may also be the store folder written with --partitions, of which only the partitions of the plotted school board and months are read.
+    - Or it may be the SQLite database written with --sqlite, from whose question2 table only the rows to plot are selected.
+
 To run on commandline:
 python Plotting/question2_plotting.py question2_preprocessed.csv question2_plotted_data.csv 2020 8 10 2022 3 10 'Peel District School Board' plot2.pdf
+python Plotting/question2_plotting.py question2_preprocessed.csv --batch=question2_jobs.json --workers
 '''
 
 # Packages/Modules #
+import os
 import sys
-import csv
 import datetime
-import pandas as pd
+
+# Shared modules live in the Common folder beside this one
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+import cli_flags
+import column_types
+import lazy_imports
+import metrics
+
+# numpy, pandas, seaborn, matplotlib and the shared modules that use them are imported the first time
+# they are used, once the arguments are checked (see Common/lazy_imports.py). pyplot uses the Agg backend.
+np = lazy_imports.lazy_module("numpy")
+pd = lazy_imports.lazy_module("pandas")
 
 # seaborn and matplotlib are for plotting.  The matplotlib
 # library is the actual graphics library, and seaborn provides
 # a nice interface to produce plots more easily.
-import seaborn as sns
-from matplotlib import pyplot as plt
-from matplotlib import ticker as ticktools
+sns = lazy_imports.lazy_module("seaborn")
+plt = lazy_imports.lazy_module("matplotlib.pyplot")
+ticktools = lazy_imports.lazy_module("matplotlib.ticker")
+
+batch_plots = lazy_imports.lazy_module("batch_plots")
+figure_cache = lazy_imports.lazy_module("figure_cache")
+plot_data = lazy_imports.lazy_module("plot_data")
+
+# CONSTANTS #
+# Fields read from the preprocessed file (header name -> type)
+Q2_FIELDS = {
+  "collected_date": column_types.DATE,
+  "school_board": column_types.CATEGORY,
+  "total_confirmed_cases": column_types.INTEGER,
+}
+
+# Builds the plotting data of the rows of the school boards within the date range
+def plot_frame(q2_columns, start_date, end_date, school_boards):
+  with metrics.stage("aggregate"):
+    selected = plot_data.in_date_range(q2_columns["collected_date"], start_date, end_date) & plot_data.category_mask(q2_columns["school_board"], school_boards)
+
+    return pd.DataFrame({
+      "Date": plot_data.date_labels(q2_columns["collected_date"][selected]),
+      "School Board": plot_data.selected_categories(q2_columns["school_board"], selected),
+      "Confirmed School Cases": q2_columns["total_confirmed_cases"][selected],
+    })
+
+# Returns the plot parameters the figure cache keys a figure by (see Common/figure_cache.py)
+def plot_parameters(start_date, end_date, school_boards, renderer, error_band, decimation):
+  return {"start_date": start_date, "end_date": end_date, "categories": school_boards, "render": renderer, "error_band": error_band, "decimate": decimation}
+
+# Draws the plotting data on ax and returns the Axes drawn on
+def draw_plot(ax, q2_plot, renderer, error_band, decimation):
+
+  # Draws only about one point per pixel of the plot's width if --decimate was given (see Common/plot_data.py)
+  q2_plot = plot_data.decimate(ax, q2_plot, "Date", "Confirmed School Cases", "School Board", decimation)
+
+  # Creates lineplot using seaborn
+  # Refer to column heading names in the DataFrame
+  if renderer == "direct":
+    ax = plot_data.draw_lines(ax, q2_plot, "Date", "Confirmed School Cases", "School Board", error_band)
+  else:
+    ax = sns.lineplot(x = "Date", y = "Confirmed School Cases", hue = "School Board", data = q2_plot, ax = ax)
+
+  # Max number of ticks are 5
+  ax.xaxis.set_major_locator(ticktools.MaxNLocator(6))
+
+  # Rotate the ticks on the x-axis to 45 degrees
+  plt.xticks(rotation = 45, ha = 'right')
+
+  return ax
+
+# Renders every figure of the job file given with --batch, reading the preprocessed file once
+def run_batch(q2_processed_file, flags, cache_dir, renderer, error_band, decimation):
+  try:
+    jobs = batch_plots.read_jobs(flags["batch"], True)
+    workers = cli_flags.workers(flags)
+    figure_cache_dir = cli_flags.figure_cache_dir(flags)
+  except (IOError, ValueError) as err:
+    print(f"Could not read the job file from --batch: {err}", file=sys.stderr)
+    sys.exit(1)
+
+  # Reads the rows of every job's dates and school boards at once
+  start_date, end_date = batch_plots.date_span(jobs)
+  try:
+    q2_columns, q2_invalid = plot_data.read_columns(q2_processed_file, "question2", Q2_FIELDS, start_date, end_date, {"school_board": batch_plots.all_categories(jobs)}, cache_dir)
+  except (IOError, ValueError):
+    print(f"Could not open \"q2_preprocessed_file\" from arguments: {q2_processed_file} is an invalid file path!", file=sys.stderr)
+    sys.exit(1)
+
+  metrics.reject("could not convert collected date", np.count_nonzero(q2_invalid["collected_date"]))
+
+  # Writes the plotting data and draws the figure of one job, unless the figure cache already holds it
+  def render_job(ax, job):
+    figures = figure_cache.open_cache(figure_cache_dir, __file__, q2_processed_file, plot_parameters(job["start_date"], job["end_date"], job["categories"], renderer, error_band, decimation), job["graphics_file"])
+    if figures.restore(job["graphics_file"], job["plotting_file"]):
+      return
+
+    q2_plot = plot_frame(q2_columns, job["start_date"], job["end_date"], job["categories"])
+    plot_data.write_plotting_file(q2_plot, job["plotting_file"])
+
+    with metrics.stage("render"):
+      draw_plot(ax, q2_plot, renderer, error_band, decimation)
+      ax.figure.savefig(job["graphics_file"], bbox_inches="tight")
+
+    figures.store(job["graphics_file"], job["plotting_file"])
+
+  return batch_plots.run_jobs(jobs, render_job, None, workers)
 
 # MAIN FUNCTION #
 def main(argv):
 
-  # Ensures a valid amount of commandline arguments passed
-  if len(argv) < 11:
-    print("Usage: question2_plotting.py <q2_preprocessed_file> <q2_plotting_file> <start_year> <start_month> <start_day> <end_year> <end_month> <end_day> <school_board> <graphics_filename> <debugOn (optional)>")
+  # Separates the optional "--flag" arguments from the positional ones
+  argv, flags = cli_flags.split_flags(argv)
+  metrics.start(flags)
+  lazy_imports.time_startup(flags)
+  cache_dir = cli_flags.cache_dir(flags)
+
+  # Picks how the lines are drawn and decimated (see Common/plot_data.py)
+  try:
+    renderer, error_band = cli_flags.render_options(flags)
+    decimation = cli_flags.decimation(flags)
+  except ValueError as err:
+    print(err, file=sys.stderr)
+    sys.exit(1)
+
+  # In batch mode, renders the figures of the job file instead of the one given by the arguments
+  if isinstance(flags.get("batch"), str) and len(argv) >= 2:
+    failures = run_batch(argv[1], flags, cache_dir, renderer, error_band, decimation)
+    metrics.finish(flags)
+    sys.exit(1 if failures > 0 else 0)
+
+  # Ensures a valid amount of commandline arguments passed (a --batch without a job file is a usage error too)
+  if len(argv) < 11 or "batch" in flags:
+    print("Usage: question2_plotting.py <q2_preprocessed_file> <q2_plotting_file> <start_year> <start_month> <start_day> <end_year> <end_month> <end_day> <school_board> <graphics_filename> <debugOn (optional)> <--batch=job_file (optional, replaces the arguments after q2_preprocessed_file)> <--workers[=N] (optional)> <--cache[=cache_dir] (optional)> <--figure-cache[=cache_dir] (optional)> <--render=seaborn|direct (optional)> <--error-band=none|sd|ci (optional)> <--decimate[=minmax|lttb] (optional)> <--profile[=profile_file] (optional)> <--metrics-json=file (optional)> <--time-startup (optional)>", file=sys.stderr)
+    sys.exit(1)
 
   # Stores all the arguments
   
@@ -56,20 +189,6 @@ def main(argv):
     print(f"Invalid input given for end date! Must be integers, received: {argv[6]} {argv[7]} {argv[8]}", file=sys.stderr)
     sys.exit(1)
 
-  # Try to open preprocessed file
-  try:
-    q2_preprocessed_file = open(argv[1], encoding="utf-8-sig")
-  except IOError:
-    print(f"Could not open \"q2_preprocessed_file\" from arguments: {argv[1]} is an invalid file path!", file=sys.stderr)
-    sys.exit(1)
-
-  # Try to create plotting file
-  try:
-    q2_plotting_file = open(argv[2],"w", encoding="utf-8-sig")
-  except IOError:
-    print(f"Could not create \"q2_plotting_file\" from arguments: {argv[2]} is an invalid or cannot be overwritten!", file=sys.stderr)
-    sys.exit(1)
-
   school_board = argv[9]
   graphics_filename = argv[10]
 
@@ -80,76 +199,50 @@ def main(argv):
   except:
     debugOn = False 
 
-  # Store current line num
-  curr_line_num = 0;
-
-  # Create CSV reader from q2 preprocessed file
-  q2_preprocessed_reader = csv.reader(q2_preprocessed_file)
-
-  # First line of output - header
-  q2_plotting_file.write("Date,School Board,Confirmed School Cases\n")
-
-  #loop through all rows in q2_preprocessed_file
-  for row_data in q2_preprocessed_reader:
-    #Skip first row - header
-    if row_data[0] == "collected_date":
-      curr_line_num += 1
-      continue
+  # Copies the figure from the figure cache if it was already drawn from the same data and arguments
+  figures = figure_cache.open_cache(cli_flags.figure_cache_dir(flags), __file__, argv[1], plot_parameters(start_date, end_date, [school_board], renderer, error_band, decimation), graphics_filename)
+  if figures.restore(graphics_filename, argv[2]):
+    metrics.finish(flags, debugOn)
+    return
 
-    # If the row has less than the 3 required fields, prints error and stops
-    if len(row_data) < 3:
-      print(f"Row {curr_line_num} in q2_preprocessed_file has too few fields! Needs: 3, Has: {len(row_data)}", file=sys.stderr)
-      sys.exit(1)
-
-    # Extract date info from file
-    try:
-        date = datetime.date.fromisoformat(row_data[0]) 
-    except ValueError:
-        if debugOn:
-          print(f"Could not convert \'{row_data[0]}'\ to a date for collected date (Row {curr_line_num})", file=sys.stderr)
-        date = datetime.date.min
+  # Try to open preprocessed file
+  try:
+    q2_columns, q2_invalid = plot_data.read_columns(argv[1], "question2", Q2_FIELDS, start_date, end_date, {"school_board": [school_board]}, cache_dir)
+  except (IOError, ValueError):
+    print(f"Could not open \"q2_preprocessed_file\" from arguments: {argv[1]} is an invalid file path!", file=sys.stderr)
+    sys.exit(1)
 
-    # Assign appropriate variables to fields in file 
-    school_board_from_file = row_data[1]
-    confirmed_cases = int(row_data[2])
+  # Counts the rows whose date could not be converted, they are never within the date range
+  metrics.reject("could not convert collected date", np.count_nonzero(q2_invalid["collected_date"]))
 
-    # Print data to plotting file if date is within range
-    if date >= start_date and date <= end_date:
-      if school_board == school_board_from_file:
-        q2_plotting_file.write(f"{date},\"{school_board}\",{confirmed_cases}\n")
+  # Keeps the rows of the school board within the date range
+  q2_plot = plot_frame(q2_columns, start_date, end_date, [school_board])
 
-  # Close the file
-  q2_plotting_file.close()
+  # Writes the plotting data to q2_plotting_file as a side output
+  try:
+    plot_data.write_plotting_file(q2_plot, argv[2])
+  except IOError:
+    print(f"Could not create \"q2_plotting_file\" from arguments: {argv[2]} is an invalid or cannot be overwritten!", file=sys.stderr)
+    sys.exit(1)
 
   # START PLOTTING #
 
-  # Open the data file using "pandas" and create csv reader for the plotting file
-  try:
-    q2_plot = pd.read_csv(argv[2])
-  except IOError as err:
-    print("Unable to open generated CSV file", argv[2],
-      ": {}".format(err), file=sys.stderr)
-    sys.exit(-1)
-
   # Creates figure to draw the plot in
-  fig = plt.figure()
+  with metrics.stage("render"):
+    fig = plt.figure()
+    draw_plot(fig.gca(), q2_plot, renderer, error_band, decimation)
 
-  # Creates lineplot using seaborn
-  # Refer to column heading names in csv file
-  ax = sns.lineplot(x = "Date", y = "Confirmed School Cases", hue = "School Board", data = q2_plot)
-  
-  # Max number of ticks are 5
-  ax.xaxis.set_major_locator(ticktools.MaxNLocator(6))
+    # Save the matplotlib figure that seaborn has drawn to a file
+    fig.savefig(graphics_filename, bbox_inches="tight")
 
-  # Rotate the ticks on the x-axis to 45 degrees
-  plt.xticks(rotation = 45, ha = 'right')
-
-  # Save the matplotlib figure that seaborn has drawn to a file
-  fig.savefig(graphics_filename, bbox_inches="tight")
+  # Keeps a copy for later runs with the same data and arguments
+  figures.store(graphics_filename, argv[2])
 
   # Uncomment this line to show the figure on the screen.
   # (May need to use [CTR+C] to close the display after)
   #plt.show()
+
+  metrics.finish(flags, debugOn)
     
 #
 # END OF MAIN
@@ -3,7 +3,7 @@ Authors: Roman Blotsky (1168123), Mehtab Kaur (1054984), Kirisan Suthanthireswar
 Last Updated: (22-03-2022)
 
 Functionality:
-  This file will take a number of command line arguments including a data file, an output file, timeframe and output filename to plot. It will take the data between the given timeframe from the data file, write it to the output file, and then create a plot from that file using imported libraries. The output is written to standard output unless redirected to a file (recommended to redirect to a PDF)
+  This file will take a number of command line arguments including a data file, an output file, timeframe and output filename to plot. It will take the data between the given timeframe from the data file, write it to the output file (skipped if the output file is "-"), and create a plot from that data in memory using imported libraries. The output is written to standard output unless redirected to a file (recommended to redirect to a PDF)
 
   There are 9 commandline arguments and 1 optional argument: 
     - q3_processed_file (string)
@@ -17,28 +17,163 @@ Functionality:
     - graphic file (string)
     - debugOn (integer, optional)
 
+  Optional flags (may be placed anywhere after the script name):
+    - --cache[=cache_dir]  Reads the preprocessed file through the columnar input cache (default folder: .cache/inputs). Unchanged files skip CSV parsing.
+    - --figure-cache[=cache_dir]  Copies the figure (and plotting file) from the rendered-figure cache (default folder: .cache/figures) when it was already drawn from the same preprocessed data, arguments and library versions, otherwise draws it and stores a copy (see Common/figure_cache.py).
+    - --decimate[=minmax|lttb]  Draws each line with about one point per pixel of the plot's width, picked by min/max bucketing (default) or Largest-Triangle-Three-Buckets, always keeping its peaks. Speeds up long-range plots and keeps their SVGs small. The plotting file still holds every row (see Common/plot_data.py).
+    - --render=seaborn|direct  How the lines are drawn: sns.lineplot (default), or directly with matplotlib from means computed once in pandas, skipping seaborn's bootstrapped confidence intervals (see Common/plot_data.py).
+    - --error-band=none|sd|ci  With --render=direct, the error band drawn around each line (default: none).
+    - --batch=job_file  Renders every figure listed in a JSON or CSV job file (date range, graphics file and optional plotting file of each) from one read of q3_processed_file, which is then the only argument (see Common/batch_plots.py).
+    - --workers[=N]  With --batch, renders the figures on N worker processes (default: every CPU).
+    - --profile[=profile_file], --metrics-json=file  Reports the time spent in each stage, rows per second, rejected rows and peak memory (see Common/metrics.py).
+    - --time-startup  Prints to stderr on exit how long the script ran before importing numpy, pandas, seaborn and matplotlib, and how long each import took. These are only imported once the arguments are checked, and only if used (see Common/lazy_imports.py). Figures are drawn with the non-interactive Agg backend.
+    - The preprocessed file is read through its sidecar date index (<q3_processed_file>.dateidx) when one exists, so only the rows within the date range are parsed.
+    - The preprocessed file may also be the binary series file written by the preprocessing script with --binary. Its records are memory-mapped, and only those within the date range are loaded.
+    - It may also be the store folder written with --partitions, of which only the partitions of the plotted months are read.
+    - Or it may be the SQLite database written with --sqlite, from whose question3 table only the rows to plot are selected.
+
 To run on commandline:
 python Plotting/question3_plotting.py question3_preprocessed.csv question3_plotted_data.csv 2021 8 10 2022 1 29 plot3.pdf
+python Plotting/question3_plotting.py question3_preprocessed.csv --batch=question3_jobs.csv --workers
 '''
 
 # Packages/Modules #
+import os
 import sys
-import csv
 import datetime
-import pandas as pd
 
-import seaborn as sns
-from matplotlib import pyplot as plt
+# Shared modules live in the Common folder beside this one
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+import cli_flags
+import column_types
+import lazy_imports
+import metrics
+
+# numpy, pandas, seaborn, matplotlib and the shared modules that use them are imported the first time
+# they are used, once the arguments are checked (see Common/lazy_imports.py). pyplot uses the Agg backend.
+np = lazy_imports.lazy_module("numpy")
+pd = lazy_imports.lazy_module("pandas")
+
+sns = lazy_imports.lazy_module("seaborn")
+plt = lazy_imports.lazy_module("matplotlib.pyplot")
 
 # this imports tools for "ticks" along the x and y-axes and calls them "ticktools"
-from matplotlib import ticker as ticktools
+ticktools = lazy_imports.lazy_module("matplotlib.ticker")
+
+batch_plots = lazy_imports.lazy_module("batch_plots")
+figure_cache = lazy_imports.lazy_module("figure_cache")
+plot_data = lazy_imports.lazy_module("plot_data")
+
+# CONSTANTS #
+# Fields read from the preprocessed file (header name -> type)
+Q3_FIELDS = {
+  "Accurate_Episode_Date": column_types.DATE,
+  "Age_Group": column_types.CATEGORY,
+  "Number_of_cases": column_types.INTEGER,
+}
+
+# Size of the figure, in inches
+FIGURE_SIZE = (12,6)
+
+#Builds the plotting data of the rows with a known age group within the date range
+def plot_frame(q3Columns, start_date, end_date):
+  with metrics.stage("aggregate"):
+    selected = plot_data.in_date_range(q3Columns["Accurate_Episode_Date"], start_date, end_date) & ~plot_data.category_mask(q3Columns["Age_Group"], ["UNKNOWN"])
+
+    return pd.DataFrame({
+      "Date": plot_data.date_labels(q3Columns["Accurate_Episode_Date"][selected]),
+      "Number of Cases": q3Columns["Number_of_cases"][selected],
+      "Age Group": plot_data.selected_categories(q3Columns["Age_Group"], selected),
+    })
+
+#Returns the plot parameters the figure cache keys a figure by (see Common/figure_cache.py)
+def plot_parameters(start_date, end_date, renderer, error_band, decimation):
+  return {"start_date": start_date, "end_date": end_date, "categories": [], "render": renderer, "error_band": error_band, "decimate": decimation}
+
+#Draws the plotting data on ax and returns the Axes drawn on
+def draw_plot(ax, q3Plot, renderer, error_band, decimation):
+
+  #Draws only about one point per pixel of the plot's width if --decimate was given (see Common/plot_data.py)
+  q3Plot = plot_data.decimate(ax, q3Plot, "Date", "Number of Cases", "Age Group", decimation)
+
+  #Setting variables to the appropriate parameters, setting line width = 2
+  if renderer == "direct":
+    ax = plot_data.draw_lines(ax, q3Plot, "Date", "Number of Cases", "Age Group", error_band)
+  else:
+    ax = sns.lineplot(x = "Date", y = "Number of Cases",hue = "Age Group", data=q3Plot, ax=ax)
+
+  #Setting number of ticks across the x-axis representing time to 5
+  ax.xaxis.set_major_locator(ticktools.MaxNLocator(5))
+
+  #Rotating the ticks by 45 degrees and setting horizontal ticks to right side
+  plt.xticks(rotation = 45, ha = 'right')
+
+  return ax
+
+#Renders every figure of the job file given with --batch, reading the preprocessed file once
+def run_batch(q3_processed_file, flags, cache_dir, renderer, error_band, decimation):
+  try:
+    jobs = batch_plots.read_jobs(flags["batch"], False)
+    workers = cli_flags.workers(flags)
+    figure_cache_dir = cli_flags.figure_cache_dir(flags)
+  except (IOError, ValueError) as err:
+    print(f"Could not read the job file from --batch: {err}", file=sys.stderr)
+    sys.exit(1)
+
+  #Reads the rows of every job's dates at once
+  start_date, end_date = batch_plots.date_span(jobs)
+  try:
+    q3Columns, q3Invalid = plot_data.read_columns(q3_processed_file, "question3", Q3_FIELDS, start_date, end_date, cache_dir=cache_dir)
+  except (IOError, ValueError):
+    print(f"Could not open \"q3_preprocessed_file\" from arguments: {q3_processed_file} is an invalid file path!", file=sys.stderr)
+    sys.exit(1)
+
+  metrics.reject("could not convert the date", np.count_nonzero(q3Invalid["Accurate_Episode_Date"]))
+
+  #Writes the plotting data and draws the figure of one job, unless the figure cache already holds it
+  def render_job(ax, job):
+    figures = figure_cache.open_cache(figure_cache_dir, __file__, q3_processed_file, plot_parameters(job["start_date"], job["end_date"], renderer, error_band, decimation), job["graphics_file"])
+    if figures.restore(job["graphics_file"], job["plotting_file"]):
+      return
+
+    q3Plot = plot_frame(q3Columns, job["start_date"], job["end_date"])
+    plot_data.write_plotting_file(q3Plot, job["plotting_file"])
+
+    with metrics.stage("render"):
+      draw_plot(ax, q3Plot, renderer, error_band, decimation)
+      ax.figure.savefig(job["graphics_file"], bbox_inches = "tight")
+
+    figures.store(job["graphics_file"], job["plotting_file"])
+
+  return batch_plots.run_jobs(jobs, render_job, FIGURE_SIZE, workers)
 
 # MAIN FUNCTION #
 def main(argv):
 
-  # Ensures a valid amount of commandline arguments passed
-  if len(argv) < 9:
-    print("Usage: question2_plotting.py <q3_preprocessed_file>  <q3_plotting_file> <start_year> <start_month> <start_day> <end_year> <end_month> <end_day> <graphic file> <debugOn (optional)>")
+  # Separates the optional "--flag" arguments from the positional ones
+  argv, flags = cli_flags.split_flags(argv)
+  metrics.start(flags)
+  lazy_imports.time_startup(flags)
+  cache_dir = cli_flags.cache_dir(flags)
+
+  # Picks how the lines are drawn and decimated (see Common/plot_data.py)
+  try:
+    renderer, error_band = cli_flags.render_options(flags)
+    decimation = cli_flags.decimation(flags)
+  except ValueError as err:
+    print(err, file=sys.stderr)
+    sys.exit(1)
+
+  # In batch mode, renders the figures of the job file instead of the one given by the arguments
+  if isinstance(flags.get("batch"), str) and len(argv) >= 2:
+    failures = run_batch(argv[1], flags, cache_dir, renderer, error_band, decimation)
+    metrics.finish(flags)
+    sys.exit(1 if failures > 0 else 0)
+
+  # Ensures a valid amount of commandline arguments passed (a --batch without a job file is a usage error too)
+  if len(argv) < 10 or "batch" in flags:
+    print("Usage: question2_plotting.py <q3_preprocessed_file>  <q3_plotting_file> <start_year> <start_month> <start_day> <end_year> <end_month> <end_day> <graphic file> <debugOn (optional)> <--batch=job_file (optional, replaces the arguments after q3_preprocessed_file)> <--workers[=N] (optional)> <--cache[=cache_dir] (optional)> <--figure-cache[=cache_dir] (optional)> <--render=seaborn|direct (optional)> <--error-band=none|sd|ci (optional)> <--decimate[=minmax|lttb] (optional)> <--profile[=profile_file] (optional)> <--metrics-json=file (optional)> <--time-startup (optional)>", file=sys.stderr)
+    sys.exit(1)
 
   # Stores all the arguments
   try:
@@ -55,94 +190,57 @@ def main(argv):
 
   #PDF file name will be given as cmnd line arg
   output_file = argv[9]
-  #try to open preprocessed file
-  try:
-    q3PreprocessedFile = open(argv[1], encoding="utf-8-sig")
-  except IOError:
-    print(f"Could not open \"q3_preprocessed_file\" from arguments: {argv[1]} is an invalid file path!", file=sys.stderr)
-    sys.exit(1)
-
-  #try to create plotting file
-  try:
-    q3PlottingFile = open(argv[2],"w", encoding="utf-8-sig")
-  except IOError:
-    print(f"Could not create \"q3_plotting_file\" from arguments: {argv[2]} is an invalid or cannot be overwritten!", file=sys.stderr)
-    sys.exit(1)
-
 
   # Stores optional debugOn argument.
   # This displays debug information in stderr if set to on.
   try:
-    debugOn = bool(int(argv[2]) > 0)
+    debugOn = bool(int(argv[10]) > 0)
   except:
     debugOn = False 
 
-  #store current line num
-  currentRow = 0;
-
-  #Initializing read variable for Q3 preprocessed file
-  q3Read = csv.reader(q3PreprocessedFile)
-
-  #Writing first line outlining parameters
-  q3PlottingFile.write("Date,Number of Cases,Age Group\n")
-
-  #Loops through preprocessed file row_data by row_data
-  for row_data in q3Read:
-
-    #Skips first row_data 
-    if row_data[0] == "Accurate_Episode_Date" or row_data[1] == "UNKNOWN":
-      currentRow += 1
-      continue
+  #Copies the figure from the figure cache if it was already drawn from the same data and arguments
+  figures = figure_cache.open_cache(cli_flags.figure_cache_dir(flags), __file__, argv[1], plot_parameters(start_date, end_date, renderer, error_band, decimation), output_file)
+  if figures.restore(output_file, argv[2]):
+    metrics.finish(flags, debugOn)
+    return
 
-    #Ensures the row_data has 3 columuns
-    if len(row_data) < 3:
-      print(f"Row {currentRow} has too few columns, Needs 3, Has: {len(row_data)}", file=sys.stderr)
-      sys.exit(1)
-
-    #Extracting time info from file
-    try:
-      date = datetime.date.fromisoformat(row_data[0])
-    except ValueError:
-      print(f"Could not convert \"{row_data[0]}\"to a date on row_data {currentRow}", file=sys.stderr)
-      date = datetime.date.min
+  #try to open preprocessed file
+  try:
+    q3Columns, q3Invalid = plot_data.read_columns(argv[1], "question3", Q3_FIELDS, start_date, end_date, cache_dir=cache_dir)
+  except (IOError, ValueError):
+    print(f"Could not open \"q3_preprocessed_file\" from arguments: {argv[1]} is an invalid file path!", file=sys.stderr)
+    sys.exit(1)
 
-    #Initializing and assigning variables to corresponding columns in file
-    age_group = row_data[1]
-    number_cases = row_data[2]
+  #Counts the rows whose date could not be converted, they are never within the date range
+  metrics.reject("could not convert the date", np.count_nonzero(q3Invalid["Accurate_Episode_Date"]))
 
-    #Ensures date entered is within range
-    if date >= start_date and date <= end_date:
-      q3PlottingFile.write(f"{date}, {number_cases}, {age_group}\n")
+  #Keeps the rows with a known age group within the date range
+  q3Plot = plot_frame(q3Columns, start_date, end_date)
 
-    #Closes file
-  q3PlottingFile.close()
+  #Writes the plotting data to q3_plotting_file as a side output
+  try:
+    plot_data.write_plotting_file(q3Plot, argv[2])
+  except IOError:
+    print(f"Could not create \"q3_plotting_file\" from arguments: {argv[2]} is an invalid or cannot be overwritten!", file=sys.stderr)
+    sys.exit(1)
 
   # START PLOTTING HERE #
 
-  #Try opening the plotting csv file 
-  try:
-    q3Plot = pd.read_csv(argv[2])
-  except IOError as err:
-    print("Unable to open generated CSV file", argv[2],       ": {}".format(err), file=sys.stderr)
-    sys.exit(0)
-
   if debugOn:
     print(q3Plot)
 
   #Declaring and setting figure size for the seaborn lineplot
-  figure = plt.figure(figsize = (12,6))
-
-  #Setting variables to the appropriate parameters, setting line width = 2
-  ax = sns.lineplot(x = "Date", y = "Number of Cases",hue = "Age Group", data=q3Plot)
+  with metrics.stage("render"):
+    figure = plt.figure(figsize = FIGURE_SIZE)
+    draw_plot(figure.gca(), q3Plot, renderer, error_band, decimation)
 
-  #Setting number of ticks across the x-axis representing time to 5
-  ax.xaxis.set_major_locator(ticktools.MaxNLocator(5))
+    #Saving figure using the output file format
+    figure.savefig(output_file, bbox_inches = "tight")
 
-  #Rotating the ticks by 45 degrees and setting horizontal ticks to right side
-  plt.xticks(rotation = 45, ha = 'right')
+  #Keeps a copy for later runs with the same data and arguments
+  figures.store(output_file, argv[2])
 
-  #Saving figure using the output file format
-  figure.savefig(output_file, bbox_inches = "tight")
+  metrics.finish(flags, debugOn)
 #
 # END OF MAIN
 #
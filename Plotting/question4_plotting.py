@@ -3,7 +3,7 @@ Authors: Kirisan Suthanthireswaran (1186029)
 Last Updated: (2022/03-22)
 
 Functionality:
-  This file will take a number of command line arguments including a data file, an output file, and a timeframe to plot. It will take the data between the given timeframe from the data file, write it to the output file, and then create a plot from that file using imported libraries. The output is written to standard output unless redirected to a file (recommended to redirect to a PDF)
+  This file will take a number of command line arguments including a data file, an output file, and a timeframe to plot. It will take the data between the given timeframe from the data file, write it to the output file (skipped if the output file is "-"), and create a plot from that data in memory using imported libraries. The output is written to standard output unless redirected to a file (recommended to redirect to a PDF)
 
   There are 8 commandline arguments and 1 optional argument: 
     - outbreak_data_file  (string)
@@ -19,49 +19,180 @@ Functionality:
     - phu_name3
     - graphing_file (string)
 
+  Optional flags (may be placed anywhere after the script name):
+    - --cache[=cache_dir]  Reads the preprocessed file through the columnar input cache (default folder: .cache/inputs). Unchanged files skip CSV parsing.
+    - --figure-cache[=cache_dir]  Copies the figure (and plotting file) from the rendered-figure cache (default folder: .cache/figures) when it was already drawn from the same preprocessed data, arguments and library versions, otherwise draws it and stores a copy (see Common/figure_cache.py).
+    - --decimate[=minmax|lttb]  Draws each line with about one point per pixel of the plot's width, picked by min/max bucketing (default) or Largest-Triangle-Three-Buckets, always keeping its peaks. Speeds up long-range plots and keeps their SVGs small. The plotting file still holds every row (see Common/plot_data.py).
+    - --render=seaborn|direct  How the lines are drawn: sns.lineplot (default), or directly with matplotlib from means computed once in pandas, skipping seaborn's bootstrapped confidence intervals (see Common/plot_data.py).
+    - --error-band=none|sd|ci  With --render=direct, the error band drawn around each line (default: none).
+    - --batch=job_file  Renders every figure listed in a JSON or CSV job file (date range, PHUs, graphics file and optional plotting file of each) from one read of outbreak_data_file, which is then the only argument (see Common/batch_plots.py). A job may plot any number of PHUs.
+    - --workers[=N]  With --batch, renders the figures on N worker processes (default: every CPU).
+    - --profile[=profile_file], --metrics-json=file  Reports the time spent in each stage, rows per second, rejected rows and peak memory (see Common/metrics.py).
+    - --time-startup  Prints to stderr on exit how long the script ran before importing numpy, pandas, seaborn and matplotlib, and how long each import took. These are only imported once the arguments are checked, and only if used (see Common/lazy_imports.py). Figures are drawn with the non-interactive Agg backend.
+    - The preprocessed file is read through its sidecar date index (<q4_processed_file>.dateidx) when one exists, so only the rows within the date range are parsed.
+    - The preprocessed file may also be the binary series file written by the preprocessing script with --binary. Its records are memory-mapped, and only those within the date range are loaded.
+    - It may also be the store folder written with --partitions, of which only the partitions of the plotted PHUs and months are read.
+    - Or it may be the SQLite database written with --sqlite, from whose question4 table only the rows to plot are selected.
+
 To run on commandline:
 
 python Plotting/question4_plotting.py question4_preprocessed.csv question4_plotted_data.csv 2020 11 01 2023 11 01 "TORONTO" "CITY OF OTTAWA" "NIAGARA REGION" plot4.pdf
+python Plotting/question4_plotting.py question4_preprocessed.csv --batch=question4_jobs.json --workers
 
 '''
 
 
 # Packages/Modules #
+import os
 import sys
-import csv
 import datetime
-import pandas as pd
+
+# Shared modules live in the Common folder beside this one
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+import cli_flags
+import column_types
+import lazy_imports
+import metrics
+
+# numpy, pandas, seaborn, matplotlib and the shared modules that use them are imported the first time
+# they are used, once the arguments are checked (see Common/lazy_imports.py). pyplot uses the Agg backend.
+np = lazy_imports.lazy_module("numpy")
+pd = lazy_imports.lazy_module("pandas")
 
 # seaborn and matplotlib are for plotting.  The matplotlib
 # library is the actual graphics library, and seaborn provides
 # a nice interface to produce plots more easily.
-import seaborn as sns
-from matplotlib import pyplot as plt
+sns = lazy_imports.lazy_module("seaborn")
+plt = lazy_imports.lazy_module("matplotlib.pyplot")
 
 # this imports tools for "ticks" along the x and y-axes and calls them "ticktools"
-from matplotlib import ticker as ticktools
+ticktools = lazy_imports.lazy_module("matplotlib.ticker")
+
+batch_plots = lazy_imports.lazy_module("batch_plots")
+figure_cache = lazy_imports.lazy_module("figure_cache")
+plot_data = lazy_imports.lazy_module("plot_data")
 
 # CONSTANT VALUES #
 NUM_X_TICKS = 6
 
+# Fields read from the preprocessed file (header name -> type)
+Q4_FIELDS = {
+  "date": column_types.DATE,
+  "phu_name": column_types.CATEGORY,
+  "number_of_outbreaks": column_types.INTEGER,
+}
+
+#Builds the plotting data of the rows of the PHUs within the date range
+def plot_frame(outbreak_columns, start_date, end_date, phu_names):
+  with metrics.stage("aggregate"):
+    selected = plot_data.in_date_range(outbreak_columns["date"], start_date, end_date) & \
+               plot_data.category_mask(outbreak_columns["phu_name"], phu_names)
+
+    return pd.DataFrame({
+      "Date": plot_data.date_labels(outbreak_columns["date"][selected]),
+      "Number_Of_Outbreaks": outbreak_columns["number_of_outbreaks"][selected],
+      "PHU_NAME": plot_data.selected_categories(outbreak_columns["phu_name"], selected),
+    })
+
+#Returns the plot parameters the figure cache keys a figure by (see Common/figure_cache.py)
+def plot_parameters(start_date, end_date, phu_names, renderer, error_band, decimation):
+  return {"start_date": start_date, "end_date": end_date, "categories": phu_names, "render": renderer, "error_band": error_band, "decimate": decimation}
+
+#Draws the plotting data on ax and returns the Axes drawn on
+def draw_plot(ax, question4_plotting, renderer, error_band, decimation):
+
+  #Draws only about one point per pixel of the plot's width if --decimate was given (see Common/plot_data.py)
+  question4_plotting = plot_data.decimate(ax, question4_plotting, "Date", "Number_Of_Outbreaks", "PHU_NAME", decimation)
+
+  # Creates a lineplot using seaborn 
+  # (Each name here must have the same name as its column in the DataFrame)
+  if renderer == "direct":
+    ax = plot_data.draw_lines(ax, question4_plotting, "Date", "Number_Of_Outbreaks", "PHU_NAME", error_band)
+  else:
+    ax = sns.lineplot(x = "Date", y = "Number_Of_Outbreaks", hue="PHU_NAME", data=question4_plotting, ax=ax)
+
+  # Set the max number of axis labels to NUM_X_TICKS, to avoid having ticks for each date
+  ax.xaxis.set_major_locator(ticktools.MaxNLocator(NUM_X_TICKS))
+
+  # Rotate the ticks on the x-axis to 45 degrees
+  plt.xticks(rotation = 45, ha = 'right')
+
+  return ax
+
+#Renders every figure of the job file given with --batch, reading the preprocessed file once
+def run_batch(outbreak_data_file_name, flags, cache_dir, renderer, error_band, decimation):
+  try:
+    jobs = batch_plots.read_jobs(flags["batch"], True)
+    workers = cli_flags.workers(flags)
+    figure_cache_dir = cli_flags.figure_cache_dir(flags)
+  except (IOError, ValueError) as err:
+    print("Unable to read the job file from --batch : {}".format(err), file=sys.stderr)
+    sys.exit(1)
+
+  #Reads the rows of every job's dates and PHUs at once
+  start_date, end_date = batch_plots.date_span(jobs)
+  try:
+    outbreak_columns, outbreak_invalid = plot_data.read_columns(outbreak_data_file_name, "question4", Q4_FIELDS, start_date, end_date, {"phu_name": batch_plots.all_categories(jobs)}, cache_dir)
+  except (IOError, ValueError) as err:
+    print("Unable to open outbreak_data_file '{}' : {}".format(outbreak_data_file_name, err), file=sys.stderr)
+    sys.exit(1)
+
+  #Writes the plotting data and draws the figure of one job, unless the figure cache already holds it
+  def render_job(ax, job):
+    figures = figure_cache.open_cache(figure_cache_dir, __file__, outbreak_data_file_name, plot_parameters(job["start_date"], job["end_date"], job["categories"], renderer, error_band, decimation), job["graphics_file"])
+    if figures.restore(job["graphics_file"], job["plotting_file"]):
+      return
+
+    question4_plotting = plot_frame(outbreak_columns, job["start_date"], job["end_date"], job["categories"])
+    plot_data.write_plotting_file(question4_plotting, job["plotting_file"])
+
+    with metrics.stage("render"):
+      draw_plot(ax, question4_plotting, renderer, error_band, decimation)
+      ax.figure.savefig(job["graphics_file"], bbox_inches="tight")
+
+    figures.store(job["graphics_file"], job["plotting_file"])
+
+  return batch_plots.run_jobs(jobs, render_job, None, workers)
+
 
 
 def main(argv):
 
-  #Checking if the correct amount of arguments are run on the command line
-  if len(argv) < 13:
-    print("Usage: question4_preprocess.py <outbreak_data_file> <plotting_data_file> <start_year> <start_month> <start_day> <end_year> <end_month> <end_day> <name of PHU1> <name of PHU2> <name of PHU3> <debugOn (optional)>")
+  # Separates the optional "--flag" arguments from the positional ones
+  argv, flags = cli_flags.split_flags(argv)
+  metrics.start(flags)
+  lazy_imports.time_startup(flags)
+  cache_dir = cli_flags.cache_dir(flags)
+
+  # Picks how the lines are drawn and decimated (see Common/plot_data.py)
+  try:
+    renderer, error_band = cli_flags.render_options(flags)
+    decimation = cli_flags.decimation(flags)
+  except ValueError as err:
+    print(err, file=sys.stderr)
+    sys.exit(1)
+
+  #In batch mode, renders the figures of the job file instead of the one given by the arguments
+  if isinstance(flags.get("batch"), str) and len(argv) >= 2:
+    failures = run_batch(argv[1], flags, cache_dir, renderer, error_band, decimation)
+    metrics.finish(flags)
+    sys.exit(1 if failures > 0 else 0)
+
+  #Checking if the correct amount of arguments are run on the command line (a --batch without a job file is a usage error too)
+  if len(argv) < 13 or "batch" in flags:
+    print("Usage: question4_preprocess.py <outbreak_data_file> <plotting_data_file> <start_year> <start_month> <start_day> <end_year> <end_month> <end_day> <name of PHU1> <name of PHU2> <name of PHU3> <debugOn (optional)> <--batch=job_file (optional, replaces the arguments after outbreak_data_file)> <--workers[=N] (optional)> <--cache[=cache_dir] (optional)> <--figure-cache[=cache_dir] (optional)> <--render=seaborn|direct (optional)> <--error-band=none|sd|ci (optional)> <--decimate[=minmax|lttb] (optional)> <--profile[=profile_file] (optional)> <--metrics-json=file (optional)> <--time-startup (optional)>", file=sys.stderr)
+    sys.exit(1)
 
   #Creating date variables for our time frame
   try:
     start_date = datetime.date(int(argv[3]), int(argv[4]), int(argv[5]))
-  except IOError as err:
+  except ValueError as err:
     print("Error {},Invalid arguments for start date range. Must be in the format <YYYY> <MM> <DD> for {} {} {}".format(err, argv[2], argv[3], argv[4]), file=sys.stderr)
     sys.exit(1)
   
   try:
     end_date = datetime.date(int(argv[6]), int(argv[7]), int(argv[8]))
-  except IOError as err:
+  except ValueError as err:
     print("Error {},Invalid arguments for start date range. Must be in the format <YYYY> <MM> <DD> for {} {} {}".format(err, argv[6], argv[7], argv[8]), file=sys.stderr)
     sys.exit(1)
 
@@ -73,101 +204,48 @@ def main(argv):
   phu_name3 = argv[11]
   graphing_file = "plot4.svg"
 
-  #Tries to open the files
+  #Copies the figure from the figure cache if it was already drawn from the same data and arguments
+  figures = figure_cache.open_cache(cli_flags.figure_cache_dir(flags), __file__, outbreak_data_file_name, plot_parameters(start_date, end_date, [phu_name1, phu_name2, phu_name3], renderer, error_band, decimation), graphing_file)
+  if figures.restore(graphing_file, plotting_data_file_name):
+    metrics.finish(flags)
+    return
+
+  #Tries to read the preprocessed file
   #Will notify the user if an error occurs
   try:
-    outbreak_data_file = open(outbreak_data_file_name, encoding = "utf-8-sig")
-  except IOError as err:
+    outbreak_columns, outbreak_invalid = plot_data.read_columns(outbreak_data_file_name, "question4", Q4_FIELDS, start_date, end_date, {"phu_name": [phu_name1, phu_name2, phu_name3]}, cache_dir)
+  except (IOError, ValueError) as err:
     print("Unable to open outbreak_data_file '{}' : {}".format(outbreak_data_file_name, err), file=sys.stderr)
     sys.exit(1)
+
+  #Keeps the rows of the 3 PHUs within the given date range
+  question4_plotting = plot_frame(outbreak_columns, start_date, end_date, [phu_name1, phu_name2, phu_name3])
+
+  #Writing the plotting data to plotting_data_file as a side output
   try:
-    plotting_data_file = open(plotting_data_file_name,"w", encoding = "utf-8-sig")
+    plot_data.write_plotting_file(question4_plotting, plotting_data_file_name)
   except IOError as err:
     print("Unable to open plotting_data_file '{}' : {}".format(plotting_data_file_name, err), file=sys.stderr)
     sys.exit(1)
 
-  #Createing csv reader to read the data file(s)
-  outbreak_date_reader = csv.reader(outbreak_data_file)
-  
-
-  #Creating the header for the plotting_date file
-  plotting_data_file.write("Date,Number_Of_Outbreaks,PHU_NAME\n")
-
-  
-  #To keep track of current row index
-  current_index = 0
-
-
-  #To ensure that we are within the given date range
-  is_in_range = False
-
-  #Looping through the givend data_file to extract data 
-  for row_data_fields in outbreak_date_reader:
-    
-    if row_data_fields[0] == "date":
-      continue
-  # Check for if the current row_data_fields contains at least the correct amount of fields. Will terminate if the amount is less 
-    if len(row_data_fields) < 3:
-      print(f"Row {current_index} contains too few fields. The row_data_fields requires 3 but currently contains: ({len(row_data_fields)})", file=sys.stderr)
-      sys.exit(1)
-
-
-    #Taking the fields from the file and assigning them to variables
-    date = row_data_fields[0]
-    phu_name_from_file = row_data_fields[1]
-    amount_of_outbreaks = int(row_data_fields[2])
-    
-    #Checking if the current date matches our range
-    if (row_data_fields[0] == str(start_date)):
-      is_in_range = True
-      
-    elif(row_data_fields[0] == str(end_date)):
-      is_in_range = False
-
-    #If we are within the given range, we continue with the code
-    if (is_in_range == True):
-      #Checking First PHU
-      if(phu_name1 == phu_name_from_file):
-        plotting_data_file.write(f"{date},{amount_of_outbreaks},\"{phu_name_from_file}\"\n")
-      #Checking Second PHU
-      elif(phu_name2 == phu_name_from_file):
-        plotting_data_file.write(f"{date},{amount_of_outbreaks},\"{phu_name_from_file}\"\n")
-      #Checking Third PHU
-      elif(phu_name3 == phu_name_from_file):
-        plotting_data_file.write(f"{date},{amount_of_outbreaks},\"{phu_name_from_file}\"\n")
-
   #PLOTTING 
 
-  
-  #Closing the file that has been written to
-  plotting_data_file.close()
-
-  #Reopening the file for reading in order to create our graph
-  try:
-    question4_plotting = pd.read_csv(argv[2])
-  except IOError as err:
-    print("Unable to open the newly created file '{}' : {}".format(argv[2], err), file=sys.stderr)
-    sys.exit(-1)
-  
   # Generate a figure for the seaborn library to draw in.
-  fig = plt.figure()
+  with metrics.stage("render"):
+    fig = plt.figure()
+    draw_plot(fig.gca(), question4_plotting, renderer, error_band, decimation)
 
-  # Creates a lineplot using seaborn 
-  # (Each name here must have the same name as its column in the CSV file)
-  ax = sns.lineplot(x = "Date", y = "Number_Of_Outbreaks", hue="PHU_NAME", data=question4_plotting)
-
-  # Set the max number of axis labels to NUM_X_TICKS, to avoid having ticks for each date
-  ax.xaxis.set_major_locator(ticktools.MaxNLocator(NUM_X_TICKS))
+    # Saves the fig to a file
+    fig.savefig(graphing_file, bbox_inches="tight")
 
-  # Rotate the ticks on the x-axis to 45 degrees
-  plt.xticks(rotation = 45, ha = 'right')
-
-  # Saves the fig to a file
-  fig.savefig(graphing_file, bbox_inches="tight")
+  #Keeps a copy for later runs with the same data and arguments
+  figures.store(graphing_file, plotting_data_file_name)
 
     # Uncomment this line to show the figure on the screen.
   # (May need to use [CTR+C] to close the display after)
   #plt.show()
+
+  metrics.finish(flags)
   
   #
   # END OF MAIN
@@ -25,209 +25,224 @@ Functionality:
     - icu_percent_partial_vac
     - icu_percent_full_vac
 
+  Optional flags (may be placed anywhere after the script name):
+    - --cache[=cache_dir]  Reads the input through the columnar input cache (default folder: .cache/inputs). Unchanged files skip CSV parsing.
+    - --date-index=index_file  Writes a sidecar date index of the output (name it <output_file>.dateidx so the plotting script finds it).
+    - --binary=series_file  Also writes the output rows to a fixed-width binary series file, which the plotting script can memory-map in place of the preprocessed CSV (see Common/binary_series.py).
+    - --partitions=store_folder  Also writes the output rows into a store folder partitioned by month, from which the plotting script opens only the partitions it needs (see Common/partition_store.py).
+    - --sqlite=database_file  Also inserts the output rows into the question1 table of an SQLite database, indexed by date, which the plotting script can query in place of the preprocessed CSV (see Common/sqlite_store.py).
+    - --gap-policy=skip|ffill|interpolate  What to do with ICU dates that have no vaccine data on that day: skip the ICU row (default), use the latest earlier vaccine data, or interpolate between the surrounding days.
+    - --profile[=profile_file], --metrics-json=file  Reports the time spent in each stage, rows per second, rejected rows and peak memory (see Common/metrics.py).
+    - --incremental=state_file  Processes only the rows appended to both files since the last run with the same state file, and prints only the new output rows (append them with >>). ICU rows dated after the latest vaccine data are held in the state file until that vaccine data arrives, along with the few vaccine rows later ICU rows may still be joined to. Both files are expected to be appended to in date order; appended ICU rows dated before the last printed date are skipped.
+
+  Each ICU row is joined to the vaccine data of the same date, so neither file needs to be sorted or gap-free.
+
   The preprocessed data can then be taken and interpreted to be plotted.
 
 To run on commandline:
 python Preprocessing/question1_preprocess.py Data/vaccine_doses_given.csv Data/icu_data_by_vac_status.csv > question1_preprocessed.csv
+python Preprocessing/question1_preprocess.py Data/vaccine_doses_given.csv Data/icu_data_by_vac_status.csv --incremental=question1_state.json >> question1_preprocessed.csv
 '''
 
 # Packages/Modules #
+import os
 import sys
-import csv
-import datetime
+import numpy as np
+
+# Shared modules live in the Common folder beside this one
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+import cli_flags
+import csv_ingest
+import date_join
+import metrics
+import output_files
+import watermark
 
 
 # Constants #
 OUTPUT_DECIMAL_PLACES = 4
 ONTARIO_POPULATION = 14915270 # Retrieved from https://www150.statcan.gc.ca/t1/tbl1/en/tv.action?pid=1710000901
 
+# Fields read from each data file (header name -> type)
+VACCINE_FIELDS = {
+  "report_date": csv_ingest.DATE,
+  "total_individuals_partially_vaccinated": csv_ingest.INTEGER,
+  "total_individuals_fully_vaccinated": csv_ingest.INTEGER,
+}
+ICU_FIELDS = {
+  "date": csv_ingest.DATE,
+  "icu_unvac": csv_ingest.INTEGER,
+  "icu_partial_vac": csv_ingest.INTEGER,
+  "icu_full_vac": csv_ingest.INTEGER,
+}
+
+# Fields of the output rows (header name -> type), as stored by --binary, --partitions and --sqlite
+OUTPUT_TABLE = "question1"
+OUTPUT_FIELDS = {
+  "date": csv_ingest.DATE,
+  "icu_percent_unvac": csv_ingest.FLOAT,
+  "icu_percent_partial_vac": csv_ingest.FLOAT,
+  "icu_percent_full_vac": csv_ingest.FLOAT,
+}
+
 # Main Function #
 def main(argv):
 
+  # Separates the optional "--flag" arguments from the positional ones
+  argv, flags = cli_flags.split_flags(argv)
+  metrics.start(flags)
+  cache_dir = cli_flags.cache_dir(flags)
+
   # Checks for the right amount of arguments. Final argument is optional.
   if len(argv) < 3:
-    print("Usage: question1_preprocess.py <vaccine_data_file> <icu_data_file> <debugOn (optional)>")
+    print("Usage: question1_preprocess.py <vaccine_data_file> <icu_data_file> <debugOn (optional)> <--cache[=cache_dir] (optional)> <--date-index=index_file (optional)> <--binary=series_file (optional)> <--partitions=store_folder (optional)> <--sqlite=database_file (optional)> <--gap-policy=skip|ffill|interpolate (optional)> <--incremental=state_file (optional)> <--profile[=profile_file] (optional)> <--metrics-json=file (optional)>")
     sys.exit(1)  
 
   # Stores commandline arguments
   vaccine_data_file_name = argv[1]
   icu_data_file_name = argv[2]
 
+  # Stores how ICU dates without vaccine data are handled
+  gap_policy = flags.get("gap-policy", "skip")
+  if gap_policy not in date_join.GAP_POLICIES:
+    print(f"Unknown gap policy '{gap_policy}'! Must be one of: {', '.join(date_join.GAP_POLICIES)}", file=sys.stderr)
+    sys.exit(1)
+
   # Stores optional debugOn argument.
-  # This displays debug information in stderr if set to on. Major errors that cause program exit will still be displayed if it is False.
+  # This displays counts of the rows that were skipped or could not be converted in stderr if set to on. Major errors that cause program exit will still be displayed if it is False.
   try:
     debugOn = bool(int(argv[3]) > 0)
   except:
     debugOn = False
 
-  # Tries opening the files
+  # Loads the state of the last incremental run (None on the first run)
+  # The cache, the date index, the series file, the partition store and the database always cover whole files, so they are not used in incremental mode
+  state_file_name = flags.get("incremental")
+  state = None
+  if state_file_name is True or (state_file_name is not None and ("date-index" in flags or "binary" in flags or "partitions" in flags or "sqlite" in flags)):
+    print("--incremental needs a state file name and cannot be combined with --date-index, --binary, --partitions or --sqlite", file=sys.stderr)
+    sys.exit(1)
+  if state_file_name is not None:
+    cache_dir = None
+    try:
+      state = watermark.load_state(state_file_name)
+    except (IOError, ValueError) as err:
+      print("Unable to read state_file '{}' : {}".format(state_file_name, err), file=sys.stderr)
+      sys.exit(1)
+
+  # Tries reading the needed columns of both files (in incremental mode, only the rows appended since the last run)
   # Prints error messages if it fails
   try:
-      vaccine_data_file = open(vaccine_data_file_name, encoding="utf-8-sig")
-  except IOError as err:
+    vaccine_range = None
+    if state_file_name is not None:
+      vaccine_range, new_vaccine_watermark = watermark.appended_range(vaccine_data_file_name, state and state["vaccine"])
+    vaccine_columns, vaccine_invalid = csv_ingest.read_columns(vaccine_data_file_name, VACCINE_FIELDS, cache_dir, vaccine_range)
+  except (IOError, ValueError) as err:
     print("Unable to open vaccine_data_file '{}' : {}".format(
             vaccine_data_file_name, err), file=sys.stderr)
     sys.exit(1)
 
   try:
-    icu_data_file = open(icu_data_file_name, encoding="utf-8-sig")
-  except IOError as err:
+    icu_range = None
+    if state_file_name is not None:
+      icu_range, new_icu_watermark = watermark.appended_range(icu_data_file_name, state and state["icu"])
+    icu_columns, icu_invalid = csv_ingest.read_columns(icu_data_file_name, ICU_FIELDS, cache_dir, icu_range)
+  except (IOError, ValueError) as err:
     print("Unable to open icu_data_file '{}' : {}".format(
           icu_data_file_name, err), file=sys.stderr)
     sys.exit(1)
-  
-  
-  # Create csv readers to read both data files
-  vaccine_data_reader = csv.reader(vaccine_data_file)
-  icu_data_reader = csv.reader(icu_data_file)
-
-  # Store the data that is found in the array (Stored as a list - we assume both files have the same number of lines, extra lines in either are discarded)
-  unvac_total_daily = []
-  partial_vac_total_daily = []
-  full_vac_total_daily = []
-  row_date = []
-
-  # Store the current row number
-  curr_row_index = 0   
-  
-  # loop through case data reader, store cases per day per vac group
-  for row_data in vaccine_data_reader:
 
-    # If the row has less than required amount of fields, prints error and stops.
-    if len(row_data) < 11:
-      print(f"Row {curr_row_index} in icu_data_file has too few fields! Needs: 11, Has: ({len(row_data)})", file=sys.stderr)
-      sys.exit(1)
+  # Vaccine rows (columns: partially vaccinated, fully vaccinated) and ICU rows (columns: unvaccinated, partially, fully)
+  with metrics.stage("aggregate"):
+    vaccine_dates = vaccine_columns["report_date"]
+    vaccine_totals = np.column_stack([vaccine_columns["total_individuals_partially_vaccinated"], vaccine_columns["total_individuals_fully_vaccinated"]])
+    icu_dates = icu_columns["date"]
+    icu_counts = np.column_stack([icu_columns["icu_unvac"], icu_columns["icu_partial_vac"], icu_columns["icu_full_vac"]])
 
-    # Increments current row index
-    curr_row_index += 1
-    
-    # Skips first line
-    if row_data[0] == 'report_date':
-      continue
-    
-    # Tries reading the file and storing data as integers.
-    # If any error reading data (eg. empty data), sets to 0 to ensure
-    # each array position is for the right day.
-    try:
-      curr_date = datetime.datetime.fromisoformat(row_data[0])  
-    except ValueError:
-      if debugOn:
-        print(f"Could not convert '{row_data[0]}' to a date for report date (Row {curr_row_index})", file=sys.stderr)
-      curr_date = datetime.datetime.min
-      
-    try:  
-      partial_vac_amount = int(row_data[7])
-    except ValueError:
-      if debugOn:
-        print(f"Could not convert '{row_data[7]}' to an integer value for partial vac (Row {curr_row_index})", file=sys.stderr)
-      partial_vac_amount = 0
-      
-    try:  
-      full_vac_amount = int(row_data[9])
-    except ValueError:
-      if debugOn:
-        print(f"Could not convert '{row_data[9]}' to an integer value for full vac (Row {curr_row_index})", file=sys.stderr)
-      full_vac_amount = 0
-
-    # Appending each data field from the file to its respective empty list
-    row_date.append(curr_date)
-    unvac_total_daily.append(ONTARIO_POPULATION-partial_vac_amount-full_vac_amount)
-    partial_vac_total_daily.append(partial_vac_amount)
-    full_vac_total_daily.append(full_vac_amount)    
-
-  # Prints first line of output
-  print("date,icu_percent_unvac,icu_percent_partial_vac,icu_percent_full_vac")
-  
-  # Loop through icu file, print percentage per day per vac group using stored data
-  curr_stored_data_index = 0
-  curr_row_index = 0
-  
-  for row_data in icu_data_reader:
+    # An incremental run puts the rows kept from the last run in front of the appended ones
+    if state is not None:
+      vaccine_dates = np.concatenate([np.array([row[0] for row in state["vaccine_rows"]], dtype="datetime64[D]"), vaccine_dates])
+      vaccine_totals = np.concatenate([np.array([row[1:] for row in state["vaccine_rows"]], dtype=np.int64).reshape(-1, 2), vaccine_totals])
+      icu_dates = np.concatenate([np.array([row[0] for row in state["pending_icu_rows"]], dtype="datetime64[D]"), icu_dates])
+      icu_counts = np.concatenate([np.array([row[1:] for row in state["pending_icu_rows"]], dtype=np.int64).reshape(-1, 3), icu_counts])
 
-    # If the row has less than required amount of fields, prints error and stops.
-    if len(row_data) < 8:
-      print(f"Row {curr_row_index} in icu_data_file has too few fields! Needs: 8, Has: ({len(row_data)})",file=sys.stderr)
-      sys.exit(1)
-    
-    # Increments current row index (this is done immediately as it tracks the current file)
-    curr_row_index += 1
-    
-    # Skips first row
-    if row_data[0] == '_id':
-      continue
-    
-    # Tries storing all the data from this row in proper formats.
-    # Prints errors if any arise.
-    # Sets values to 0 if they aren't read properly.
-    try:
-      curr_date = datetime.datetime.fromisoformat(row_data[1])
-    except ValueError:
-      if debugOn:
-        print(f"Could not convert {row_data[1]} to a date for report date (Row {curr_stored_data_index})", file=sys.stderr)
-      curr_date = datetime.datetime.min    
-    
-    try:
-      unvac_icu = int(row_data[2])
-    except ValueError:
-      if debugOn:
-        print(f"Could not convert {row_data[2]} to integer (Row {curr_stored_data_index})")
-      unvac_icu = 0
-    
-    try:
-      partial_vac_icu = int(row_data[3])
-    except ValueError:
-      if debugOn:
-        print(f"Could not convert {row_data[3]} to integer (Row {curr_stored_data_index})")
-      partial_vac_icu = 0
-    
-    try:
-      full_vac_icu = int(row_data[4])
-    except ValueError:
-      if debugOn:
-        print(f"Could not convert {row_data[4]} to integer (Row {curr_stored_data_index})")
-      full_vac_icu = 0
-
-      
-    # Potential problem: Vaccine data file starts earlier than ICU data file
-    # Solution: If the date stored at the current row index is earlier than this date, we loop through stored data list until it reaches the current date.
-    while row_date[curr_stored_data_index] - curr_date < datetime.timedelta(0):
-      if debugOn:
-        print(f"Skipping item {curr_stored_data_index} in stored data as it is dated too early ({row_date[curr_stored_data_index]} earlier than {curr_date}).", file=sys.stderr);
-      curr_stored_data_index += 1
-
-    # Potential problem: Vaccine data file starts later than ICU data file
-    # Solution: If the date stored at the current row index is later than this date, we do not increment curr_stored_data_index 
-    if row_date[curr_stored_data_index] - curr_date > datetime.timedelta(0):
-      if debugOn:
-        print(f"Skipping row {curr_row_index} in icu_data_file as it is earlier than stored vaccine data ({row_date[curr_stored_data_index]} later than {curr_date})", file=sys.stderr)
-      continue
-
-    # Increments current item being read from the stored vaccine data (this is done only once we start reading data from the vaccine data file)
-    curr_stored_data_index += 1
-
-    # Calculates percentages, sets to 0 if no people are in the category
-    if unvac_total_daily[curr_stored_data_index] != 0:
-      unvac_percentage = unvac_icu/unvac_total_daily[curr_stored_data_index]
-    else:
-      unvac_percentage = 0
-    
-    if partial_vac_total_daily[curr_stored_data_index] != 0:
-      partial_vac_percentage = partial_vac_icu/partial_vac_total_daily[curr_stored_data_index]
-    else:
-      partial_vac_percentage = 0
-
-    if full_vac_total_daily[curr_stored_data_index] != 0:
-      full_vac_percentage = full_vac_icu/full_vac_total_daily[curr_stored_data_index]
-    else:
-      full_vac_percentage = 0
-
-    # Converts decimal values to percentages, then rounds
-    unvac_percentage = round(unvac_percentage*100, OUTPUT_DECIMAL_PLACES)
-    partial_vac_percentage = round(partial_vac_percentage*100, OUTPUT_DECIMAL_PLACES)
-    full_vac_percentage = round(full_vac_percentage*100, OUTPUT_DECIMAL_PLACES)
-
-    # Prints processed data
-    print(f"{curr_date.date()},{unvac_percentage},{partial_vac_percentage},{full_vac_percentage}")
+    # Sorts the vaccine totals by date for the join
+    vaccine_dates, vaccine_totals = date_join.sort_by_date(vaccine_dates, vaccine_totals)
+
+    # In incremental mode, ICU rows from the first one dated after the latest vaccine data are held back for the next run,
+    # and appended rows dated before the last printed date are skipped (they would be printed out of order)
+    num_ready = len(icu_dates)
+    if state_file_name is not None:
+      if state is not None and state["last_date"] is not None:
+        too_old = icu_dates < np.datetime64(state["last_date"], "D")
+        metrics.reject("dated before the last processed date", np.count_nonzero(too_old))
+        icu_dates, icu_counts = icu_dates[~too_old], icu_counts[~too_old]
+
+      not_ready = icu_dates > vaccine_dates[-1] if len(vaccine_dates) else ~np.isnat(icu_dates)
+      num_ready = int(not_ready.argmax()) if not_ready.any() else len(icu_dates)
+
+    pending_icu_dates, pending_icu_counts = icu_dates[num_ready:], icu_counts[num_ready:]
+    icu_dates, icu_counts = icu_dates[:num_ready], icu_counts[:num_ready]
+
+    # Looks up the vaccine totals of every ICU date
+    matched, matched_totals = date_join.join(icu_dates, vaccine_dates, vaccine_totals, gap_policy)
+
+    metrics.reject("no vaccine data for the date", np.count_nonzero(~matched))
+
+    # Population of each vaccination group on each matched day (columns: unvaccinated, partially, fully)
+    partial_vac_total = matched_totals[:, 0]
+    full_vac_total = matched_totals[:, 1]
+    group_totals = np.column_stack([ONTARIO_POPULATION - partial_vac_total - full_vac_total, partial_vac_total, full_vac_total])
+
+    icu_counts = icu_counts[matched]
+
+    # Calculates the percentages in one pass, sets to 0 if no people are in the category, then rounds
+    with np.errstate(divide="ignore", invalid="ignore"):
+      percentages = np.where(group_totals != 0, icu_counts / group_totals, 0) * 100
+    percentages = np.round(percentages, OUTPUT_DECIMAL_PLACES)
+
+  # Opens the optional outputs requested (date index, dictionary, binary series, partition store, database)
+  try:
+    outputs = output_files.open_outputs(flags, OUTPUT_TABLE, OUTPUT_FIELDS)
+  except ValueError as err:
+    print(err, file=sys.stderr)
+    sys.exit(1)
+
+  # Prints first line of output, unless appending to the output of an earlier incremental run
+  if state is None:
+    print("date,icu_percent_unvac,icu_percent_partial_vac,icu_percent_full_vac")
+  
+  # Prints the processed data of every matched ICU row
+  with metrics.stage("write"):
+    for curr_date, (unvac_percentage, partial_vac_percentage, full_vac_percentage) in zip(
+        icu_dates[matched].tolist(), percentages.tolist()):
+      outputs.add(curr_date, unvac_percentage, partial_vac_percentage, full_vac_percentage)
+      print(f"{curr_date},{unvac_percentage},{partial_vac_percentage},{full_vac_percentage}")
+
+  # Saves the optional outputs
+  outputs.save()
+
+  # Saves the watermarks and the rows still needed for the next incremental run:
+  # the held back ICU rows, and the vaccine rows from the last one on or before the last printed date (ffill and interpolate need it)
+  if state_file_name is not None:
+    last_date = state and state["last_date"]
+    if matched.any():
+      last_date = str(max(np.datetime64(last_date or icu_dates[matched].min(), "D"), icu_dates[matched].max()))
+
+    first_kept = 0
+    if last_date is not None:
+      first_kept = max(int(np.searchsorted(vaccine_dates, np.datetime64(last_date, "D"), side="right")) - 1, 0)
+
+    sys.stdout.flush()
+    watermark.save_state(state_file_name, {
+      "vaccine": new_vaccine_watermark,
+      "icu": new_icu_watermark,
+      "last_date": last_date,
+      "vaccine_rows": [[str(date)] + totals for date, totals in zip(vaccine_dates[first_kept:], vaccine_totals[first_kept:].tolist())],
+      "pending_icu_rows": [[str(date)] + counts for date, counts in zip(pending_icu_dates, pending_icu_counts.tolist())],
+    })
+
+  metrics.finish(flags, debugOn)
 
 #
 # END OF MAIN
@@ -9,6 +9,10 @@ Functionality:
     - school_data_file (string)
     - debugOn (integer)
 
+  With --engine=hash, any number of school data files may be given before debugOn (for example several archive snapshots), and their rows are added up as if they were one file.
+
+  With --snapshots, the arguments before debugOn are folders, glob patterns or files of dated archive snapshots instead. The snapshots overlap, so the total of each collected_date and school_board is taken from the latest snapshot that has it (by file name) rather than added up.
+
   From this file, we read these fields (ignoring the rest):
     - collected_date
     - school_board
@@ -19,51 +23,165 @@ Functionality:
     - school_board
     - total_confirmed_cases
     
+  Optional flags (may be placed anywhere after the script name):
+    - --engine=rows  Original loop. Adds up consecutive rows with the same collected_date and school_board, so the file must be sorted. (default)
+    - --engine=hash  Adds up every row with the same collected_date and school_board, in any order and over several files. The output is sorted by collected_date and then school_board. --cache is not used.
+    - --max-memory=SIZE  With --engine=hash, reads the files in pieces sized to stay within SIZE bytes (e.g. 512M, 1G). Without it, the totals are spilled to disk once they hold 4 million groups.
+    - --spill-dir=folder  Where --engine=hash writes its spill files (default: the system temporary folder). Like --max-memory, requires --engine=hash.
+    - --snapshots     Consolidates a set of archive snapshots into one series, the latest snapshot winning where they overlap (see Common/snapshots.py). The output is sorted like --engine=hash. Cannot be combined with --max-memory or --spill-dir.
+    - --workers[=N]   With --snapshots, parses N snapshots at a time on worker processes (every CPU if N is not given). Without --workers, the snapshots are parsed one at a time. Cannot be used without --snapshots.
+    - --cache[=cache_dir]  Reads the input through the columnar input cache (default folder: .cache/inputs). Unchanged files skip CSV parsing.
+    - --date-index=index_file  Writes a sidecar date index of the output (name it <output_file>.dateidx so the plotting script finds it).
+    - --binary=series_file  Also writes the output rows to a fixed-width binary series file, which the plotting script can memory-map in place of the preprocessed CSV (see Common/binary_series.py).
+    - --partitions=store_folder  Also writes the output rows into a store folder partitioned by school board and month, from which the plotting script opens only the partitions it needs (see Common/partition_store.py).
+    - --sqlite=database_file  Also inserts the output rows into the question2 table of an SQLite database, indexed by date and school board, which the plotting script can query in place of the preprocessed CSV (see Common/sqlite_store.py).
+    - --dictionary=dictionary_file  Prints a small integer code instead of each school board name and saves the codes' dictionary (name it <output_file>.dict.json so the plotting script finds it, see Common/category_codes.py).
+    - --profile[=profile_file], --metrics-json=file  Reports the time spent in each stage, rows per second, rejected rows and peak memory (see Common/metrics.py).
+
   The preprocessed data can then be taken and interpreted to be plotted.
 
 To run on commandline:
 python Preprocessing/question2_preprocess.py Data/schoolrecentcovid2021_2022_2022-02-08_22-17.csv
+python Preprocessing/question2_preprocess.py Data/schoolrecentcovid2021_2022_*.csv --engine=hash
+python Preprocessing/question2_preprocess.py archive/school_snapshots/ --snapshots
+python Preprocessing/question2_preprocess.py "archive/schoolrecentcovid2021_2022_*.csv" --snapshots --workers=8
 
 '''
 # Packages/Modules #
+import os
 import sys
-import csv
 import datetime
 
+# Shared modules live in the Common folder beside this one
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+import cli_flags
+import csv_ingest
+import group_counts
+import metrics
+import output_files
+import snapshots
+
+# Constants #
+# Fields read from the school data file (header name -> type)
+SCHOOL_FIELDS = {
+  "collected_date": csv_ingest.DATE,
+  "school_board": csv_ingest.STRING,
+  "total_confirmed_cases": csv_ingest.INTEGER,
+}
+
+# Fields the hash engine groups the rows by, and the field it adds up
+SCHOOL_KEY_FIELDS = ["collected_date", "school_board"]
+SCHOOL_VALUE_FIELD = "total_confirmed_cases"
+
+# Fields of the output rows (header name -> type), as stored by --binary, --partitions and --sqlite
+OUTPUT_TABLE = "question2"
+OUTPUT_FIELDS = {
+  "collected_date": csv_ingest.DATE,
+  "school_board": csv_ingest.CATEGORY,
+  "total_confirmed_cases": csv_ingest.INTEGER,
+}
+
+# Prints the total cases of one date and school board, and adds them to the optional outputs
+def write_group(date, school_board, case_count, outputs):
+  outputs.add(date, school_board, case_count)
+  print(f"{date},{outputs.encoder.encode('school_board', school_board)},{case_count}")
+
 # Main Function #
 def main(argv):
 
+  # Separates the optional "--flag" arguments from the positional ones
+  argv, flags = cli_flags.split_flags(argv)
+  metrics.start(flags)
+  cache_dir = cli_flags.cache_dir(flags)
+
   # Checks for the right amount of arguments. 
   if len(argv) < 2:
-    print("Usage: question2_preprocess.py <school_data_file> <debugOn (optional)>")
+    print("Usage: question2_preprocess.py <school_data_file> <more school_data_files (--engine=hash only)> <debugOn (optional)> <--engine=rows|hash (optional)> <--snapshots (optional)> <--workers[=N] (optional)> <--max-memory=SIZE (optional)> <--spill-dir=folder (optional)> <--cache[=cache_dir] (optional)> <--date-index=index_file (optional)> <--dictionary=dictionary_file (optional)> <--binary=series_file (optional)> <--partitions=store_folder (optional)> <--sqlite=database_file (optional)> <--profile[=profile_file] (optional)> <--metrics-json=file (optional)>")
     sys.exit(1)
 
   # Store commandline arguments in appropriate variables
   school_data_file_name = argv[1]
 
   # Stores optional debugOn argument.
-  # This displays debug information in stderr if set to on. Major errors that cause program exit will still be displayed if it is False.
+  # This displays counts of the values that could not be converted in stderr if set to on. Major errors that cause program exit will still be displayed if it is False.
   try:
     debugOn = bool(int(argv[2]) > 0)
   except:
     debugOn = False
 
-  # Tries opening the file
+  # Stores which aggregation engine to use
+  engine = flags.get("engine", "rows")
+
+  if engine not in ("rows", "hash"):
+    print(f"Unknown engine '{engine}'! Must be one of: rows, hash", file=sys.stderr)
+    sys.exit(1)
+
+  # The latest snapshot totals are held in memory, so --snapshots has no memory budget to stay within or spill past
+  if "snapshots" in flags and ("max-memory" in flags or "spill-dir" in flags):
+    print("--max-memory and --spill-dir cannot be combined with --snapshots", file=sys.stderr)
+    sys.exit(1)
+
+  # Only snapshot parsing runs on worker processes
+  if "workers" in flags and "snapshots" not in flags:
+    print("--workers can only be used with --snapshots", file=sys.stderr)
+    sys.exit(1)
+
+  # The rows engine holds one group at a time, so it has no memory budget to stay within or spill past
+  if engine == "rows" and "snapshots" not in flags and ("max-memory" in flags or "spill-dir" in flags):
+    print("--max-memory and --spill-dir require --engine=hash", file=sys.stderr)
+    sys.exit(1)
+
+  # The hash engine adds up every row of every file given, and prints the totals sorted by date and school board
+  # In snapshot mode, the total of each date and school board comes from the latest snapshot instead
+  if engine == "hash" or "snapshots" in flags:
+    school_data_file_names, debugOn = cli_flags.data_files_and_debug(argv)
+
+    try:
+      max_memory = cli_flags.max_memory(flags)
+      workers = cli_flags.workers(flags)
+      outputs = output_files.open_outputs(flags, OUTPUT_TABLE, OUTPUT_FIELDS)
+    except ValueError as err:
+      print(err, file=sys.stderr)
+      sys.exit(1)
+
+    try:
+      with metrics.stage("aggregate"):
+        if "snapshots" in flags:
+          school_data_file_names = snapshots.find_snapshots(school_data_file_names)
+          school_cases = snapshots.latest_sums(school_data_file_names, SCHOOL_FIELDS, SCHOOL_KEY_FIELDS, SCHOOL_VALUE_FIELD, workers)
+        else:
+          school_cases = group_counts.sum_groups(school_data_file_names, SCHOOL_FIELDS, SCHOOL_KEY_FIELDS, SCHOOL_VALUE_FIELD,
+                                                 max_memory, flags.get("spill-dir"))
+    except (IOError, ValueError) as err:
+      print(f"Unable to open school_data_file(s) '{', '.join(school_data_file_names)}' : {err}", file=sys.stderr)
+      sys.exit(1)
+
+    print(f"collected_date,{outputs.encoder.header('school_board')},total_confirmed_cases")
+    for (date, school_board), total_cases in school_cases.items():
+      write_group(date, school_board, total_cases, outputs)
+    school_cases.close()
+
+    outputs.save()
+    metrics.finish(flags, debugOn)
+    return
+
+  # Tries reading the needed columns of the file
   # Prints error message if it fails
   try:
-      school_data_file = open(school_data_file_name, encoding="utf-8-sig")
-  except IOError as err:
+    columns, invalid = csv_ingest.read_columns(school_data_file_name, SCHOOL_FIELDS, cache_dir)
+  except (IOError, ValueError) as err:
     print(f"Unable to open school_data_file '{school_data_file_name}' : {err}", file=sys.stderr)
     sys.exit(1)
 
-  # Create a CSV reader to read the data file 
-  school_data_reader = csv.reader(school_data_file)
+  # Opens the optional outputs requested (date index, dictionary, binary series, partition store, database)
+  try:
+    outputs = output_files.open_outputs(flags, OUTPUT_TABLE, OUTPUT_FIELDS)
+  except ValueError as err:
+    print(err, file=sys.stderr)
+    sys.exit(1)
 
   # Prints first line of output - header
-  print("collected_date,school_board,total_confirmed_cases")
-
-  #Store the current line number
-  curr_line_num = 0
+  print(f"collected_date,{outputs.encoder.header('school_board')},total_confirmed_cases")
 
   #store current date, school board, and confirmed cases
   #to concatenate confirmed case numbers for same school board on same day
@@ -72,51 +190,34 @@ def main(argv):
   curr_case_count= 0
   
   #loop through rows in school data file
-  for row_data in school_data_reader:
-
-    # If the row has less than the required amount of fields, prints error and stops
-    if len(row_data) < 10:
-      print(f"Row {curr_line_num} in school_data_file has too few fields! Needs: 10, Has: {len(row_data)}", file=sys.stderr)
-      sys.exit(1)
-      
-    # Skips the first line
-    if row_data[0] == "collected_date":
-      # Increments current line number
-      curr_line_num += 1
-      continue
-
-    #Create variables to store required fields
-    # Tries converting data into date format 
-    try:
-      date = datetime.date.fromisoformat(row_data[0]) 
-    except ValueError:
-      if debugOn:
-        print(f"Could not convert '{row_data[0]}' to a date for collected date (Row {curr_line_num})", file=sys.stderr)
-      curr_date = datetime.date.min
-
-    # School board is stored as a string, so no conversion necessary
-    school_board = row_data[2]
-
-    # Convert total_confirmed_cases to an integer
-    try:
-      school_covid_cases = int(row_data[9])
-    except ValueError:
-      if debugOn:
-        print(f"Could not convert '{row_data[9]}' to an integer value for total confirmed cases (Row {curr_line_num}", file=sys.stderr)
-      school_covid_cases = 0
-
-    # If the date and school board are the same as the current one stored, add it to confirmed school covid cases
-    if date == curr_date and school_board == curr_school_board:
-      curr_case_count += school_covid_cases
-    else:
-      if curr_school_board != "NULL":
-        print(f"{curr_date},{curr_school_board},{curr_case_count}")
-      curr_date = date;
-      curr_school_board = school_board
-      curr_case_count = school_covid_cases
-
-      #increments current line num
-      curr_line_num += 1
+  # (total confirmed cases that could not be converted are read as 0, csv_ingest counts them for debugOn)
+  with metrics.stage("aggregate"):
+    for date, school_board, school_covid_cases, date_invalid in zip(
+        columns["collected_date"].tolist(), columns["school_board"], columns["total_confirmed_cases"].tolist(),
+        invalid["collected_date"]):
+
+      # Dates that could not be converted are stored as the earliest date
+      if date_invalid:
+        date = datetime.date.min
+
+      # If the date and school board are the same as the current one stored, add it to confirmed school covid cases
+      if date == curr_date and school_board == curr_school_board:
+        curr_case_count += school_covid_cases
+      else:
+        if curr_school_board != "NULL":
+          write_group(curr_date, curr_school_board, curr_case_count, outputs)
+        curr_date = date;
+        curr_school_board = school_board
+        curr_case_count = school_covid_cases
+
+    # Prints the last date and school board, as the hash engine does
+    if curr_school_board != "NULL":
+      write_group(curr_date, curr_school_board, curr_case_count, outputs)
+
+  # Saves the optional outputs
+  outputs.save()
+
+  metrics.finish(flags, debugOn)
 
 #
 # END OF MAIN
@@ -5,8 +5,24 @@ Last Updated: (15-03-2022)
 Functionality:
   This file will take 1 data file from the commandline argument and pre-process its data into a simpler file from which data can be read according to desired parameters. The processed data is written to standard output unless redirected into the desired file.
 
-  There is 1 commandline argument: 
+  There is 1 commandline argument and 1 optional parameter: 
     - age_data_file (string)
+    - debugOn (integer)
+
+  Optional flags (may be placed anywhere after the script name):
+    - --engine=rows      Original row-by-row loop. Requires rows to be sorted by date. Prints the same rows as the columnar engine. (default)
+    - --engine=columnar  Counts (Accurate_Episode_Date, Age_Group) pairs in pandas batches. Rows may be in any order.
+    - --workers[=N]      With --engine=columnar, splits the file into line-aligned byte ranges and counts them on N worker processes (default: every CPU, and never more than the CPUs). The output is the same as with one worker. Not used with --cache.
+    - --pipeline[=depth]  Reads and parses the file on a reader thread, up to depth chunks (default 4) ahead of the counting, and reports the backpressure in the --profile counters (see Common/pipeline.py). Used by the rows engine and the serial columnar engine.
+    - --max-memory=SIZE  With --engine=columnar, streams the file in byte ranges sized to stay within SIZE bytes (e.g. 512M, 1G), spilling the counts to disk if they outgrow it. Cannot be combined with --cache.
+    - --spill-dir=folder  Where --max-memory writes its spill files (default: the system temporary folder). Like --max-memory, requires --engine=columnar.
+    - --cache[=cache_dir]  Reads the input through the columnar input cache (default folder: .cache/inputs). Unchanged files skip CSV parsing.
+    - --date-index=index_file  Writes a sidecar date index of the output (name it <output_file>.dateidx so the plotting script finds it).
+    - --binary=series_file  Also writes the output rows to a fixed-width binary series file, which the plotting script can memory-map in place of the preprocessed CSV (see Common/binary_series.py).
+    - --partitions=store_folder  Also writes the output rows into a store folder partitioned by age group and month, from which the plotting script opens only the partitions it needs (see Common/partition_store.py).
+    - --sqlite=database_file  Also inserts the output rows into the question3 table of an SQLite database, indexed by date and age group, which the plotting script can query in place of the preprocessed CSV (see Common/sqlite_store.py).
+    - --dictionary=dictionary_file  Prints a small integer code instead of each age group label and saves the codes' dictionary (name it <output_file>.dict.json so the plotting script finds it, see Common/category_codes.py).
+    - --profile[=profile_file], --metrics-json=file  Reports the time spent in each stage, rows per second, rejected rows and peak memory (see Common/metrics.py).
 
   From this file, we read these fields:
     - age_group
@@ -20,23 +36,124 @@ Functionality:
 
 To run on commandline:
 python Preprocessing/question3_preprocess.py Data/covid_case_file/conposcovidloc.csv
+python Preprocessing/question3_preprocess.py Data/covid_case_file/conposcovidloc.csv --engine=columnar
+python Preprocessing/question3_preprocess.py Data/covid_case_file/conposcovidloc.csv --engine=columnar --workers=8
+python Preprocessing/question3_preprocess.py Data/covid_case_file/conposcovidloc.csv --engine=columnar --max-memory=512M
 
 '''
 # Packages/Modules #
+import os
 import sys
-import csv
-import datetime
+
+# Shared modules live in the Common folder beside this one
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+import cli_flags
+import csv_ingest
+import group_counts
+import metrics
+import output_files
+
+# Constants #
+# Number of rows the columnar engine reads from the case file per batch
+COLUMNAR_CHUNK_ROWS = 1000000
+
+# Number of rows the rows engine reads from the case file per chunk with --pipeline
+ROWS_CHUNK_ROWS = 200000
+
+# Header names of the fields read from the case file
+DATE_FIELD = "Accurate_Episode_Date"
+AGE_GROUP_FIELD = "Age_Group"
+
+# Fields of the output rows (header name -> type), as stored by --binary, --partitions and --sqlite
+OUTPUT_TABLE = "question3"
+OUTPUT_FIELDS = {
+  "Accurate_Episode_Date": csv_ingest.DATE,
+  "Age_Group": csv_ingest.CATEGORY,
+  "Number_of_cases": csv_ingest.INTEGER,
+}
+
+# Counts the cases for every (Accurate_Episode_Date, Age_Group) pair in batches of rows, or on several worker processes if workers > 1.
+# Rows may be in any order, the counts of each batch are added to the running total.
+# With a max_memory budget (in bytes), the batch size follows the budget and groups beyond it are spilled to spill_dir.
+# With a pipeline_depth, serial batches are parsed on a reader thread up to that many batches ahead.
+# Returns a group_counts.GroupTable whose items are ((date, age group), count), sorted by date and then age group.
+def count_cases_columnar(age_data_file_name, cache_dir=None, workers=1, max_memory=None, spill_dir=None, pipeline_depth=0):
+  column_types = {DATE_FIELD: csv_ingest.CATEGORY, AGE_GROUP_FIELD: csv_ingest.CATEGORY}
+
+  if max_memory is not None:
+    return group_counts.count_groups_bounded(age_data_file_name, column_types, max_memory, workers, spill_dir)
+
+  # The input cache is filled from one pass over the whole file, so cached reads stay serial
+  if workers > 1 and cache_dir is None:
+    return group_counts.count_groups_parallel(age_data_file_name, column_types, workers)
+
+  return group_counts.count_groups(age_data_file_name, column_types, COLUMNAR_CHUNK_ROWS, cache_dir, pipeline_depth)
+
+# Prints the case count of every age group seen on one date, in age group order (the order of the columnar engine),
+# and adds them to the optional outputs
+def write_date_counts(date, dictionary_of_ages, outputs):
+  for age_group in sorted(dictionary_of_ages):
+    outputs.add(date, age_group, dictionary_of_ages[age_group])
+    print(f"{date},{outputs.encoder.encode('Age_Group', age_group)},{dictionary_of_ages[age_group]}")
 
 # Main Function #
 def main(argv):
 
+  # Separates the optional "--flag" arguments from the positional ones
+  argv, flags = cli_flags.split_flags(argv)
+  metrics.start(flags)
+  cache_dir = cli_flags.cache_dir(flags)
+
   # Checks for the right amount of command line arguments. Final argument is optional
   if len(argv) < 2:
-    print("Usage: question3_preprocess.py <age_data_file>  <debugOn (optional)>")
+    print("Usage: question3_preprocess.py <age_data_file>  <debugOn (optional)> <--engine=rows|columnar (optional)> <--workers[=N] (optional)> <--pipeline[=depth] (optional)> <--max-memory=SIZE (optional)> <--spill-dir=folder (optional)> <--cache[=cache_dir] (optional)> <--date-index=index_file (optional)> <--dictionary=dictionary_file (optional)> <--binary=series_file (optional)> <--partitions=store_folder (optional)> <--sqlite=database_file (optional)> <--profile[=profile_file] (optional)> <--metrics-json=file (optional)>")
+    sys.exit(1)
+
+  # Stores which aggregation engine to use
+  engine = flags.get("engine", "rows")
+
+  if engine not in ("rows", "columnar"):
+    print(f"Unknown engine '{engine}'! Must be one of: rows, columnar", file=sys.stderr)
+    sys.exit(1)
+
+  # Stores how many worker processes the columnar engine counts the file on
+  try:
+    workers = cli_flags.workers(flags)
+  except ValueError as err:
+    print(f"Invalid --workers : {err}", file=sys.stderr)
+    sys.exit(1)
+
+  if workers > 1 and engine != "columnar":
+    print("--workers requires --engine=columnar", file=sys.stderr)
+    sys.exit(1)
+
+  # The rows engine holds one date at a time, so it has no memory budget to stay within or spill past
+  if engine == "rows" and ("max-memory" in flags or "spill-dir" in flags):
+    print("--max-memory and --spill-dir require --engine=columnar", file=sys.stderr)
+    sys.exit(1)
+
+  # Stores the memory budget of the columnar engine, and checks it leaves room to work in
+  try:
+    max_memory = cli_flags.max_memory(flags)
+    if max_memory is not None:
+      group_counts.plan_memory(max_memory, workers)
+  except ValueError as err:
+    print(f"Invalid --max-memory : {err}", file=sys.stderr)
+    sys.exit(1)
+
+  if max_memory is not None and cache_dir is not None:
+    print("--max-memory cannot be combined with --cache", file=sys.stderr)
+    sys.exit(1)
+
+  # Stores how many chunks the reader thread may read ahead, 0 without --pipeline
+  try:
+    pipeline_depth = cli_flags.pipeline_depth(flags)
+  except ValueError as err:
+    print(f"Invalid --pipeline : {err}", file=sys.stderr)
     sys.exit(1)
 
   # Stores optional debugOn argument.
-  # This displays debug information in stderr if set to on.   Major errors that cause program exit will still be displayed if it is False.
+  # This displays counts of what was processed in stderr if set to on.   Major errors that cause program exit will still be displayed if it is False.
   try:
     debugOn = bool(int(argv[2]) > 0)
   except:
@@ -45,73 +162,85 @@ def main(argv):
   # Stores the commandline arguments 
   age_data_file_name = argv[1]
 
-  # Tries to open the files
-  # Will notify the user if an error occurs
+  # Opens the optional outputs requested (date index, dictionary, binary series, partition store, database)
   try:
-    age_data_file = open(age_data_file_name, encoding = "utf-8-sig")
-  except IOError as err:
-    print("Unable to open outbreak_data_file '{}' : {}".format(age_data_file_name, err), file=sys.stderr)
+    outputs = output_files.open_outputs(flags, OUTPUT_TABLE, OUTPUT_FIELDS)
+  except ValueError as err:
+    print(err, file=sys.stderr)
     sys.exit(1)
 
+  #Statement declaring which field is which
+  print(f"Accurate_Episode_Date,{outputs.encoder.header('Age_Group')},Number_of_cases")
+
+  # The columnar engine counts the whole file in batches and prints every group at once
+  # Will notify the user if the file cannot be read
+  if engine == "columnar":
+    try:
+      with metrics.stage("aggregate"):
+        case_counts = count_cases_columnar(age_data_file_name, cache_dir, workers, max_memory, flags.get("spill-dir"), pipeline_depth)
+    except (IOError, ValueError) as err:
+      print("Unable to read age_data_file '{}' : {}".format(age_data_file_name, err), file=sys.stderr)
+      sys.exit(1)
 
-  # Create csv reader to read the data file
-  age_data_reader = csv.reader(age_data_file)
+    with metrics.stage("write"):
+      for (date, age_group), number_of_cases in case_counts.items():
+        outputs.add(date, age_group, number_of_cases)
+        print(f"{date},{outputs.encoder.encode('Age_Group', age_group)},{number_of_cases}")
+    case_counts.close()
 
-  # Creates variables to keep track of the current line number and rows in timeframe
-  current_row_index = 0
-  
-  #Statement declaring which field is which
-  print("Accurate_Episode_Date,Age_Group,Number_of_cases")
+    outputs.save()
+    metrics.finish(flags, debugOn)
+    return
+
+  # Reads the date and age group columns of the data file
+  # With --pipeline, the file is read in chunks by a reader thread while the rows of earlier chunks are counted
+  # Will notify the user if an error occurs
+  try:
+    case_fields = {DATE_FIELD: csv_ingest.STRING, AGE_GROUP_FIELD: csv_ingest.STRING}
+    if pipeline_depth:
+      chunks = csv_ingest.iter_columns(age_data_file_name, case_fields, ROWS_CHUNK_ROWS, cache_dir, prefetch=pipeline_depth)
+    else:
+      chunks = [csv_ingest.read_columns(age_data_file_name, case_fields, cache_dir)]
+  except (IOError, ValueError) as err:
+    print("Unable to read age_data_file '{}' : {}".format(age_data_file_name, err), file=sys.stderr)
+    sys.exit(1)
 
   #Creating variables to store data
-  last_row_date = "NONE";
+  last_row_date = None
   dictionary_of_ages = {}
  
-  #Loops through the case data reader, stores the required fields into its respective list 
-  for row in age_data_reader:
-    
-    #Check for if the current row contains the correct amount of fields. Will terminate if the amount is less 
-    if len(row) < 18:
-      print(f"Row {current_row_index} contains too few fields. The row requires 18 but currently contains: ({len(row)})", file=sys.stderr)
+  #Loops through the dates and age groups of the case data, one row at a time
+  with metrics.stage("aggregate"):
+    try:
+      for columns, invalid in chunks:
+        for current_row_date, age_group in zip(columns[DATE_FIELD], columns[AGE_GROUP_FIELD]):
+
+          # When the date changes, prints the counts of the previous date and starts counting the new one
+          if current_row_date != last_row_date:
+            if last_row_date is not None:
+              metrics.count("date changes")
+              write_date_counts(last_row_date, dictionary_of_ages, outputs)
+            dictionary_of_ages = {}
+
+          # If age range has not been seen previously, adds it to the dictionary, otherwise increments the age ranges cases by 1
+          if age_group not in dictionary_of_ages:
+            dictionary_of_ages[age_group] = 1
+          else:
+            dictionary_of_ages[age_group] += 1
+
+          #Saves the current date as last date
+          last_row_date = current_row_date
+    except (IOError, ValueError) as err:
+      print("Unable to read age_data_file '{}' : {}".format(age_data_file_name, err), file=sys.stderr)
       sys.exit(1)
 
-    #Skips the first line
-    if row[0] == "Row_ID":
-      current_row_index += 1
-      continue
-
-    # Saves current date
-    current_row_date = row[1]
-
-    #Assigning last_row_date for the first instance
-    if (current_row_index == 1):
-      last_row_date = current_row_date
-      
-    # Checks if it's the same date as now
-    if debugOn:
-      print(f"Checking row {current_row_index}", file=sys.stderr)
-    if current_row_date == last_row_date:
-
-      # If age range has not been seen previously, adds it to the dictionary, otherwise increments the age ranges cases by 1
-      if row[5] not in dictionary_of_ages.keys():
-        dictionary_of_ages[row[5]] = 1
-      else:
-        dictionary_of_ages[row[5]] += 1
-        
-    else:
-      if debugOn:
-        print("Date is NOT the same!", file=sys.stderr)
-        
-      for key in dictionary_of_ages.keys():
-        print(f"{current_row_date},{key},{dictionary_of_ages[key]}")
-        
-        if debugOn:
-          print(f"Resetting age range {key} for date {current_row_date}")
-          
-        dictionary_of_ages[key] = 0
-
-    #Increments the row index and saves the current date as last date
-    current_row_index += 1;
-    last_row_date = current_row_date
+    # Prints the counts of the last date
+    if last_row_date is not None:
+      write_date_counts(last_row_date, dictionary_of_ages, outputs)
+
+  # Saves the optional outputs
+  outputs.save()
+
+  metrics.finish(flags, debugOn)
      
 main(sys.argv)
@@ -8,6 +8,8 @@ Functionality:
   There is 1 commandline argument: 
     - outbreaks_data_file (string)
 
+  With --engine=hash, any number of outbreak data files may be given before debugOn (for example several archive snapshots), and their rows are added up as if they were one file.
+
   From this file, we read these fields:
     - Date
     - phu_name
@@ -18,104 +20,248 @@ Functionality:
     - phu_name
     - number_of_outbreaks
 
+  Optional flags (may be placed anywhere after the script name):
+    - --engine=rows  Original loop. Adds up consecutive rows with the same date and phu_name, so the file must be sorted. (default)
+    - --engine=hash  Adds up every row with the same date and phu_name, in any order and over several files. The output is sorted by date and then phu_name. --cache is not used, and it cannot be combined with --incremental.
+    - --pipeline[=depth]  Reads and parses the file on a reader thread, up to depth chunks (default 4) ahead of the adding up, and reports the backpressure in the --profile counters (see Common/pipeline.py). Used by the rows engine.
+    - --max-memory=SIZE  With --engine=hash, reads the files in pieces sized to stay within SIZE bytes (e.g. 512M, 1G). Without it, the totals are spilled to disk once they hold 4 million groups.
+    - --spill-dir=folder  Where --engine=hash writes its spill files (default: the system temporary folder). Like --max-memory, requires --engine=hash.
+    - --cache[=cache_dir]  Reads the input through the columnar input cache (default folder: .cache/inputs). Unchanged files skip CSV parsing.
+    - --date-index=index_file  Writes a sidecar date index of the output (name it <output_file>.dateidx so the plotting script finds it).
+    - --binary=series_file  Also writes the output rows to a fixed-width binary series file, which the plotting script can memory-map in place of the preprocessed CSV (see Common/binary_series.py).
+    - --partitions=store_folder  Also writes the output rows into a store folder partitioned by PHU and month, from which the plotting script opens only the partitions it needs (see Common/partition_store.py).
+    - --sqlite=database_file  Also inserts the output rows into the question4 table of an SQLite database, indexed by date and PHU, which the plotting script can query in place of the preprocessed CSV (see Common/sqlite_store.py).
+    - --dictionary=dictionary_file  Prints a small integer code instead of each PHU name and saves the codes' dictionary (name it <output_file>.dict.json so the plotting script finds it, see Common/category_codes.py).
+    - --profile[=profile_file], --metrics-json=file  Reports the time spent in each stage, rows per second, rejected rows and peak memory (see Common/metrics.py).
+    - --incremental=state_file  Processes only the rows appended to outbreak_data_file since the last run with the same state file, and prints only the new output rows (append them with >>). The group still being added to at the end of the file is kept in the state file until it is finished.
+
   The preprocessed data can then be taken and interpreted to be plotted.
 
 To run on commandline:
 
 python Preprocessing/question4_preprocess.py Data/ongoing_outbreaks_phu.csv > question4_preproceseed.csv
+python Preprocessing/question4_preprocess.py Data/ongoing_outbreaks_phu.csv --incremental=question4_state.json >> question4_preproceseed.csv
+python Preprocessing/question4_preprocess.py archive/ongoing_outbreaks_phu_*.csv --engine=hash > question4_preproceseed.csv
 
 '''
 # Packages/Modules #
+import os
 import sys
-import csv
 import datetime
 
+# Shared modules live in the Common folder beside this one
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+import cli_flags
+import csv_ingest
+import group_counts
+import metrics
+import output_files
+import watermark
+
+# Constants #
+# Fields read from the outbreak data file (header name -> type)
+OUTBREAK_FIELDS = {
+  "date": csv_ingest.DATE,
+  "phu_name": csv_ingest.STRING,
+  "number_ongoing_outbreaks": csv_ingest.INTEGER,
+}
+
+# Fields the hash engine groups the rows by, and the field it adds up
+OUTBREAK_KEY_FIELDS = ["date", "phu_name"]
+OUTBREAK_VALUE_FIELD = "number_ongoing_outbreaks"
+
+# Fields of the output rows (header name -> type), as stored by --binary, --partitions and --sqlite
+OUTPUT_TABLE = "question4"
+OUTPUT_FIELDS = {
+  "date": csv_ingest.DATE,
+  "phu_name": csv_ingest.CATEGORY,
+  "number_of_outbreaks": csv_ingest.INTEGER,
+}
+
+# Number of rows read from the outbreak data file per chunk with --pipeline
+PIPELINE_CHUNK_ROWS = 200000
+
+# Prints the outbreak total of one date and PHU, and adds it to the optional outputs
+def write_group(date, phu_name, number_of_outbreaks, outputs):
+  outputs.add(date, phu_name, number_of_outbreaks)
+  print(f"{date},{outputs.encoder.encode_quoted('phu_name', phu_name)},{number_of_outbreaks}")
+
 # Main Function #
 def main(argv):
+
+  # Separates the optional "--flag" arguments from the positional ones
+  argv, flags = cli_flags.split_flags(argv)
+  metrics.start(flags)
+  cache_dir = cli_flags.cache_dir(flags)
   
   # Checks for the right amount of command line arguments. Final argument is optional
   if len(argv) < 2:
-    print("Usage: question4_preprocess.py <outbreak_data_file> <debugOn (optional)>")
+    print("Usage: question4_preprocess.py <outbreak_data_file> <more outbreak_data_files (--engine=hash only)> <debugOn (optional)> <--engine=rows|hash (optional)> <--pipeline[=depth] (optional)> <--max-memory=SIZE (optional)> <--spill-dir=folder (optional)> <--cache[=cache_dir] (optional)> <--date-index=index_file (optional)> <--dictionary=dictionary_file (optional)> <--binary=series_file (optional)> <--partitions=store_folder (optional)> <--sqlite=database_file (optional)> <--incremental=state_file (optional)> <--profile[=profile_file] (optional)> <--metrics-json=file (optional)>")
     sys.exit(1)
     
   # Stores the commandline arguments 
   outbreak_data_file_name = argv[1]
 
   # Stores optional debugOn argument.
-  # This displays debug information in stderr if set to on. Major errors that cause program exit will still be displayed if it is False.
+  # This displays counts of the rows that were skipped or could not be converted in stderr if set to on. Major errors that cause program exit will still be displayed if it is False.
   try:
     debugOn = bool(int(argv[2]) > 0)
   except:
     debugOn = False
 
-  #Tries to open the files
+  # Stores which aggregation engine to use
+  engine = flags.get("engine", "rows")
+
+  if engine not in ("rows", "hash"):
+    print(f"Unknown engine '{engine}'! Must be one of: rows, hash", file=sys.stderr)
+    sys.exit(1)
+
+  # The rows engine holds one group at a time, so it has no memory budget to stay within or spill past
+  if engine == "rows" and ("max-memory" in flags or "spill-dir" in flags):
+    print("--max-memory and --spill-dir require --engine=hash", file=sys.stderr)
+    sys.exit(1)
+
+  # The hash engine adds up every row of every file given, and prints the totals sorted by date and PHU
+  if engine == "hash":
+    outbreak_data_file_names, debugOn = cli_flags.data_files_and_debug(argv)
+
+    if "incremental" in flags:
+      print("--incremental cannot be combined with --engine=hash", file=sys.stderr)
+      sys.exit(1)
+
+    try:
+      max_memory = cli_flags.max_memory(flags)
+      outputs = output_files.open_outputs(flags, OUTPUT_TABLE, OUTPUT_FIELDS)
+    except ValueError as err:
+      print(err, file=sys.stderr)
+      sys.exit(1)
+
+    try:
+      with metrics.stage("aggregate"):
+        phu_outbreaks = group_counts.sum_groups(outbreak_data_file_names, OUTBREAK_FIELDS, OUTBREAK_KEY_FIELDS, OUTBREAK_VALUE_FIELD,
+                                                max_memory, flags.get("spill-dir"))
+    except (IOError, ValueError) as err:
+      print("Unable to open outbreak_data_file(s) '{}' : {}".format(", ".join(outbreak_data_file_names), err), file=sys.stderr)
+      sys.exit(1)
+
+    print(f"date,{outputs.encoder.header('phu_name')},number_of_outbreaks")
+    for (date, name), number_of_outbreaks in phu_outbreaks.items():
+      write_group(date, name, number_of_outbreaks, outputs)
+    phu_outbreaks.close()
+
+    outputs.save()
+    metrics.finish(flags, debugOn)
+    return
+
+  # Stores how many chunks the reader thread may read ahead, 0 without --pipeline
+  try:
+    pipeline_depth = cli_flags.pipeline_depth(flags)
+  except ValueError as err:
+    print(f"Invalid --pipeline : {err}", file=sys.stderr)
+    sys.exit(1)
+
+  # Loads the state of the last incremental run (None on the first run)
+  # The cache, the date index, the dictionary, the series file, the partition store and the database always cover the whole file, so they are not used in incremental mode
+  state_file_name = flags.get("incremental")
+  state = None
+  if state_file_name is True or (state_file_name is not None and ("date-index" in flags or "dictionary" in flags or "binary" in flags or "partitions" in flags or "sqlite" in flags)):
+    print("--incremental needs a state file name and cannot be combined with --date-index, --dictionary, --binary, --partitions or --sqlite", file=sys.stderr)
+    sys.exit(1)
+  if state_file_name is not None:
+    cache_dir = None
+    try:
+      state = watermark.load_state(state_file_name)
+    except (IOError, ValueError) as err:
+      print("Unable to read state_file '{}' : {}".format(state_file_name, err), file=sys.stderr)
+      sys.exit(1)
+
+  #Tries to read the needed columns of the file (in incremental mode, only the rows appended since the last run)
+  #With --pipeline, the file is read in chunks by a reader thread while the rows of earlier chunks are added up
   #Will notify the user if an error occurs
   try:
-    outbreak_data_file = open(outbreak_data_file_name, encoding = "utf-8-sig")
-  except IOError as err:
+    byte_range = None
+    if state_file_name is not None:
+      byte_range, new_watermark = watermark.appended_range(outbreak_data_file_name, state and state["outbreaks"])
+    if pipeline_depth:
+      chunks = csv_ingest.iter_columns(outbreak_data_file_name, OUTBREAK_FIELDS, PIPELINE_CHUNK_ROWS, cache_dir, byte_range, pipeline_depth)
+    else:
+      chunks = [csv_ingest.read_columns(outbreak_data_file_name, OUTBREAK_FIELDS, cache_dir, byte_range)]
+  except (IOError, ValueError) as err:
     print("Unable to open outbreak_data_file '{}' : {}".format(outbreak_data_file_name, err), file=sys.stderr)
     sys.exit(1)
 
-  # Create csv reader to read the data file
-  outbreak_data_reader = csv.reader(outbreak_data_file)
-  
-  # To keep track of the current row index
-  current_index = 0
-  
-  # Prints first row of output (column headers)
-  print("date,phu_name,number_of_outbreaks")
+  # Opens the optional outputs requested (date index, dictionary, binary series, partition store, database)
+  try:
+    outputs = output_files.open_outputs(flags, OUTPUT_TABLE, OUTPUT_FIELDS)
+  except ValueError as err:
+    print(err, file=sys.stderr)
+    sys.exit(1)
+
+  # Prints first row of output (column headers), unless appending to the output of an earlier incremental run
+  if state is None:
+    print(f"date,{outputs.encoder.header('phu_name')},number_of_outbreaks")
 
   # Stores the current date, PHU, and outbreak count 
   # to concatenate different outbreak counts for the same PHU on the same day
+  # (an incremental run continues the group left open by the last run)
   current_date = datetime.date.min
   current_phu_name = "NULL_PHU"
   current_phu_outbreaks = 0
+  if state is not None:
+    current_date = datetime.date.fromisoformat(state["open_group"]["date"])
+    current_phu_name = state["open_group"]["phu_name"]
+    current_phu_outbreaks = state["open_group"]["number_of_outbreaks"]
   
-  # Loops through the case data reader, stores the required fields into its respective list 
-  for row_data_fields in outbreak_data_reader:
+  # Loops through the rows of the outbreak data
+  # (outbreak counts that could not be converted are read as 0, csv_ingest counts them for debugOn)
+  with metrics.stage("aggregate"):
+    try:
+      for columns, invalid in chunks:
+        for date, name, number_of_outbreaks, date_invalid in zip(
+            columns["date"].tolist(), columns["phu_name"], columns["number_ongoing_outbreaks"].tolist(),
+            invalid["date"]):
 
-    
-    # Check for if the current row_data_fields contains at least the correct amount of fields. Will terminate if the amount is less 
-    if len(row_data_fields) < 5 :
-      print(f"Row {current_index} contains too few fields. The row_data_fields requires 5 but currently contains: ({len(row_data_fields)})", file=sys.stderr)
+          # Dates that could not be converted are stored as the earliest date
+          if date_invalid:
+            date = datetime.date.min
+
+          # Appended rows dated before the open group would be printed out of order, so they are skipped
+          if state is not None and date < current_date:
+            metrics.reject("dated before the last processed date")
+            continue
+
+          # If the date and PHU are the same as the current cached one, adds to its outbreak total
+          if date == current_date and name == current_phu_name:
+            current_phu_outbreaks += number_of_outbreaks
+          else:
+            if current_phu_name != "NULL_PHU":
+              write_group(current_date, current_phu_name, current_phu_outbreaks, outputs)
+            current_date = date
+            current_phu_name = name
+            current_phu_outbreaks = number_of_outbreaks
+    except (IOError, ValueError) as err:
+      print("Unable to open outbreak_data_file '{}' : {}".format(outbreak_data_file_name, err), file=sys.stderr)
       sys.exit(1)
-    
-    # Skips the first line
-    if row_data_fields[0] == "date":
-      current_index += 1
-      continue
-      
-    # Creating variables to store the 3 fields required
-    try:
-      date = datetime.date.fromisoformat(row_data_fields[0])
-    except ValueError:
-      if debugOn == True:
-        print(f"Could not convert '{row_data_fields[0]}' to a date value for (Row {current_index})", file=sys.stderr)
-        date = datetime.date.min
-      
-    name = row_data_fields[1]
 
-    try:
-      number_of_outbreaks = int(row_data_fields[4])
-    except ValueError:
-      if debugOn == True:
-        print(f"Could not convert '{row_data_fields[4]}' to an integer value for outbreak count (Row {current_index})", file=sys.stderr)
-      number_of_outbreaks = 0
-      
-
-    # If the date and PHU are the same as the current cached one, adds to its outbreak total
-    if date == current_date and name == current_phu_name:
-      current_phu_outbreaks += number_of_outbreaks
-    else:
-      if current_phu_name != "NULL_PHU":
-        print(f"{current_date},\"{current_phu_name}\",{current_phu_outbreaks}")
-      current_date = date
-      current_phu_name = name
-      current_phu_outbreaks = number_of_outbreaks
+    # Prints the last date and PHU, as the hash engine does.
+    # An incremental run leaves it open instead: rows appended before the next run may still add to it, and the output
+    # can only be appended to, so it is printed by the run that closes it.
+    if current_phu_name != "NULL_PHU" and state_file_name is None:
+      write_group(current_date, current_phu_name, current_phu_outbreaks, outputs)
+
+  # Saves the optional outputs
+  outputs.save()
 
+  # Saves the watermark and the open group for the next incremental run
+  if state_file_name is not None:
+    sys.stdout.flush()
+    watermark.save_state(state_file_name, {
+      "outbreaks": new_watermark,
+      "last_date": str(current_date),
+      "open_group": {"date": str(current_date), "phu_name": current_phu_name, "number_of_outbreaks": current_phu_outbreaks},
+    })
 
-    # Increments current row index
-    current_index += 1
+  metrics.finish(flags, debugOn)
 
 #
 # END OF MAIN
@@ -0,0 +1,317 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Runs the whole project (the 4 preprocessing scripts and the 4 plotting scripts) in a single python process, instead of the 8 separate python invocations listed in this README. The heavy libraries (numpy, pandas, seaborn, matplotlib) are imported once, and each script is then run in-process with its usual commandline arguments.
+
+  The steps form a dependency graph: each plotting step depends on the preprocessing step of the same question. Questions do not depend on each other, so with --jobs greater than 1 they run at the same time on a pool of worker processes (forked after the imports, so the workers do not import the libraries again).
+
+  A step is skipped when it is up to date, like make, but using hashes instead of modification times. Before running a step, a key is built from the SHA-256 of the script, the SHA-256 of every module in the Common folder (the scripts import them), the SHA-256 of every input file, and the step's arguments. If the key matches the one stored after the step last succeeded and every output file still exists, the step is not run again. The keys are stored in <output_folder>/.run_all_stamps.json.
+
+  There is 1 optional commandline argument:
+    - debugOn (integer)
+
+  Optional flags (may be placed anywhere after the script name):
+    - --data=data_folder      Folder holding the input data files (default: Data)
+    - --output=output_folder  Folder the preprocessed files, plotting files and plots are written to (default: the current folder)
+    - --jobs=N                Number of worker processes (default: the number of CPUs). --jobs=1 runs every step in this process.
+    - --force                 Runs every step, even the ones that are up to date
+    - --cache[=cache_dir]     Passed on to every step (see the README)
+
+  The steps use the example arguments from the README. The question 4 plotting script always saves its plot as plot4.svg in the current folder, so every step runs with the output folder as its current folder.
+
+To run on commandline:
+python run_all.py
+python run_all.py --output=results --jobs=4 1
+'''
+
+# Packages/Modules #
+import os
+import sys
+import json
+import runpy
+import hashlib
+import contextlib
+import multiprocessing
+import concurrent.futures
+
+# The heavy libraries are imported once here, so the steps (and the forked workers) find them already loaded.
+# No step shows its figures, so the non-interactive Agg backend is used.
+import numpy
+import pandas
+import matplotlib
+matplotlib.use("Agg")
+import seaborn
+from matplotlib import pyplot as plt
+
+# Shared modules live in the Common folder beside this file
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+COMMON_DIR = os.path.join(REPO_DIR, "Common")
+sys.path.insert(0, COMMON_DIR)
+import cli_flags
+import input_cache
+
+
+# Constants #
+# Name of the file in the output folder holding the key of every step that succeeded
+STAMPS_FILE_NAME = ".run_all_stamps.json"
+
+# Folder where the digests of the input files are remembered (shared with the columnar input cache)
+DIGESTS_DIR = cli_flags.DEFAULT_CACHE_DIR
+
+# Input data files, relative to the data folder
+VACCINE_DATA_FILE = "vaccine_doses_given.csv"
+ICU_DATA_FILE = "icu_data_by_vac_status.csv"
+SCHOOL_DATA_FILE = "schoolrecentcovid2021_2022_2022-02-08_22-17.csv"
+CASE_DATA_FILE = os.path.join("covid_case_file", "conposcovidloc.csv")
+OUTBREAK_DATA_FILE = "ongoing_outbreaks_phu.csv"
+
+
+# One script run in the pipeline.
+#   script   path of the script, relative to the repository
+#   args     commandline arguments after the script name. Files are named by their role: ("data", name) or ("output", name).
+#   inputs   files read by the step, as ("data", name) or ("output", name)
+#   outputs  files written by the step, as ("output", name)
+#   stdout   file the step's standard output is written to (the preprocessing scripts print their output), or None
+#   deps     names of the steps that must finish first
+class Step:
+
+  def __init__(self, name, script, args, inputs, outputs, stdout=None, deps=()):
+    self.name = name
+    self.script = script
+    self.args = args
+    self.inputs = inputs
+    self.outputs = outputs
+    self.stdout = stdout
+    self.deps = deps
+
+
+# Returns the steps of the pipeline, in an order where every step comes after its dependencies
+def build_steps():
+  return [
+    Step("question1_preprocess", os.path.join("Preprocessing", "question1_preprocess.py"),
+         [("data", VACCINE_DATA_FILE), ("data", ICU_DATA_FILE)],
+         [("data", VACCINE_DATA_FILE), ("data", ICU_DATA_FILE)],
+         [("output", "question1_preprocessed.csv")], stdout=("output", "question1_preprocessed.csv")),
+    Step("question1_plotting", os.path.join("Plotting", "question1_plotting.py"),
+         [("output", "question1_preprocessed.csv"), ("output", "question1_plotted_data.csv"), "2020", "8", "10", "2022", "3", "10", ("output", "plot1.pdf")],
+         [("output", "question1_preprocessed.csv")],
+         [("output", "question1_plotted_data.csv"), ("output", "plot1.pdf")], deps=("question1_preprocess",)),
+
+    Step("question2_preprocess", os.path.join("Preprocessing", "question2_preprocess.py"),
+         [("data", SCHOOL_DATA_FILE)],
+         [("data", SCHOOL_DATA_FILE)],
+         [("output", "question2_preprocessed.csv")], stdout=("output", "question2_preprocessed.csv")),
+    Step("question2_plotting", os.path.join("Plotting", "question2_plotting.py"),
+         [("output", "question2_preprocessed.csv"), ("output", "question2_plotted_data.csv"), "2020", "8", "10", "2022", "3", "10", "Peel District School Board", ("output", "plot2.pdf")],
+         [("output", "question2_preprocessed.csv")],
+         [("output", "question2_plotted_data.csv"), ("output", "plot2.pdf")], deps=("question2_preprocess",)),
+
+    Step("question3_preprocess", os.path.join("Preprocessing", "question3_preprocess.py"),
+         [("data", CASE_DATA_FILE)],
+         [("data", CASE_DATA_FILE)],
+         [("output", "question3_preprocessed.csv")], stdout=("output", "question3_preprocessed.csv")),
+    Step("question3_plotting", os.path.join("Plotting", "question3_plotting.py"),
+         [("output", "question3_preprocessed.csv"), ("output", "question3_plotted_data.csv"), "2021", "8", "10", "2022", "1", "29", ("output", "plot3.pdf")],
+         [("output", "question3_preprocessed.csv")],
+         [("output", "question3_plotted_data.csv"), ("output", "plot3.pdf")], deps=("question3_preprocess",)),
+
+    Step("question4_preprocess", os.path.join("Preprocessing", "question4_preprocess.py"),
+         [("data", OUTBREAK_DATA_FILE)],
+         [("data", OUTBREAK_DATA_FILE)],
+         [("output", "question4_preprocessed.csv")], stdout=("output", "question4_preprocessed.csv")),
+    Step("question4_plotting", os.path.join("Plotting", "question4_plotting.py"),
+         [("output", "question4_preprocessed.csv"), ("output", "question4_plotted_data.csv"), "2020", "11", "01", "2023", "11", "01", "TORONTO", "CITY OF OTTAWA", "NIAGARA REGION", ("output", "plot4.pdf")],
+         [("output", "question4_preprocessed.csv")],
+         [("output", "question4_plotted_data.csv"), ("output", "plot4.svg")], deps=("question4_preprocess",)),
+  ]
+
+
+# Returns the absolute path of a ("data", name) or ("output", name) file, or the argument itself if it is not a file
+def resolve(arg, folders):
+  if isinstance(arg, tuple):
+    role, name = arg
+    return os.path.abspath(os.path.join(folders[role], name))
+  return arg
+
+
+# Returns the key of a step: the SHA-256 of its script, of the shared modules in Common it imports, of its input files, and its arguments.
+# Returns None if an input file is missing (the step then always runs, and reports the missing file itself).
+def step_key(step, argv, folders):
+  try:
+    input_digests = [input_cache.file_digest(resolve(arg, folders), DIGESTS_DIR) for arg in step.inputs]
+    common_digests = input_cache.module_digests(COMMON_DIR, DIGESTS_DIR)
+  except OSError:
+    return None
+
+  key_fields = {
+    "script": input_cache.file_digest(os.path.join(REPO_DIR, step.script), DIGESTS_DIR),
+    "common": common_digests,
+    "inputs": input_digests,
+    "argv": argv,
+  }
+  return hashlib.sha256(json.dumps(key_fields, sort_keys=True).encode()).hexdigest()
+
+
+# Runs one script in this process with the given argv, from inside the output folder.
+# The standard output is written to stdout_file_name if given; it replaces that file only once the script succeeds.
+# Returns the exit code of the script (0 if it returned normally).
+def run_script(script_path, argv, output_dir, stdout_file_name=None):
+  exit_code = 0
+  saved_argv = sys.argv
+  saved_cwd = os.getcwd()
+  temp_file_name = None if stdout_file_name is None else stdout_file_name + ".tmp"
+
+  with contextlib.ExitStack() as stack:
+    if temp_file_name is not None:
+      stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(temp_file_name, "w", encoding="utf-8"))))
+
+    try:
+      sys.argv = [script_path] + argv
+      os.chdir(output_dir)
+      runpy.run_path(script_path, run_name="__main__")
+    except SystemExit as err:
+      exit_code = err.code if isinstance(err.code, int) else (0 if err.code is None else 1)
+    finally:
+      sys.argv = saved_argv
+      os.chdir(saved_cwd)
+      # The scripts never close their figures, so they are closed here to keep memory flat between steps
+      plt.close("all")
+
+  if temp_file_name is not None:
+    if exit_code == 0:
+      os.replace(temp_file_name, stdout_file_name)
+    else:
+      os.remove(temp_file_name)
+
+  return exit_code
+
+
+# Main Function #
+def main(argv):
+
+  # Separates the optional "--flag" arguments from the positional ones
+  argv, flags = cli_flags.split_flags(argv)
+
+  # Stores optional debugOn argument.
+  # This displays why each step is run in stderr if set to on. It is not passed on to the steps.
+  try:
+    debugOn = bool(int(argv[1]) > 0)
+  except:
+    debugOn = False
+
+  folders = {
+    "data": os.path.abspath(flags.get("data", os.path.join(REPO_DIR, "Data"))),
+    "output": os.path.abspath(flags.get("output", os.getcwd())),
+  }
+
+  try:
+    jobs = int(flags.get("jobs", os.cpu_count() or 1))
+    if jobs < 1:
+      raise ValueError
+  except ValueError:
+    print("Usage: run_all.py <debugOn (optional)> <--data=data_folder (optional)> <--output=output_folder (optional)> <--jobs=N (optional)> <--force (optional)> <--cache[=cache_dir] (optional)>")
+    sys.exit(1)
+
+  # Flags passed on to every step
+  step_flags = ["--cache" if flags["cache"] is True else "--cache=" + flags["cache"]] if "cache" in flags else []
+
+  os.makedirs(folders["output"], exist_ok=True)
+  stamps_file_name = os.path.join(folders["output"], STAMPS_FILE_NAME)
+  try:
+    with open(stamps_file_name) as stamps_file:
+      stamps = json.load(stamps_file)
+  except (IOError, ValueError):
+    stamps = {}
+
+  steps = build_steps()
+  waiting = list(steps)
+  running = {}
+  done = set()
+  failed = set()
+  pending_keys = {}
+
+  # Forked workers start with the libraries already imported
+  pool = None
+  if jobs > 1:
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+    pool = concurrent.futures.ProcessPoolExecutor(max_workers=jobs, mp_context=context)
+
+  try:
+    while waiting or running:
+
+      # Starts (or skips) every step whose dependencies have finished
+      for step in list(waiting):
+        if any(dep in failed for dep in step.deps):
+          print(f"{step.name}: not run, a step it depends on failed", file=sys.stderr)
+          waiting.remove(step)
+          failed.add(step.name)
+          continue
+        if not all(dep in done for dep in step.deps):
+          continue
+
+        waiting.remove(step)
+        step_argv = [resolve(arg, folders) for arg in step.args] + step_flags
+        key = step_key(step, step_argv, folders)
+        outputs_exist = all(os.path.exists(resolve(output, folders)) for output in step.outputs)
+
+        if not flags.get("force") and key is not None and stamps.get(step.name) == key and outputs_exist:
+          print(f"{step.name}: up to date")
+          done.add(step.name)
+          continue
+
+        if debugOn:
+          reason = "no stored key" if step.name not in stamps else ("outputs missing" if not outputs_exist else "code, inputs or arguments changed")
+          print(f"{step.name}: running ({'forced' if flags.get('force') else reason})", file=sys.stderr)
+
+        pending_keys[step.name] = key
+        script_path = os.path.join(REPO_DIR, step.script)
+        stdout_file_name = None if step.stdout is None else resolve(step.stdout, folders)
+
+        if pool is None:
+          running[step.name] = run_script(script_path, step_argv, folders["output"], stdout_file_name)
+        else:
+          running[step.name] = pool.submit(run_script, script_path, step_argv, folders["output"], stdout_file_name)
+
+      # Waits for at least one running step to finish
+      if pool is not None and running:
+        concurrent.futures.wait(running.values(), return_when=concurrent.futures.FIRST_COMPLETED)
+
+      for name in list(running):
+        result = running[name]
+        if pool is not None:
+          if not result.done():
+            continue
+          try:
+            result = result.result()
+          except Exception as err:
+            print(f"{name}: {err}", file=sys.stderr)
+            result = 1
+        del running[name]
+
+        if result != 0:
+          print(f"{name}: failed (exit code {result})", file=sys.stderr)
+          stamps.pop(name, None)
+          failed.add(name)
+          continue
+
+        print(f"{name}: done")
+        done.add(name)
+        if pending_keys[name] is not None:
+          stamps[name] = pending_keys[name]
+
+      # Stores the keys after every round, so an interrupted run keeps the steps that already succeeded
+      input_cache.write_atomically(stamps_file_name, lambda temp_file: temp_file.write(json.dumps(stamps, indent=1).encode()))
+  finally:
+    if pool is not None:
+      pool.shutdown()
+
+  if failed:
+    sys.exit(1)
+
+#
+# END OF MAIN
+#
+
+# Run Main
+main(sys.argv)
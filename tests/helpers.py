@@ -0,0 +1,116 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Shared helpers of the tests: paths of the scripts, running a script as the commandline would, and writing small input files in the layout of the Ontario data files.
+
+Example:
+  case_file_name = helpers.write_case_file(str(tmp_path), [("2021-01-01", "20s"), ("2021-01-02", "30s")])
+  output_lines = helpers.run_script(helpers.QUESTION3_PREPROCESS, case_file_name, "--engine=columnar")
+'''
+
+# Packages/Modules #
+import os
+import sys
+import subprocess
+
+
+# Constants #
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Scripts under test
+QUESTION1_PREPROCESS = os.path.join(REPO_DIR, "Preprocessing", "question1_preprocess.py")
+QUESTION2_PREPROCESS = os.path.join(REPO_DIR, "Preprocessing", "question2_preprocess.py")
+QUESTION3_PREPROCESS = os.path.join(REPO_DIR, "Preprocessing", "question3_preprocess.py")
+QUESTION4_PREPROCESS = os.path.join(REPO_DIR, "Preprocessing", "question4_preprocess.py")
+QUESTION1_PLOTTING = os.path.join(REPO_DIR, "Plotting", "question1_plotting.py")
+QUESTION2_PLOTTING = os.path.join(REPO_DIR, "Plotting", "question2_plotting.py")
+QUESTION3_PLOTTING = os.path.join(REPO_DIR, "Plotting", "question3_plotting.py")
+QUESTION4_PLOTTING = os.path.join(REPO_DIR, "Plotting", "question4_plotting.py")
+
+# Folder of the shared modules, for tests that call them directly
+COMMON_DIR = os.path.join(REPO_DIR, "Common")
+
+# Header of the case file, question 3 reads Accurate_Episode_Date and Age_Group
+CASE_HEADER = "Row_ID,Accurate_Episode_Date,Case_Reported_Date,Test_Reported_Date,Specimen_Date,Age_Group,Client_Gender,Case_AcquisitionInfo,Outcome1,Outbreak_Related,Reporting_PHU_ID,Reporting_PHU,Reporting_PHU_Address,Reporting_PHU_City,Reporting_PHU_Postal_Code,Reporting_PHU_Website,Reporting_PHU_Latitude,Reporting_PHU_Longitude"
+
+# Fields of a case row after its dates and age group
+CASE_ROW_TAIL = "FEMALE,CC,Resolved,No,2251,Ottawa Public Health,100 Constellation Drive,Ottawa,K2G 6J8,www.ottawapublichealth.ca,45.345,-75.763"
+
+# Header of the school file, question 2 reads collected_date, school_board and total_confirmed_cases
+SCHOOL_HEADER = "collected_date,reported_date,school_board,school_id,school,municipality,confirmed_student_cases,confirmed_staff_cases,confirmed_unspecified_cases,total_confirmed_cases"
+
+# Header of the outbreak file, question 4 reads date, phu_name and number_ongoing_outbreaks
+OUTBREAK_HEADER = "date,phu_name,phu_num,outbreak_group,number_ongoing_outbreaks"
+
+# Headers of the vaccine and ICU files of question 1
+VACCINE_HEADER = "report_date,previous_day_total_doses_administered,previous_day_at_least_one,previous_day_fully_vaccinated,total_doses_administered,total_individuals_at_least_one,total_individuals_3doses,total_individuals_partially_vaccinated,total_doses_in_fully_vaccinated_individuals,total_individuals_fully_vaccinated,previous_day_3doses"
+ICU_HEADER = "_id,date,icu_unvac,icu_partial_vac,icu_full_vac,hospitalnonicu_unvac,hospitalnonicu_partial_vac,hospitalnonicu_full_vac"
+
+# Make the Common modules importable by the tests that call them directly
+if COMMON_DIR not in sys.path:
+  sys.path.insert(0, COMMON_DIR)
+
+
+# Runs a script with the given arguments from folder cwd (default: the current one) and returns its output lines.
+# Fails the test if the script exits with an error.
+def run_script(script_path, *arguments, cwd=None):
+  result = subprocess.run([sys.executable, script_path, *arguments], capture_output=True, text=True, cwd=cwd)
+  assert result.returncode == 0, result.stderr
+  return result.stdout.splitlines()
+
+
+# Runs a script that is expected to fail and returns its error output. Fails the test if it exits with 0.
+def run_failing_script(script_path, *arguments, cwd=None):
+  result = subprocess.run([sys.executable, script_path, *arguments], capture_output=True, text=True, cwd=cwd)
+  assert result.returncode != 0, result.stdout
+  return result.stderr
+
+
+# Runs a plotting script on a data file from folder, with the arguments after the plotting file name, and returns the lines of its plotting file.
+# The plot is drawn with --render=direct, which writes the same plotting file as seaborn in less time.
+def run_plot(plotting_script, data_file_name, plot_arguments, folder):
+  plotting_file_name = os.path.join(folder, "plotting.csv")
+  run_script(plotting_script, data_file_name, plotting_file_name, *plot_arguments, "--render=direct", cwd=folder)
+  return read_lines(plotting_file_name)
+
+
+# Writes lines to folder/file_name and returns its path
+def write_lines(folder, file_name, lines):
+  path = os.path.join(folder, file_name)
+  with open(path, "w") as data_file:
+    data_file.write("".join(line + "\n" for line in lines))
+  return path
+
+
+# Writes a case file of (date, age group) rows into folder and returns its path
+def write_case_file(folder, cases, file_name="cases.csv"):
+  return write_lines(folder, file_name, [CASE_HEADER] + [f"{row_id},{date},{date},{date},{date},{age_group},{CASE_ROW_TAIL}"
+                                                         for row_id, (date, age_group) in enumerate(cases, 1)])
+
+
+# Writes a school file of (date, school board, total cases) rows into folder and returns its path
+def write_school_file(folder, rows, file_name="schools.csv"):
+  return write_lines(folder, file_name, [SCHOOL_HEADER] + [f"{date},{date},{board},1,School,Town,0,0,0,{cases}" for date, board, cases in rows])
+
+
+# Writes an outbreak file of (date, PHU name, outbreaks) rows into folder and returns its path
+def write_outbreak_file(folder, rows, file_name="outbreaks.csv"):
+  return write_lines(folder, file_name, [OUTBREAK_HEADER] + [f"{date},{phu_name},1,1 Congregate Care,{outbreaks}" for date, phu_name, outbreaks in rows])
+
+
+# Writes a vaccine file of (date, partially vaccinated, fully vaccinated) rows into folder and returns its path
+def write_vaccine_file(folder, rows, file_name="vaccines.csv"):
+  return write_lines(folder, file_name, [VACCINE_HEADER] + [f"{date},0,0,0,0,0,0,{partial},0,{full},0" for date, partial, full in rows])
+
+
+# Writes an ICU file of (date, unvaccinated, partially vaccinated, fully vaccinated) rows into folder and returns its path
+def write_icu_file(folder, rows, file_name="icu.csv"):
+  return write_lines(folder, file_name, [ICU_HEADER] + [f"{row_id},{date},{unvac},{partial},{full},0,0,0"
+                                                        for row_id, (date, unvac, partial, full) in enumerate(rows, 1)])
+
+
+# Returns the lines of a file
+def read_lines(path):
+  with open(path, encoding="utf-8-sig") as data_file:
+    return data_file.read().splitlines()
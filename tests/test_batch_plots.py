@@ -0,0 +1,85 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Checks the --batch mode of the plotting scripts: every job of a JSON or CSV job file writes the same plotting file as a single run with the same arguments, on one process or on worker processes, and a job file with an incomplete job is rejected.
+
+To run on commandline:
+python -m pytest tests
+'''
+
+# Packages/Modules #
+import os
+import json
+import helpers
+
+
+# Constants #
+# (date, school board, cases) rows of question 2, sorted by date and school board
+SCHOOL_ROWS = [
+  ("2021-09-13", "Board A", 1), ("2021-09-13", "Board B", 4),
+  ("2021-09-14", "Board A", 3), ("2021-09-14", "Board B", 2),
+  ("2021-09-15", "Board A", 1), ("2021-09-15", "Board B", 5),
+]
+
+# (date, age group) of each case of question 3
+CASES = [
+  ("2021-01-01", "30s"), ("2021-01-01", "20s"),
+  ("2021-01-02", "20s"), ("2021-01-02", "30s"),
+  ("2021-01-03", "90+"), ("2021-01-04", "20s"),
+]
+
+# Jobs of question 2 as (start, end, school board), and of question 3 as (start, end)
+QUESTION2_JOBS = [("2021-09-13", "2021-09-15", "Board A"), ("2021-09-14", "2021-09-15", "Board B")]
+QUESTION3_JOBS = [("2021-01-01", "2021-01-02"), ("2021-01-02", "2021-01-04")]
+
+
+# Returns the arguments of a single run after the plotting file name, for a date range and a graphics file
+def plot_arguments(start, end, graphics_file_name, categories=()):
+  return [*start.split("-"), *end.split("-"), *categories, graphics_file_name]
+
+
+def test_question2_json_batch_matches_single_runs(tmp_path):
+  folder = str(tmp_path)
+  school_file_name = helpers.write_school_file(folder, SCHOOL_ROWS)
+  preprocessed_file_name = helpers.write_lines(folder, "q2.csv", helpers.run_script(helpers.QUESTION2_PREPROCESS, school_file_name))
+
+  jobs = [{"start": start, "end": end, "categories": [school_board], "graphics_file": f"job{number}.png", "plotting_file": f"job{number}.csv"}
+          for number, (start, end, school_board) in enumerate(QUESTION2_JOBS)]
+  job_file_name = helpers.write_lines(folder, "jobs.json", [json.dumps(jobs)])
+
+  for workers in ("--workers=1", "--workers=2"):
+    for job in jobs:
+      if os.path.exists(os.path.join(folder, job["graphics_file"])):
+        os.remove(os.path.join(folder, job["graphics_file"]))
+    helpers.run_script(helpers.QUESTION2_PLOTTING, preprocessed_file_name, f"--batch={job_file_name}", "--render=direct", workers, cwd=folder)
+
+    for job in jobs:
+      assert os.path.exists(os.path.join(folder, job["graphics_file"]))
+      single_run = helpers.run_plot(helpers.QUESTION2_PLOTTING, preprocessed_file_name,
+                                    plot_arguments(job["start"], job["end"], "single.png", job["categories"]), folder)
+      assert len(single_run) > 1
+      assert helpers.read_lines(os.path.join(folder, job["plotting_file"])) == single_run, workers
+
+
+def test_question3_csv_batch_matches_single_runs(tmp_path):
+  folder = str(tmp_path)
+  case_file_name = helpers.write_case_file(folder, CASES)
+  preprocessed_file_name = helpers.write_lines(folder, "q3.csv", helpers.run_script(helpers.QUESTION3_PREPROCESS, case_file_name))
+
+  job_file_name = helpers.write_lines(folder, "jobs.csv", ["start,end,graphics_file,plotting_file"] +
+                                      [f"{start},{end},job{number}.png,job{number}.csv" for number, (start, end) in enumerate(QUESTION3_JOBS)])
+  helpers.run_script(helpers.QUESTION3_PLOTTING, preprocessed_file_name, f"--batch={job_file_name}", "--render=direct", cwd=folder)
+
+  for number, (start, end) in enumerate(QUESTION3_JOBS):
+    single_run = helpers.run_plot(helpers.QUESTION3_PLOTTING, preprocessed_file_name, plot_arguments(start, end, "single.png"), folder)
+    assert len(single_run) > 1
+    assert helpers.read_lines(os.path.join(folder, f"job{number}.csv")) == single_run
+
+
+def test_incomplete_job_is_rejected(tmp_path):
+  folder = str(tmp_path)
+  preprocessed_file_name = helpers.write_lines(folder, "q2.csv", ["collected_date,school_board,total_confirmed_cases", "2021-09-13,Board A,1"])
+  job_file_name = helpers.write_lines(folder, "jobs.json", [json.dumps([{"start": "2021-09-13", "categories": ["Board A"], "graphics_file": "job.png"}])])
+
+  assert "Job 1" in helpers.run_failing_script(helpers.QUESTION2_PLOTTING, preprocessed_file_name, f"--batch={job_file_name}", cwd=folder)
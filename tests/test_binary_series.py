@@ -0,0 +1,61 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Checks that a plot drawn from a binary series file (--binary) reads back the same rows as the same plot drawn from the preprocessed CSV, for the float percentages of question 1 and the age group counts of question 3.
+
+To run on commandline:
+python -m pytest tests
+'''
+
+# Packages/Modules #
+import os
+import helpers
+
+
+# Constants #
+# Vaccine and ICU rows of question 1
+VACCINE_ROWS = [("2021-08-01", 1000000, 8000000), ("2021-08-02", 1000000, 8100000), ("2021-08-03", 900000, 8200000)]
+ICU_ROWS = [("2021-08-01", 50, 5, 10), ("2021-08-02", 52, 4, 11), ("2021-08-03", 55, 6, 12)]
+
+# (date, age group) of each case of question 3
+CASES = [
+  ("2021-01-01", "30s"), ("2021-01-01", "20s"),
+  ("2021-01-02", "20s"), ("2021-01-02", "30s"), ("2021-01-02", "30s"),
+  ("2021-01-03", "90+"),
+]
+
+# Number of rows of each plotting file: three vaccination groups a day for question 1, one row per date and age group for question 3
+QUESTION1_PLOTTED_ROWS = 3 * len(ICU_ROWS)
+QUESTION3_PLOTTED_ROWS = 5
+
+# Arguments of the plots after the plotting file name: the date range and the graphics file
+QUESTION1_PLOT_ARGUMENTS = ["2021", "8", "1", "2021", "8", "31", "plot.png"]
+QUESTION3_PLOT_ARGUMENTS = ["2021", "1", "1", "2021", "1", "31", "plot.png"]
+
+
+def test_question1_series_plots_like_the_csv(tmp_path):
+  folder = str(tmp_path)
+  vaccine_file_name = helpers.write_vaccine_file(folder, VACCINE_ROWS)
+  icu_file_name = helpers.write_icu_file(folder, ICU_ROWS)
+  series_file_name = os.path.join(folder, "q1.bin")
+
+  preprocessed = helpers.run_script(helpers.QUESTION1_PREPROCESS, vaccine_file_name, icu_file_name, f"--binary={series_file_name}")
+  preprocessed_file_name = helpers.write_lines(folder, "q1.csv", preprocessed)
+
+  from_csv = helpers.run_plot(helpers.QUESTION1_PLOTTING, preprocessed_file_name, QUESTION1_PLOT_ARGUMENTS, folder)
+  assert len(from_csv) == 1 + QUESTION1_PLOTTED_ROWS
+  assert helpers.run_plot(helpers.QUESTION1_PLOTTING, series_file_name, QUESTION1_PLOT_ARGUMENTS, folder) == from_csv
+
+
+def test_question3_series_plots_like_the_csv(tmp_path):
+  folder = str(tmp_path)
+  case_file_name = helpers.write_case_file(folder, CASES)
+  series_file_name = os.path.join(folder, "q3.bin")
+
+  preprocessed = helpers.run_script(helpers.QUESTION3_PREPROCESS, case_file_name, f"--binary={series_file_name}")
+  preprocessed_file_name = helpers.write_lines(folder, "q3.csv", preprocessed)
+
+  from_csv = helpers.run_plot(helpers.QUESTION3_PLOTTING, preprocessed_file_name, QUESTION3_PLOT_ARGUMENTS, folder)
+  assert len(from_csv) == 1 + QUESTION3_PLOTTED_ROWS
+  assert helpers.run_plot(helpers.QUESTION3_PLOTTING, series_file_name, QUESTION3_PLOT_ARGUMENTS, folder) == from_csv
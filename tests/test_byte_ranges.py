@@ -0,0 +1,77 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Checks the line-aligned byte ranges that question3_preprocess.py --workers counts in parallel: csv_ingest.split_byte_ranges cuts a file after the header into contiguous ranges that each end just after a line break, reading the ranges one by one gives every row once and in order, and counting them on worker processes gives the same table as counting the file serially.
+
+To run on commandline:
+python -m pytest tests
+'''
+
+# Packages/Modules #
+import os
+import helpers
+import csv_ingest
+import group_counts
+
+
+# Constants #
+# (date, age group) of each case
+CASES = [(f"2021-01-{day:02}", age_group) for day in range(1, 11) for age_group in ("<20", "20s", "30s", "20s")]
+
+# Fields counted by the columnar engine of question 3
+CASE_FIELDS = {"Accurate_Episode_Date": csv_ingest.CATEGORY, "Age_Group": csv_ingest.CATEGORY}
+
+# Range sizes to cut the file into: shorter than a line, a few lines, and longer than the file
+RANGE_SIZES = [1, 100, 450, 1 << 20]
+
+
+def test_ranges_end_at_line_breaks(tmp_path):
+  case_file_name = helpers.write_case_file(str(tmp_path), CASES)
+  with open(case_file_name, "rb") as case_file:
+    data = case_file.read()
+
+  for range_bytes in RANGE_SIZES:
+    byte_ranges = csv_ingest.split_byte_ranges(case_file_name, range_bytes)
+
+    assert byte_ranges[0][0] == data.index(b"\n") + 1
+    assert byte_ranges[-1][1] == len(data)
+    for (start, end), (next_start, _) in zip(byte_ranges, byte_ranges[1:]):
+      assert end == next_start
+    for start, end in byte_ranges:
+      assert start < end and data[end - 1:end] == b"\n"
+
+
+def test_ranges_read_every_row_once(tmp_path):
+  case_file_name = helpers.write_case_file(str(tmp_path), CASES)
+
+  # The last line has no line break, so the last range ends at the end of the file instead
+  with open(case_file_name, "rb+") as case_file:
+    case_file.truncate(os.path.getsize(case_file_name) - 1)
+
+  for range_bytes in RANGE_SIZES:
+    dates = []
+    for byte_range in csv_ingest.split_byte_ranges(case_file_name, range_bytes):
+      columns, _ = csv_ingest.read_columns(case_file_name, CASE_FIELDS, byte_range=byte_range)
+      dates.extend(columns["Accurate_Episode_Date"].astype(str))
+
+    assert dates == [date for date, _ in CASES], range_bytes
+
+
+def test_workers_count_like_one_process(tmp_path):
+  case_file_name = helpers.write_case_file(str(tmp_path), CASES)
+
+  serial_table = group_counts.count_groups(case_file_name, CASE_FIELDS)
+  parallel_table = group_counts.GroupTable()
+  for counts in group_counts.iter_range_counts(case_file_name, CASE_FIELDS, csv_ingest.split_byte_ranges(case_file_name, 100), workers=2):
+    parallel_table.add(counts)
+
+  assert list(parallel_table.items()) == list(serial_table.items())
+
+
+def test_range_size():
+  megabyte = 1 << 20
+
+  assert group_counts.range_size(0, 4) == group_counts.MIN_RANGE_BYTES
+  assert group_counts.range_size(64 * megabyte, 4) == 4 * megabyte
+  assert group_counts.range_size(1 << 40, 4) == group_counts.RANGE_BYTES
@@ -0,0 +1,48 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Checks the dictionary encoding of question4_preprocess.py --dictionary: the output holds a code per PHU name, the dictionary lists the names in code order, and a plot drawn from the encoded file reads back the same rows as the same plot drawn from the plain CSV.
+
+To run on commandline:
+python -m pytest tests
+'''
+
+# Packages/Modules #
+import os
+import json
+import helpers
+import category_codes
+
+
+# Constants #
+# (date, PHU name, outbreaks) rows. TORONTO is seen first, so the code order is not the alphabetical order.
+OUTBREAK_ROWS = [
+  ("2020-11-05", "TORONTO", 7), ("2020-11-05", "CITY OF OTTAWA", 2),
+  ("2020-11-06", "TORONTO", 3), ("2020-11-06", "NIAGARA REGION", 1), ("2020-11-06", "HALTON REGION", 4),
+  ("2020-11-07", "CITY OF OTTAWA", 1), ("2020-11-07", "NIAGARA REGION", 5),
+]
+
+# Number of rows of the three PHUs plotted
+NUMBER_OF_PLOTTED_ROWS = 6
+
+# Arguments of the plot after the plotting file name: the date range, three PHUs and the graphics file
+PLOT_ARGUMENTS = ["2020", "11", "01", "2020", "11", "30", "TORONTO", "CITY OF OTTAWA", "NIAGARA REGION", "plot.png"]
+
+
+def test_question4_codes_plot_like_the_csv(tmp_path):
+  folder = str(tmp_path)
+  outbreak_file_name = helpers.write_outbreak_file(folder, OUTBREAK_ROWS)
+  encoded_file_name = os.path.join(folder, "q4_encoded.csv")
+
+  plain_file_name = helpers.write_lines(folder, "q4.csv", helpers.run_script(helpers.QUESTION4_PREPROCESS, outbreak_file_name))
+  encoded = helpers.run_script(helpers.QUESTION4_PREPROCESS, outbreak_file_name, f"--dictionary={category_codes.dictionary_path(encoded_file_name)}")
+  helpers.write_lines(folder, "q4_encoded.csv", encoded)
+
+  assert encoded[:3] == ["date,phu_name_code,number_of_outbreaks", "2020-11-05,0,7", "2020-11-05,1,2"]
+  with open(category_codes.dictionary_path(encoded_file_name)) as dictionary_file:
+    assert json.load(dictionary_file)["fields"]["phu_name"] == ["TORONTO", "CITY OF OTTAWA", "NIAGARA REGION", "HALTON REGION"]
+
+  from_csv = helpers.run_plot(helpers.QUESTION4_PLOTTING, plain_file_name, PLOT_ARGUMENTS, folder)
+  assert len(from_csv) == 1 + NUMBER_OF_PLOTTED_ROWS
+  assert helpers.run_plot(helpers.QUESTION4_PLOTTING, encoded_file_name, PLOT_ARGUMENTS, folder) == from_csv
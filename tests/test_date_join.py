@@ -0,0 +1,64 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Checks the gap policies of date_join.py (skip, ffill, interpolate) on dates before, between, on and after the right-hand dates, and that question1_preprocess.py --gap-policy fills an ICU date missing from the vaccine file the same way.
+
+To run on commandline:
+python -m pytest tests
+'''
+
+# Packages/Modules #
+import numpy as np
+import helpers
+import date_join
+
+
+# Constants #
+# Right-hand table, unsorted and with 2021-08-03 repeated (the last row of a date wins)
+RIGHT_DATES = ["2021-08-05", "2021-08-03", "2021-08-01", "2021-08-03"]
+RIGHT_VALUES = [[50, 500], [0, 0], [10, 100], [30, 300]]
+
+# Left-hand dates: before the right-hand range, on a right-hand date, in a gap, on the last right-hand date, after the range, and unknown
+LEFT_DATES = np.array(["2021-07-31", "2021-08-01", "2021-08-02", "2021-08-05", "2021-08-06", "NaT"], dtype="datetime64[D]")
+
+# Expected (matched mask, values of the matched rows) of each gap policy
+EXPECTED_JOINS = {
+  "skip": ([False, True, False, True, False, False], [[10, 100], [50, 500]]),
+  "ffill": ([False, True, True, True, True, False], [[10, 100], [10, 100], [50, 500], [50, 500]]),
+  "interpolate": ([False, True, True, True, False, False], [[10, 100], [20, 200], [50, 500]]),
+}
+
+# Vaccine rows of question 1 with 2021-08-02 missing, and ICU rows for every day
+VACCINE_ROWS = [("2021-08-01", 1000000, 8000000), ("2021-08-03", 900000, 8200000)]
+ICU_ROWS = [("2021-08-01", 50, 5, 10), ("2021-08-02", 52, 4, 11), ("2021-08-03", 55, 6, 12)]
+
+
+def test_gap_policies():
+  right_dates, right_values = date_join.sort_by_date(RIGHT_DATES, RIGHT_VALUES)
+
+  for gap_policy, (expected_matched, expected_values) in EXPECTED_JOINS.items():
+    matched, values = date_join.join(LEFT_DATES, right_dates, right_values, gap_policy)
+
+    assert matched.tolist() == expected_matched, gap_policy
+    assert np.asarray(values).tolist() == expected_values, gap_policy
+
+
+def test_question1_gap_policies(tmp_path):
+  folder = str(tmp_path)
+  icu_file_name = helpers.write_icu_file(folder, ICU_ROWS)
+  vaccine_file_name = helpers.write_vaccine_file(folder, VACCINE_ROWS)
+
+  # Vaccine files with 2021-08-02 filled in the way ffill and interpolate should fill it
+  (_, first_partial, first_full), (_, last_partial, last_full) = VACCINE_ROWS
+  ffilled_file_name = helpers.write_vaccine_file(folder, [VACCINE_ROWS[0], ("2021-08-02", first_partial, first_full), VACCINE_ROWS[1]],
+                                                 file_name="ffilled.csv")
+  interpolated_file_name = helpers.write_vaccine_file(folder, [VACCINE_ROWS[0], ("2021-08-02", (first_partial + last_partial) // 2, (first_full + last_full) // 2),
+                                                               VACCINE_ROWS[1]], file_name="interpolated.csv")
+
+  skip_output = helpers.run_script(helpers.QUESTION1_PREPROCESS, vaccine_file_name, icu_file_name, "--gap-policy=skip")
+  assert [line.split(",")[0] for line in skip_output[1:]] == ["2021-08-01", "2021-08-03"]
+
+  for gap_policy, filled_file_name in (("ffill", ffilled_file_name), ("interpolate", interpolated_file_name)):
+    output = helpers.run_script(helpers.QUESTION1_PREPROCESS, vaccine_file_name, icu_file_name, f"--gap-policy={gap_policy}")
+    assert output == helpers.run_script(helpers.QUESTION1_PREPROCESS, filled_file_name, icu_file_name), gap_policy
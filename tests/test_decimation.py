@@ -0,0 +1,63 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Checks the decimation of long lines in plot_data.py: minmax_indices and lttb_indices keep every point of a line that is already short enough, otherwise keep about target_points points in order, always including the first, last, lowest and highest points, and minmax_indices keeps the lowest and highest point of every bucket.
+
+To run on commandline:
+python -m pytest tests
+'''
+
+# Packages/Modules #
+import numpy as np
+# helpers puts the Common folder on the module path
+import helpers
+import plot_data
+
+
+# Constants #
+# Number of points of the long line, and the number of points to decimate it to
+NUMBER_OF_POINTS = 1000
+TARGET_POINTS = 50
+
+# Positions of a single-point dip and spike in the long line
+DIP_POSITION = 203
+SPIKE_POSITION = 537
+
+
+# Returns a long, slowly varying line with a single-point dip and spike
+def long_line():
+  x = np.arange(NUMBER_OF_POINTS)
+  y = np.sin(x / 50.0)
+  y[DIP_POSITION] = -5.0
+  y[SPIKE_POSITION] = 5.0
+  return x, y
+
+
+def test_short_lines_are_kept():
+  x = np.arange(10)
+  y = np.arange(10, dtype=float)
+
+  for decimator in (plot_data.minmax_indices, plot_data.lttb_indices):
+    assert decimator(x, y, TARGET_POINTS).tolist() == list(range(10))
+
+
+def test_extremes_are_kept():
+  x, y = long_line()
+
+  for decimator in (plot_data.minmax_indices, plot_data.lttb_indices):
+    kept = decimator(x, y, TARGET_POINTS)
+
+    assert len(kept) <= TARGET_POINTS + 2, decimator.__name__
+    assert np.all(np.diff(kept) > 0), decimator.__name__
+    assert {0, NUMBER_OF_POINTS - 1, DIP_POSITION, SPIKE_POSITION} <= set(kept.tolist()), decimator.__name__
+
+
+def test_minmax_keeps_every_bucket_extreme():
+  x, y = long_line()
+  kept = set(plot_data.minmax_indices(x, y, TARGET_POINTS).tolist())
+
+  edges = np.linspace(0, NUMBER_OF_POINTS, TARGET_POINTS // 2 + 1).astype(int)
+  for start, end in zip(edges[:-1], edges[1:]):
+    assert start + int(np.argmin(y[start:end])) in kept
+    assert start + int(np.argmax(y[start:end])) in kept
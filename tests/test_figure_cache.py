@@ -0,0 +1,76 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Checks the figure cache of the plotting scripts (--figure-cache): the key of a figure changes with the preprocessed file, its category dictionary, the plot parameters and the graphics format, a second identical plot is copied from the cache, and a plot of a changed preprocessed file is drawn again rather than copied.
+
+To run on commandline:
+python -m pytest tests
+'''
+
+# Packages/Modules #
+import os
+import json
+import helpers
+import figure_cache
+
+
+# Constants #
+# Preprocessed question 3 file, and the same file with more cases on its last date (its size changes too, so its cached digest is not reused)
+PREPROCESSED = ["Accurate_Episode_Date,Age_Group,Number_of_cases", "2021-01-01,20s,2", "2021-01-01,30s,1", "2021-01-02,20s,4"]
+CHANGED_PREPROCESSED = PREPROCESSED[:-1] + ["2021-01-02,20s,14"]
+
+# Plot parameters of a figure, and the same figure over another date range
+PARAMETERS = {"start_date": "2021-01-01", "end_date": "2021-01-31", "renderer": "direct"}
+OTHER_PARAMETERS = dict(PARAMETERS, end_date="2021-01-15")
+
+# Arguments of the plot after the plotting file name: the date range and the graphics file
+PLOT_ARGUMENTS = ["2021", "1", "1", "2021", "1", "31", "plot.png"]
+
+
+# Runs the question 3 plot through the figure cache and returns the lines of its plotting file and its metrics counters
+def plot_through_cache(data_file_name, folder):
+  metrics_file_name = os.path.join(folder, "metrics.json")
+  plotting_lines = helpers.run_plot(helpers.QUESTION3_PLOTTING, data_file_name, PLOT_ARGUMENTS + [f"--figure-cache={os.path.join(folder, 'figures')}",
+                                                                                                   f"--metrics-json={metrics_file_name}"], folder)
+  with open(metrics_file_name) as metrics_file:
+    return plotting_lines, json.load(metrics_file)["counters"]
+
+
+def test_key_changes_with_what_the_figure_is_drawn_from(tmp_path):
+  folder = str(tmp_path)
+  cache_dir = os.path.join(folder, "figures")
+  os.mkdir(cache_dir)
+  data_file_name = helpers.write_lines(folder, "q3.csv", PREPROCESSED)
+
+  def key(parameters=PARAMETERS, graphics_file_name="plot.png"):
+    return figure_cache.figure_key(cache_dir, helpers.QUESTION3_PLOTTING, data_file_name, parameters, graphics_file_name)
+
+  first_key = key()
+  assert key() == first_key
+  assert key(OTHER_PARAMETERS) != first_key
+  assert key(graphics_file_name="plot.svg") != first_key
+
+  helpers.write_lines(folder, "q3.csv", CHANGED_PREPROCESSED)
+  changed_key = key()
+  assert changed_key != first_key
+
+  helpers.write_lines(folder, "q3.csv.dict.json", ['{"fields": {}}'])
+  assert key() != changed_key
+
+
+def test_changed_input_is_drawn_again(tmp_path):
+  folder = str(tmp_path)
+  data_file_name = helpers.write_lines(folder, "q3.csv", PREPROCESSED)
+
+  first_lines, first_counters = plot_through_cache(data_file_name, folder)
+  second_lines, second_counters = plot_through_cache(data_file_name, folder)
+  assert first_counters.get("figure cache misses") == 1
+  assert second_counters.get("figure cache hits") == 1
+  assert second_lines == first_lines
+
+  helpers.write_lines(folder, "q3.csv", CHANGED_PREPROCESSED)
+  changed_lines, changed_counters = plot_through_cache(data_file_name, folder)
+  assert changed_counters.get("figure cache misses") == 1
+  assert changed_lines != first_lines
+  assert changed_lines == helpers.run_plot(helpers.QUESTION3_PLOTTING, data_file_name, PLOT_ARGUMENTS, folder)
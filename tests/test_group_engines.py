@@ -0,0 +1,107 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Checks that the hash engines of question2_preprocess.py and question4_preprocess.py add up the same totals as their rows engines, with the rows spread unsorted over several files, and that the running table of group_counts.py gives the same totals when it spills to disk and merges the spill files back. The rows engines have no memory budget, so they reject --max-memory and --spill-dir.
+
+To run on commandline:
+python -m pytest tests
+'''
+
+# Packages/Modules #
+import os
+import pandas as pd
+import helpers
+import group_counts
+
+
+# Constants #
+# (date, school board, cases) rows, sorted by date and school board as the rows engine requires
+SCHOOL_ROWS = [
+  ("2021-09-13", "Board A", 1), ("2021-09-13", "Board A", 2), ("2021-09-13", "Board B", 4),
+  ("2021-09-14", "Board A", 3),
+  ("2021-09-15", "Board B", 1), ("2021-09-15", "Board B", 5), ("2021-09-15", "Board C", 2),
+]
+
+# (date, PHU name, outbreaks) rows, sorted by date and PHU name
+OUTBREAK_ROWS = [
+  ("2020-11-05", "CITY OF OTTAWA", 2), ("2020-11-05", "TORONTO", 7), ("2020-11-05", "TORONTO", 1),
+  ("2020-11-06", "NIAGARA REGION", 3), ("2020-11-06", "TORONTO", 8),
+  ("2020-11-07", "CITY OF OTTAWA", 1), ("2020-11-07", "CITY OF OTTAWA", 4),
+]
+
+# Partial count tables added to a running table, with keys repeated across them
+PARTIAL_COUNTS = [
+  {("2021-01-02", "20s"): 1, ("2021-01-01", "30s"): 2},
+  {("2021-01-01", "20s"): 3, ("2021-01-02", "20s"): 4},
+  {("2021-01-03", "90+"): 1, ("2021-01-01", "30s"): 1},
+  {("2021-01-01", "20s"): 2},
+]
+
+
+# Writes the rows unsorted into two files: every other row, last row first, so the rows of a group are split between them
+def write_split_files(write_file, folder, rows):
+  return [write_file(folder, rows[0::2][::-1], file_name="first.csv"), write_file(folder, rows[1::2][::-1], file_name="second.csv")]
+
+
+# Returns a partial count table as group_counts builds them (a Series indexed by tuples of strings)
+def count_table(counts):
+  return pd.Series(list(counts.values()), index=pd.MultiIndex.from_tuples(list(counts)))
+
+
+def test_question2_hash_engine_matches_rows_engine(tmp_path):
+  sorted_file_name = helpers.write_school_file(str(tmp_path), SCHOOL_ROWS)
+  split_file_names = write_split_files(helpers.write_school_file, str(tmp_path), SCHOOL_ROWS)
+
+  rows_output = helpers.run_script(helpers.QUESTION2_PREPROCESS, sorted_file_name)
+  hash_output = helpers.run_script(helpers.QUESTION2_PREPROCESS, *split_file_names, "--engine=hash")
+
+  assert hash_output == rows_output
+  assert hash_output[-1] == "2021-09-15,Board C,2"
+
+
+def test_question4_hash_engine_matches_rows_engine(tmp_path):
+  sorted_file_name = helpers.write_outbreak_file(str(tmp_path), OUTBREAK_ROWS)
+  split_file_names = write_split_files(helpers.write_outbreak_file, str(tmp_path), OUTBREAK_ROWS)
+
+  rows_output = helpers.run_script(helpers.QUESTION4_PREPROCESS, sorted_file_name)
+  hash_output = helpers.run_script(helpers.QUESTION4_PREPROCESS, *split_file_names, "--engine=hash")
+
+  assert hash_output == rows_output
+  assert hash_output[-1] == "2020-11-07,\"CITY OF OTTAWA\",5"
+
+
+def test_hash_engine_with_a_memory_budget(tmp_path):
+  split_file_names = write_split_files(helpers.write_school_file, str(tmp_path), SCHOOL_ROWS)
+
+  expected_output = helpers.run_script(helpers.QUESTION2_PREPROCESS, *split_file_names, "--engine=hash")
+  budget_output = helpers.run_script(helpers.QUESTION2_PREPROCESS, *split_file_names, "--engine=hash", "--max-memory=1G",
+                                     f"--spill-dir={tmp_path}")
+
+  assert budget_output == expected_output
+
+
+def test_spilled_table_merges_back(tmp_path):
+  expected_table = group_counts.GroupTable()
+  spilled_table = group_counts.GroupTable(max_groups=2, spill_dir=str(tmp_path))
+  for counts in PARTIAL_COUNTS:
+    expected_table.add(count_table(counts))
+    spilled_table.add(count_table(counts))
+
+  expected_items = list(expected_table.items())
+  spilled_items = list(spilled_table.items())
+  assert len(spilled_table.spill_files) > 1
+
+  spilled_table.close()
+  assert spilled_items == expected_items
+  assert spilled_items == [(("2021-01-01", "20s"), 5), (("2021-01-01", "30s"), 3), (("2021-01-02", "20s"), 5), (("2021-01-03", "90+"), 1)]
+  assert os.listdir(tmp_path) == []
+
+
+def test_rows_engines_reject_memory_flags(tmp_path):
+  school_file_name = helpers.write_school_file(str(tmp_path), SCHOOL_ROWS)
+  outbreak_file_name = helpers.write_outbreak_file(str(tmp_path), OUTBREAK_ROWS)
+
+  for script_path, data_file_name in ((helpers.QUESTION2_PREPROCESS, school_file_name), (helpers.QUESTION4_PREPROCESS, outbreak_file_name)):
+    for flag in ("--max-memory=1G", f"--spill-dir={tmp_path}"):
+      assert "--engine=hash" in helpers.run_failing_script(script_path, data_file_name, flag)
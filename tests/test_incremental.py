@@ -0,0 +1,95 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Checks the --incremental mode of question1_preprocess.py and question4_preprocess.py: the outputs of successive runs over a growing file, appended together, match a normal run over the final file (question 4 without its last, still open group), a half-written last line is left for the next run, and a file rewritten behind its watermark stops the run.
+
+To run on commandline:
+python -m pytest tests
+'''
+
+# Packages/Modules #
+import os
+import helpers
+
+
+# Constants #
+# (date, partially vaccinated, fully vaccinated) rows of the vaccine file, before and after rows are appended
+VACCINE_ROWS = [("2021-08-01", 1000000, 8000000), ("2021-08-02", 1000000, 8100000), ("2021-08-03", 900000, 8200000)]
+APPENDED_VACCINE_ROWS = [("2021-08-04", 900000, 8300000), ("2021-08-05", 800000, 8400000)]
+
+# (date, unvaccinated, partially, fully) rows of the ICU file. 2021-08-04 has no vaccine data until it is appended,
+# so the first run holds it back.
+ICU_ROWS = [("2021-08-01", 50, 5, 10), ("2021-08-02", 52, 4, 11), ("2021-08-03", 55, 6, 12), ("2021-08-04", 60, 6, 12)]
+APPENDED_ICU_ROWS = [("2021-08-05", 61, 5, 13)]
+
+# (date, PHU name, outbreaks) rows of the outbreak file, before and after rows are appended.
+# The appended rows add to the TORONTO group of 2020-11-06 left open by the first run.
+OUTBREAK_ROWS = [
+  ("2020-11-05", "CITY OF OTTAWA", 2), ("2020-11-05", "TORONTO", 7),
+  ("2020-11-06", "TORONTO", 3),
+]
+APPENDED_OUTBREAK_ROWS = [
+  ("2020-11-06", "TORONTO", 4),
+  ("2020-11-07", "CITY OF OTTAWA", 1), ("2020-11-07", "TORONTO", 5),
+]
+
+
+# Appends text to a file without a line break, as a writer caught in the middle of a line leaves it
+def append_text(path, text):
+  with open(path, "a") as data_file:
+    data_file.write(text)
+
+
+def test_question1_runs_add_up_to_a_full_run(tmp_path):
+  folder = str(tmp_path)
+  state_file_name = os.path.join(folder, "question1_state.json")
+
+  vaccine_file_name = helpers.write_vaccine_file(folder, VACCINE_ROWS)
+  icu_file_name = helpers.write_icu_file(folder, ICU_ROWS)
+  first_output = helpers.run_script(helpers.QUESTION1_PREPROCESS, vaccine_file_name, icu_file_name, f"--incremental={state_file_name}")
+
+  # Writing the files again with more rows leaves their earlier bytes as they were, as appending does
+  helpers.write_vaccine_file(folder, VACCINE_ROWS + APPENDED_VACCINE_ROWS)
+  helpers.write_icu_file(folder, ICU_ROWS + APPENDED_ICU_ROWS)
+  second_output = helpers.run_script(helpers.QUESTION1_PREPROCESS, vaccine_file_name, icu_file_name, f"--incremental={state_file_name}")
+
+  full_output = helpers.run_script(helpers.QUESTION1_PREPROCESS, vaccine_file_name, icu_file_name)
+
+  assert len(first_output) == 1 + len(VACCINE_ROWS)
+  assert [line.split(",")[0] for line in second_output] == ["2021-08-04", "2021-08-05"]
+  assert first_output + second_output == full_output
+
+
+def test_question4_runs_add_up_to_a_full_run(tmp_path):
+  folder = str(tmp_path)
+  state_file_name = os.path.join(folder, "question4_state.json")
+
+  # The first run sees the first appended row only half written, and leaves it for the next run
+  outbreak_file_name = helpers.write_outbreak_file(folder, OUTBREAK_ROWS)
+  date, phu_name, outbreaks = APPENDED_OUTBREAK_ROWS[0]
+  append_text(outbreak_file_name, f"{date},{phu_name},1,1 Congregate")
+  first_output = helpers.run_script(helpers.QUESTION4_PREPROCESS, outbreak_file_name, f"--incremental={state_file_name}")
+
+  helpers.write_outbreak_file(folder, OUTBREAK_ROWS + APPENDED_OUTBREAK_ROWS)
+  second_output = helpers.run_script(helpers.QUESTION4_PREPROCESS, outbreak_file_name, f"--incremental={state_file_name}")
+
+  full_output = helpers.run_script(helpers.QUESTION4_PREPROCESS, outbreak_file_name)
+
+  assert first_output == full_output[:3]
+  assert second_output == ["2020-11-06,\"TORONTO\",7", "2020-11-07,\"CITY OF OTTAWA\",1"]
+  assert first_output + second_output == full_output[:-1]
+
+
+def test_rewritten_tail_stops_the_run(tmp_path):
+  folder = str(tmp_path)
+  state_file_name = os.path.join(folder, "question4_state.json")
+
+  outbreak_file_name = helpers.write_outbreak_file(folder, OUTBREAK_ROWS)
+  helpers.run_script(helpers.QUESTION4_PREPROCESS, outbreak_file_name, f"--incremental={state_file_name}")
+
+  # Revises the last row already processed, then appends a new one
+  revised_rows = OUTBREAK_ROWS[:-1] + [("2020-11-06", "TORONTO", 9)] + APPENDED_OUTBREAK_ROWS
+  helpers.write_outbreak_file(folder, revised_rows)
+
+  assert "rewritten" in helpers.run_failing_script(helpers.QUESTION4_PREPROCESS, outbreak_file_name, f"--incremental={state_file_name}")
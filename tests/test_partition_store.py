@@ -0,0 +1,45 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Checks that a plot drawn from a partition store (--partitions) reads back the same rows, in the same order, as the same plot drawn from the preprocessed CSV.
+
+To run on commandline:
+python -m pytest tests
+'''
+
+# Packages/Modules #
+import os
+import helpers
+
+
+# Constants #
+# (date, age group) of each case. 30s is given its code before 20s, so the code order differs from the output order.
+CASES = [
+  ("2021-01-01", "30s"),
+  ("2021-01-02", "20s"), ("2021-01-02", "30s"), ("2021-01-02", "30s"),
+  ("2021-01-03", "90+"), ("2021-01-03", "20s"),
+  ("2021-02-01", "<20"), ("2021-02-01", "30s"),
+]
+
+# Number of (date, age group) rows of the preprocessed output
+NUMBER_OF_GROUPS = 7
+
+# Date range arguments of the plots
+DATE_RANGE = ["2021", "1", "1", "2021", "2", "28"]
+
+
+def test_question3_store_plots_like_the_csv(tmp_path):
+  folder = str(tmp_path)
+  case_file_name = helpers.write_case_file(folder, CASES)
+  store_dir = os.path.join(folder, "q3_store")
+
+  preprocessed = helpers.run_script(helpers.QUESTION3_PREPROCESS, case_file_name, f"--partitions={store_dir}")
+  preprocessed_file_name = helpers.write_lines(folder, "q3.csv", preprocessed)
+
+  for data_file_name, plotting_file_name in ((preprocessed_file_name, "from_csv.csv"), (store_dir, "from_store.csv")):
+    helpers.run_script(helpers.QUESTION3_PLOTTING, data_file_name, plotting_file_name, *DATE_RANGE, "plot.png", "--render=direct", cwd=folder)
+
+  from_csv = helpers.read_lines(os.path.join(folder, "from_csv.csv"))
+  assert len(from_csv) == 1 + NUMBER_OF_GROUPS
+  assert helpers.read_lines(os.path.join(folder, "from_store.csv")) == from_csv
@@ -0,0 +1,55 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Checks that the rows and columnar engines of question3_preprocess.py print the same rows for the same case file: every date labelled with its own counts, the first and last date included, and no zero counts for age groups missing from a date. Also checks that the rows engine rejects --max-memory and --spill-dir.
+
+To run on commandline:
+python -m pytest tests
+'''
+
+# Packages/Modules #
+import helpers
+
+
+# Constants #
+# (date, age group) of each case, sorted by date as the rows engine requires. 20s is missing from 2021-01-02.
+CASES = [
+  ("2021-01-01", "20s"), ("2021-01-01", "30s"), ("2021-01-01", "20s"),
+  ("2021-01-02", "<20"), ("2021-01-02", "30s"),
+  ("2021-01-03", "20s"), ("2021-01-03", "20s"), ("2021-01-03", "90+"),
+]
+
+# Expected output of both engines
+EXPECTED_OUTPUT = [
+  "Accurate_Episode_Date,Age_Group,Number_of_cases",
+  "2021-01-01,20s,2",
+  "2021-01-01,30s,1",
+  "2021-01-02,30s,1",
+  "2021-01-02,<20,1",
+  "2021-01-03,20s,2",
+  "2021-01-03,90+,1",
+]
+
+
+def test_engines_print_the_same_rows(tmp_path):
+  case_file_name = helpers.write_case_file(str(tmp_path), CASES)
+
+  rows_output = helpers.run_script(helpers.QUESTION3_PREPROCESS, case_file_name, "--engine=rows")
+  columnar_output = helpers.run_script(helpers.QUESTION3_PREPROCESS, case_file_name, "--engine=columnar")
+
+  assert rows_output == columnar_output
+  assert rows_output == EXPECTED_OUTPUT
+
+
+def test_pipelined_rows_engine_matches(tmp_path):
+  case_file_name = helpers.write_case_file(str(tmp_path), CASES)
+
+  assert helpers.run_script(helpers.QUESTION3_PREPROCESS, case_file_name, "--engine=rows", "--pipeline") == EXPECTED_OUTPUT
+
+
+def test_rows_engine_rejects_memory_flags(tmp_path):
+  case_file_name = helpers.write_case_file(str(tmp_path), CASES)
+
+  for flag in ("--max-memory=1G", f"--spill-dir={tmp_path}"):
+    assert "--engine=columnar" in helpers.run_failing_script(helpers.QUESTION3_PREPROCESS, case_file_name, flag)
@@ -0,0 +1,66 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Checks that question2_preprocess.py --snapshots takes the total of each date and school board from the latest snapshot that has it, with the snapshots ordered by file name, whether they are parsed one at a time or on worker processes.
+
+To run on commandline:
+python -m pytest tests
+'''
+
+# Packages/Modules #
+import os
+import helpers
+
+
+# Constants #
+# Rows of each snapshot by file name. The later snapshot revises Board A on 2021-09-13 and 2021-09-14 and adds 2021-09-15,
+# but no longer lists Board B on 2021-09-13.
+SNAPSHOTS = {
+  "schoolrecentcovid2021_2022_2022-01-10_10-00.csv": [
+    ("2021-09-13", "Board A", 1), ("2021-09-13", "Board A", 1), ("2021-09-13", "Board B", 3),
+    ("2021-09-14", "Board A", 4),
+  ],
+  "schoolrecentcovid2021_2022_2022-02-08_22-17.csv": [
+    ("2021-09-13", "Board A", 5),
+    ("2021-09-14", "Board A", 1),
+    ("2021-09-15", "Board C", 2),
+  ],
+}
+
+# Consolidated totals: the latest snapshot wins, and Board B is kept from the earlier one
+EXPECTED_OUTPUT = [
+  "collected_date,school_board,total_confirmed_cases",
+  "2021-09-13,Board A,5",
+  "2021-09-13,Board B,3",
+  "2021-09-14,Board A,1",
+  "2021-09-15,Board C,2",
+]
+
+
+# Writes the snapshots into folder/archive, the latest first so the order they were written in is not the file name order
+def write_snapshots(folder):
+  archive_dir = os.path.join(folder, "archive")
+  os.mkdir(archive_dir)
+  for file_name in sorted(SNAPSHOTS, reverse=True):
+    helpers.write_school_file(archive_dir, SNAPSHOTS[file_name], file_name=file_name)
+  return archive_dir
+
+
+def test_latest_snapshot_wins(tmp_path):
+  archive_dir = write_snapshots(str(tmp_path))
+
+  assert helpers.run_script(helpers.QUESTION2_PREPROCESS, archive_dir, "--snapshots") == EXPECTED_OUTPUT
+
+
+def test_snapshots_on_workers_match(tmp_path):
+  archive_dir = write_snapshots(str(tmp_path))
+
+  output = helpers.run_script(helpers.QUESTION2_PREPROCESS, os.path.join(archive_dir, "schoolrecentcovid*.csv"), "--snapshots", "--workers=2")
+  assert output == EXPECTED_OUTPUT
+
+
+def test_workers_need_snapshots(tmp_path):
+  school_file_name = helpers.write_school_file(str(tmp_path), SNAPSHOTS["schoolrecentcovid2021_2022_2022-02-08_22-17.csv"])
+
+  assert "--snapshots" in helpers.run_failing_script(helpers.QUESTION2_PREPROCESS, school_file_name, "--workers=2")
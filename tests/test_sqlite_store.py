@@ -0,0 +1,63 @@
+'''
+Last Updated: (17-10-2026)
+
+Functionality:
+  Checks that a plot drawn from an SQLite database (--sqlite) reads back the same rows as the same plot drawn from the preprocessed CSV, for the school board selected by question 2 and the age group counts of question 3.
+
+To run on commandline:
+python -m pytest tests
+'''
+
+# Packages/Modules #
+import os
+import helpers
+
+
+# Constants #
+# (date, school board, cases) rows of question 2, sorted by date and school board
+SCHOOL_ROWS = [
+  ("2021-09-13", "Board A", 1), ("2021-09-13", "Board B", 4),
+  ("2021-09-14", "Board A", 3), ("2021-09-14", "Board A", 2),
+  ("2021-09-15", "Board A", 1), ("2021-09-15", "Board B", 5),
+]
+
+# (date, age group) of each case of question 3
+CASES = [
+  ("2021-01-01", "30s"), ("2021-01-01", "20s"),
+  ("2021-01-02", "20s"), ("2021-01-02", "30s"), ("2021-01-02", "30s"),
+  ("2021-01-03", "90+"),
+]
+
+# Number of rows of each plotting file: the dates of Board A for question 2, one row per date and age group for question 3
+QUESTION2_PLOTTED_ROWS = 3
+QUESTION3_PLOTTED_ROWS = 5
+
+# Arguments of the plots after the plotting file name: the date range, the school board of question 2 and the graphics file
+QUESTION2_PLOT_ARGUMENTS = ["2021", "9", "1", "2021", "9", "30", "Board A", "plot.png"]
+QUESTION3_PLOT_ARGUMENTS = ["2021", "1", "1", "2021", "1", "31", "plot.png"]
+
+
+def test_question2_database_plots_like_the_csv(tmp_path):
+  folder = str(tmp_path)
+  school_file_name = helpers.write_school_file(folder, SCHOOL_ROWS)
+  database_file_name = os.path.join(folder, "q2.db")
+
+  preprocessed = helpers.run_script(helpers.QUESTION2_PREPROCESS, school_file_name, f"--sqlite={database_file_name}")
+  preprocessed_file_name = helpers.write_lines(folder, "q2.csv", preprocessed)
+
+  from_csv = helpers.run_plot(helpers.QUESTION2_PLOTTING, preprocessed_file_name, QUESTION2_PLOT_ARGUMENTS, folder)
+  assert len(from_csv) == 1 + QUESTION2_PLOTTED_ROWS
+  assert helpers.run_plot(helpers.QUESTION2_PLOTTING, database_file_name, QUESTION2_PLOT_ARGUMENTS, folder) == from_csv
+
+
+def test_question3_database_plots_like_the_csv(tmp_path):
+  folder = str(tmp_path)
+  case_file_name = helpers.write_case_file(folder, CASES)
+  database_file_name = os.path.join(folder, "q3.db")
+
+  preprocessed = helpers.run_script(helpers.QUESTION3_PREPROCESS, case_file_name, f"--sqlite={database_file_name}")
+  preprocessed_file_name = helpers.write_lines(folder, "q3.csv", preprocessed)
+
+  from_csv = helpers.run_plot(helpers.QUESTION3_PLOTTING, preprocessed_file_name, QUESTION3_PLOT_ARGUMENTS, folder)
+  assert len(from_csv) == 1 + QUESTION3_PLOTTED_ROWS
+  assert helpers.run_plot(helpers.QUESTION3_PLOTTING, database_file_name, QUESTION3_PLOT_ARGUMENTS, folder) == from_csv